@@ -3,12 +3,22 @@ AI Analysis Module
 Provides AI-driven analysis and recommendations for application behavior.
 """
 
+import asyncio
 import logging
 import json
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 import httpx
 from app.discovery import ApplicationInfo
+from app.local_rules import LocalRuleEngine
+from app.model_router import ModelRouter
+from app.stream_parser import IncrementalJSONParser
+
+# Fields surfaced to partial-result callbacks while a completion streams in
+STREAMED_FIELDS = {"risk_level", "concerns", "recommendations", "tunnel_policy"}
+
+# HTTP statuses worth retrying against the same model
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
 
 class AIAnalyzer:
     """AI-driven application analyzer."""
@@ -36,6 +46,19 @@ class AIAnalyzer:
             timeout=30.0  # Set default timeout
         )
         self.running = False
+        self.stream = config["ai_analysis"].get("stream", False)
+        self.max_retries = config["ai_analysis"].get("max_retries", 2)
+        self.retry_backoff = config["ai_analysis"].get("retry_backoff", 0.5)
+        self.stats = {"analyses": 0, "local_decisions": 0, "retries": 0, "errors": 0}
+        
+        # Local fast-path classifier for well-understood processes
+        self.rule_engine = LocalRuleEngine(config["ai_analysis"].get("local_rules"))
+        
+        # Latency-aware routing across primary, fallback and any extra models
+        self.router = ModelRouter(
+            [self.model, self.fallback_model, *config["openrouter"].get("models", [])],
+            config["ai_analysis"].get("routing")
+        )
         
     async def initialize(self):
         """Initialize the AI analyzer."""
@@ -55,12 +78,18 @@ class AIAnalyzer:
         except Exception as e:
             self.logger.error(f"Failed to shutdown AI Analyzer: {str(e)}", exc_info=True)
         
-    async def analyze_application(self, app_info: ApplicationInfo) -> Dict[str, Any]:
+    async def analyze_application(
+        self,
+        app_info: ApplicationInfo,
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """
         Analyze an application using AI.
         
         Args:
             app_info: Application information to analyze
+            on_partial: Optional callback receiving partial recommendations while
+                a streamed completion is still arriving
             
         Returns:
             Dict containing analysis results
@@ -76,12 +105,29 @@ class AIAnalyzer:
             
         try:
             context = self._create_analysis_context(app_info)
-            recommendations = await self._get_ai_recommendations(context)
+            
+            self.stats["analyses"] += 1
+            
+            # Answer well-understood cases locally, escalate the rest
+            verdict = self.rule_engine.evaluate(context)
+            if verdict:
+                self.stats["local_decisions"] += 1
+                self.logger.debug(f"Local rule '{verdict.rule}' classified {app_info.name} (PID: {app_info.pid})")
+                return {
+                    "analysis_timestamp": datetime.now().isoformat(),
+                    "app_info": context,
+                    "recommendations": verdict.to_recommendations(),
+                    "decision_source": "local_rules",
+                    "rule": verdict.rule
+                }
+            
+            recommendations = await self._get_ai_recommendations(context, on_partial)
             
             analysis = {
                 "analysis_timestamp": datetime.now().isoformat(),
                 "app_info": context,
-                "recommendations": recommendations
+                "recommendations": recommendations,
+                "decision_source": "ai"
             }
             
             return analysis
@@ -107,16 +153,21 @@ class AIAnalyzer:
         return {
             "app_name": app_info.name,
             "pid": app_info.pid,
+            "local_host": getattr(app_info, 'local_host', ""),
             "local_port": app_info.local_port,
             "remote_host": app_info.remote_host,
             "remote_port": app_info.remote_port,
+            "local_hosts": sorted(getattr(app_info, 'local_hosts', ())),
+            "remote_hosts": sorted(getattr(app_info, 'remote_hosts', ())),
             "created_at": app_info.created_at.isoformat() if hasattr(app_info, 'created_at') else None,
             "process_info": {
                 "name": app_info.name,
                 "pid": app_info.pid,
                 "status": "running",
-                "is_system_process": app_info.name.lower() in ["system", "services.exe", "svchost.exe"],
-                "is_known_process": self._is_known_process(app_info.name)
+                "exe": getattr(app_info, 'exe', ""),
+                "uid": getattr(app_info, 'uid', None),
+                "is_system_process": self.rule_engine.is_system_process(app_info.name),
+                "is_known_process": self.rule_engine.is_known_process(app_info.name)
             },
             "dtm_state": {
                 "is_tunneled": is_tunneled,
@@ -127,27 +178,11 @@ class AIAnalyzer:
             }
         }
         
-    def _is_known_process(self, process_name: str) -> bool:
-        """Check if the process is a known application."""
-        known_processes = {
-            # Web Servers
-            "nginx.exe", "apache.exe", "httpd.exe", "tomcat.exe", "iis.exe",
-            # Databases
-            "mysqld.exe", "postgres.exe", "oracle.exe", "mongodb.exe", "redis-server.exe",
-            # Development
-            "node.exe", "python.exe", "java.exe", "ruby.exe", "php.exe",
-            # Applications
-            "chrome.exe", "firefox.exe", "msedge.exe", "outlook.exe", "teams.exe",
-            # Game Servers
-            "srcds.exe", "bedrock_server.exe", "java.exe",  # Minecraft uses java
-            # Common Services
-            "services.exe", "svchost.exe", "lsass.exe",
-            # Remote Access
-            "mstsc.exe", "rdpclip.exe", "ssh.exe", "putty.exe"
-        }
-        return process_name.lower() in known_processes
-        
-    async def _get_ai_recommendations(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _get_ai_recommendations(
+        self,
+        context: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
         """Get AI recommendations for the application."""
         try:
             prompt = self._create_analysis_prompt(context)
@@ -211,22 +246,25 @@ You must respond with ONLY a valid JSON object with no additional text, using th
                 "max_tokens": self.config["ai_analysis"]["max_tokens"]
             }
             
-            try:
-                response = await self.http_client.post(
-                    f"{self.base_url}/chat/completions",
-                    json=payload
-                )
-                response.raise_for_status()
-                response_data = response.json()
-            except httpx.ReadTimeout:
-                self.logger.warning(f"Timeout with primary model {self.model}, falling back to {self.fallback_model}")
-                payload["model"] = self.fallback_model
-                response = await self.http_client.post(
-                    f"{self.base_url}/chat/completions",
-                    json=payload
-                )
-                response.raise_for_status()
-                response_data = response.json()
+            # Only the first streaming attempt to produce output drives the callback
+            partial_owner = []
+            
+            def partial_for(model: str) -> Optional[Callable[[Dict[str, Any]], None]]:
+                if not on_partial:
+                    return None
+                
+                def forward(partial: Dict[str, Any]):
+                    if not partial_owner:
+                        partial_owner.append(model)
+                    if partial_owner[0] == model:
+                        on_partial(partial)
+                return forward
+            
+            # Hedged request: the fallback is raced once the primary exceeds its p95
+            response_data, model = await self.router.call(
+                lambda model: self._post_completion({**payload, "model": model}, partial_for(model))
+            )
+            self.logger.debug(f"AI recommendations served by {model}")
             
             # Extract recommendations from response
             if response_data and "choices" in response_data and response_data["choices"]:
@@ -252,6 +290,7 @@ You must respond with ONLY a valid JSON object with no additional text, using th
                     
                 except json.JSONDecodeError as e:
                     self.logger.error(f"Failed to parse AI response: {str(e)}")
+                    self.stats["errors"] += 1
                     return {
                         "risk_level": "unknown",
                         "concerns": ["Failed to parse AI response"],
@@ -263,6 +302,7 @@ You must respond with ONLY a valid JSON object with no additional text, using th
                     }
             else:
                 self.logger.error("No valid response content from AI")
+                self.stats["errors"] += 1
                 return {
                     "risk_level": "unknown",
                     "concerns": ["No response from AI"],
@@ -275,6 +315,7 @@ You must respond with ONLY a valid JSON object with no additional text, using th
             
         except Exception as e:
             self.logger.error(f"Failed to get AI recommendations: {str(e)}", exc_info=True)
+            self.stats["errors"] += 1
             return {
                 "risk_level": "unknown",
                 "concerns": [f"Analysis error: {str(e)}"],
@@ -285,6 +326,91 @@ You must respond with ONLY a valid JSON object with no additional text, using th
                 }
             }
             
+    async def _post_completion(
+        self,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Send a chat completion request to OpenRouter, retrying rate limits and server errors."""
+        attempt = 0
+        while True:
+            try:
+                if self.stream:
+                    return await self._stream_completion(payload, on_partial)
+                
+                response = await self.http_client.post(
+                    f"{self.base_url}/chat/completions",
+                    json=payload
+                )
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPStatusError as e:
+                if attempt >= self.max_retries or e.response.status_code not in RETRYABLE_STATUS:
+                    raise
+                delay = self._retry_delay(e.response, attempt)
+                
+            attempt += 1
+            self.stats["retries"] += 1
+            self.logger.warning(
+                f"Model {payload['model']} returned retryable error, retry {attempt}/{self.max_retries} in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        """Backoff delay for a retry, honoring Retry-After when present."""
+        try:
+            return min(float(response.headers["retry-after"]), 30.0)
+        except (KeyError, ValueError):
+            return self.retry_backoff * (2 ** attempt)
+        
+    def metrics(self) -> Dict[str, Any]:
+        """Return analysis, retry and routing counters."""
+        return {**self.stats, **self.router.stats}
+        
+    async def _stream_completion(
+        self,
+        payload: Dict[str, Any],
+        on_partial: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream a chat completion over Server-Sent Events.
+        
+        Recommendation fields are parsed incrementally and reported through
+        ``on_partial`` as soon as each value completes. The assembled content is
+        returned in the same shape as a non-streamed response.
+        """
+        parser = IncrementalJSONParser()
+        content = []
+        
+        async with self.http_client.stream(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            json={**payload, "stream": True}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments and blank separators
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                
+                chunk = json.loads(data)
+                if "error" in chunk:
+                    raise ValueError(f"Streaming error: {chunk['error']}")
+                choices = chunk.get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if not delta:
+                    continue
+                
+                content.append(delta)
+                events = parser.feed(delta)
+                if on_partial and any(path[0] in STREAMED_FIELDS for path, _ in events):
+                    on_partial(parser.document)
+        
+        return {"choices": [{"message": {"content": "".join(content)}}]}
+            
     def _create_analysis_prompt(self, context: Dict[str, Any]) -> str:
         """Create the analysis prompt for the AI."""
         dtm_state = context["dtm_state"]
@@ -0,0 +1,348 @@
+"""
+Management API Module
+Local REST/WebSocket API for managing tunnels, ports and AI analyses in bulk.
+"""
+
+import asyncio
+import contextlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import uvicorn
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app import __version__
+from app.state_deltas import RESYNC, PageStream
+from app.ui_index import AppFilter, SortedIndex, analysis_risk
+
+if TYPE_CHECKING:
+    from main import DTMApplication
+
+MAX_PAGE_SIZE = 1000
+
+DASHBOARD_PATH = Path(__file__).resolve().parent / "static" / "dashboard.html"
+
+# Comment line sent on idle event streams so proxies keep them open
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+# Where a generated API token is written when api.token is empty
+DEFAULT_TOKEN_FILE = "run/api.token"
+
+
+class PidsRequest(BaseModel):
+    """Bulk request over a set of processes."""
+    pids: List[int] = Field(..., min_length=1)
+
+
+class RotateRequest(BaseModel):
+    """Port rotation request; all assigned ports if pids is omitted."""
+    pids: Optional[List[int]] = None
+
+
+class AnalyzeRequest(PidsRequest):
+    """Batch analysis request."""
+    concurrency: Optional[int] = Field(None, ge=1, le=32)
+
+
+def describe_app(dtm: "DTMApplication", pid: int) -> Dict[str, Any]:
+    """Listing entry for one tracked application."""
+    app_info = dtm.app_discovery.applications[pid]
+    tunnel = dtm.tunnel_manager.tunnels.get(pid)
+    counters = tunnel.counters if tunnel else None
+    return {
+        "pid": pid,
+        "name": app_info.name,
+        "exe": app_info.exe,
+        "local_port": app_info.local_port,
+        "remote_host": app_info.remote_host,
+        "remote_port": app_info.remote_port,
+        "tunnel_port": dtm.port_nuker.port_assignments.get(pid),
+        "tunneled": tunnel is not None,
+        "connections": counters.connections_active if counters else 0,
+        "bytes_sent": counters.bytes_sent if counters else 0,
+        "bytes_received": counters.bytes_received if counters else 0,
+        "rate": counters.rate if counters else 0.0,
+        "risk_level": analysis_risk(dtm.analyses.get(pid))
+    }
+
+
+def same_origin(websocket: WebSocket) -> bool:
+    """Whether a WebSocket handshake comes from a page served by this API."""
+    origin = websocket.headers.get("origin")
+    # Browsers always send Origin; non-browser clients may leave it out
+    if origin is None:
+        return True
+    return urlsplit(origin).netloc.lower() == websocket.headers.get("host", "").lower()
+
+
+def create_api(dtm: "DTMApplication", config: Dict[str, Any]) -> FastAPI:
+    """
+    Build the management API application.
+
+    Args:
+        dtm: The running application
+        config: ``api`` configuration section; ``token`` must be set
+
+    Returns:
+        FastAPI application
+    """
+    token = config.get("token", "")
+    if not token:
+        raise ValueError("The management API requires a token")
+    max_bulk = config.get("max_bulk", 1000)
+
+    def authorized(supplied: Optional[str]) -> bool:
+        return supplied is not None and hmac.compare_digest(supplied, token)
+
+    async def require_token(request: Request):
+        header = request.headers.get("authorization", "")
+        # Browsers cannot set headers on EventSource requests
+        supplied = header[7:] if header.lower().startswith("bearer ") else request.query_params.get("token")
+        if not authorized(supplied):
+            raise HTTPException(status_code=401, detail="Invalid or missing API token")
+
+    def check_bulk(pids: Optional[List[int]]):
+        if pids and len(pids) > max_bulk:
+            raise HTTPException(status_code=413, detail=f"At most {max_bulk} PIDs per request")
+
+    api = FastAPI(title="Dynamic Tunnel Manager API", version=__version__)
+    secured = [Depends(require_token)]
+
+    @api.get("/", include_in_schema=False)
+    async def dashboard():
+        # Static page; the token is only needed by the event stream it opens
+        return FileResponse(DASHBOARD_PATH)
+
+    @api.get("/api/status", dependencies=secured)
+    async def status():
+        return dtm.status_report()
+
+    @api.get("/api/apps", dependencies=secured)
+    async def list_apps(
+        offset: int = Query(0, ge=0),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        q: str = Query("", description="Filter bar query, e.g. '^ssh status:active risk:high'")
+    ):
+        index = dtm.synced_app_index()
+        app_filter = AppFilter.parse(q)
+        pids = index.search(app_filter, dtm.tunnel_manager.tunnels) if app_filter else index.by_pid
+        return {
+            "total": len(pids),
+            "offset": offset,
+            "limit": limit,
+            "items": [describe_app(dtm, pid) for pid in pids.page(offset, limit)]
+        }
+
+    @api.get("/api/tunnels", dependencies=secured)
+    async def list_tunnels(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)):
+        apps = dtm.app_discovery.applications
+        pids = SortedIndex({pid for pid in dtm.tunnel_manager.tunnels if pid in apps})
+        return {
+            "total": len(pids),
+            "offset": offset,
+            "limit": limit,
+            "items": [describe_app(dtm, pid) for pid in pids.page(offset, limit)]
+        }
+
+    @api.post("/api/tunnels/bulk-create", dependencies=secured)
+    async def bulk_create(request: PidsRequest):
+        check_bulk(request.pids)
+        return {"results": await dtm.create_tunnels(request.pids)}
+
+    @api.post("/api/tunnels/bulk-remove", dependencies=secured)
+    async def bulk_remove(request: PidsRequest):
+        check_bulk(request.pids)
+        return {"results": await dtm.remove_tunnels(request.pids)}
+
+    @api.post("/api/ports/rotate", dependencies=secured)
+    async def rotate(request: RotateRequest):
+        check_bulk(request.pids)
+        if request.pids is None:
+            await dtm.port_nuker.force_rotation()
+            rotated = dict(dtm.port_nuker.port_assignments)
+        else:
+            rotated = dtm.port_nuker.rotate_ports(request.pids)
+        return {"rotated": [{"pid": pid, "port": port} for pid, port in rotated.items()]}
+
+    @api.post("/api/certificates/rotate", dependencies=secured)
+    async def rotate_certificate():
+        await dtm.tunnel_manager.rotate_certificate()
+        return {
+            "last_cert_rotation": dtm.tunnel_manager.last_cert_rotation,
+            "cert_pool": dtm.tunnel_manager.cert_pool.metrics()
+        }
+
+    @api.post("/api/analyses/batch", dependencies=secured)
+    async def batch_analyze(request: AnalyzeRequest):
+        check_bulk(request.pids)
+        return {"results": await dtm.analyze_many(request.pids, request.concurrency)}
+
+    @api.get("/api/events", dependencies=secured)
+    async def page_events(
+        request: Request,
+        offset: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE)
+    ):
+        """Server-Sent Events stream of one page of the state (see PageStream)."""
+        return StreamingResponse(
+            sse_page_stream(request, PageStream(dtm.state_deltas, offset, limit)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    @api.websocket("/api/ws")
+    async def state_stream(websocket: WebSocket, since: Optional[int] = None, token: Optional[str] = None):
+        """
+        Stream state deltas.
+
+        Clients get a snapshot (or, with ``since``, the deltas they missed)
+        followed by one message per change. A client that falls behind gets a
+        fresh snapshot. Cross-origin handshakes are refused, so other web pages
+        cannot open the stream with a token they got hold of.
+        """
+        if not same_origin(websocket):
+            await websocket.close(code=4403)
+            return
+        if not authorized(token):
+            await websocket.close(code=4401)
+            return
+        await websocket.accept()
+
+        tracker = dtm.state_deltas
+        subscription = tracker.subscribe()
+        try:
+            missed = tracker.since(since) if since is not None else None
+            if missed is None:
+                await websocket.send_json(tracker.snapshot())
+            else:
+                for delta in missed:
+                    await websocket.send_json(delta)
+            last_seq = tracker.seq
+
+            while True:
+                delta = await subscription.get()
+                if delta is RESYNC:
+                    await websocket.send_json(tracker.snapshot())
+                    last_seq = tracker.seq
+                elif delta["seq"] > last_seq:
+                    await websocket.send_json(delta)
+                    last_seq = delta["seq"]
+        except WebSocketDisconnect:
+            pass
+        finally:
+            tracker.unsubscribe(subscription)
+
+    return api
+
+
+async def sse_page_stream(request: Request, stream: PageStream) -> AsyncIterator[str]:
+    """
+    Encode a page stream as Server-Sent Events.
+
+    Args:
+        request: The streaming request, checked for disconnects
+        stream: Page stream to send; closed when the client goes away
+
+    Yields:
+        SSE frames; the event id is the state sequence number
+    """
+    try:
+        message = stream.snapshot()
+        while not await request.is_disconnected():
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                data = json.dumps(message, separators=(",", ":"))
+                yield f"id: {message['seq']}\nevent: {message['type']}\ndata: {data}\n\n"
+            try:
+                message = await asyncio.wait_for(stream.next(), SSE_KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                message = None
+    finally:
+        stream.close()
+
+
+class _EmbeddedServer(uvicorn.Server):
+    """uvicorn server that leaves signal handling to DTM."""
+
+    def install_signal_handlers(self):
+        pass  # uvicorn < 0.29
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield  # uvicorn >= 0.29
+
+
+class ManagementAPI:
+    """Runs the management API inside DTM's event loop."""
+
+    def __init__(self, dtm: "DTMApplication", config: Dict[str, Any]):
+        """
+        Initialize the API server.
+
+        Args:
+            dtm: The running application
+            config: ``api`` configuration section; without a ``token``, a random
+                one is generated and written to ``token_file`` while serving
+        """
+        self.logger = logging.getLogger(__name__)
+        self.host = config.get("host", "127.0.0.1")
+        self.port = config.get("port", 8765)
+        self.token_file: Optional[Path] = None
+        if not config.get("token"):
+            config = {**config, "token": secrets.token_urlsafe(32)}
+            self.token_file = Path(config.get("token_file", DEFAULT_TOKEN_FILE))
+        self.token = config["token"]
+        self.app = create_api(dtm, config)
+        self.running = False
+        self._server: Optional[_EmbeddedServer] = None
+        self._serve_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start serving and wait until the socket is bound."""
+        if self.running:
+            return
+
+        if self.token_file:
+            self._write_token_file()
+        self._server = _EmbeddedServer(uvicorn.Config(
+            self.app, host=self.host, port=self.port, log_level="warning", access_log=False
+        ))
+        self._serve_task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            if self._serve_task.done():
+                # serve() returns without raising when it cannot bind
+                self._serve_task.result()
+                raise RuntimeError(f"Management API failed to start on {self.host}:{self.port}")
+            await asyncio.sleep(0.05)
+        self.running = True
+        self.logger.info(f"Management API listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop serving, letting open requests finish."""
+        if not self.running:
+            return
+
+        self.running = False
+        self._server.should_exit = True
+        await self._serve_task
+        if self.token_file:
+            self.token_file.unlink(missing_ok=True)
+        self.logger.info("Management API stopped")
+
+    def _write_token_file(self):
+        """Write the generated token, owner-only, for clients to read."""
+        self.token_file.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd = os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token + "\n")
+        os.chmod(self.token_file, 0o600)
+        self.logger.warning(f"api.token is not set; generated a token for this run in {self.token_file}")
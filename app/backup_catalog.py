@@ -0,0 +1,139 @@
+"""
+Backup Catalog Module
+In-memory, persisted index of encrypted state backups with content
+deduplication and constant-time retention.
+"""
+
+import json
+import logging
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from app.state_io import StateIO
+
+CATALOG_FILE = "catalog.json"
+CATALOG_VERSION = 1
+
+
+class BackupCatalog:
+    """Tracks backups per state and stores each distinct payload once."""
+
+    def __init__(self, directory: Path, io: StateIO, retention: int = 5):
+        """
+        Initialize the catalog.
+
+        Args:
+            directory: Backups directory
+            io: State I/O executor used for all disk work
+            retention: Backups kept per state (at least one)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.io = io
+        self.retention = max(1, retention)
+        # state name -> deque of (timestamp, digest), oldest first
+        self.entries: Dict[str, Deque[Tuple[str, str]]] = {}
+        self.refcounts: Dict[str, int] = {}
+        self.stats = {"backups": 0, "deduplicated": 0, "blobs_written": 0, "blobs_removed": 0}
+        self._garbage: Set[str] = set()
+        self._dirty = False
+
+    def blob_path(self, digest: str) -> Path:
+        """Location of a stored payload."""
+        return self.directory / f"{digest}.bak"
+
+    async def load(self):
+        """Load the persisted catalog, dropping entries whose payload is missing."""
+        raw = await self.io.read_bytes(self.directory / CATALOG_FILE)
+        entries = {}
+        if raw:
+            try:
+                catalog = json.loads(raw)
+                if catalog.get("version") == CATALOG_VERSION:
+                    entries = catalog["entries"]
+            except (ValueError, KeyError, AttributeError) as e:
+                self.logger.warning(f"Ignoring unreadable backup catalog: {str(e)}")
+
+        present = set(await self.io.run(lambda: [path.stem for path in self.directory.glob("*.bak")]))
+        self.entries = {
+            name: deque((timestamp, digest) for timestamp, digest in backups if digest in present)
+            for name, backups in entries.items()
+        }
+        self.refcounts = {}
+        for backups in self.entries.values():
+            for _, digest in backups:
+                self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+
+    def has_blob(self, digest: str) -> bool:
+        """Whether a payload with this digest is already stored."""
+        return self.refcounts.get(digest, 0) > 0
+
+    async def add(self, name: str, digest: str, payload: bytes):
+        """
+        Record a backup of a state, storing the payload only if it is new.
+
+        Args:
+            name: State name (file name)
+            digest: Content digest identifying the payload
+            payload: Encrypted backup payload
+        """
+        is_new = not self.has_blob(digest)
+        self.refcounts[digest] = self.refcounts.get(digest, 0) + 1
+        self._garbage.discard(digest)
+
+        backups = self.entries.setdefault(name, deque())
+        backups.append((datetime.utcnow().isoformat(), digest))
+        # Retention: usually one eviction, more if the limit was lowered since the last run
+        while len(backups) > self.retention:
+            _, evicted = backups.popleft()
+            self._release(evicted)
+
+        self._dirty = True
+        self.stats["backups"] += 1
+        if is_new:
+            await self.io.write_atomic(self.blob_path(digest), payload)
+            self.stats["blobs_written"] += 1
+        else:
+            self.stats["deduplicated"] += 1
+
+    def _release(self, digest: str):
+        """Drop one reference; unreferenced payloads are deleted on the next save."""
+        self.refcounts[digest] -= 1
+        if not self.refcounts[digest]:
+            del self.refcounts[digest]
+            self._garbage.add(digest)
+
+    def candidates(self, name: str) -> List[Path]:
+        """Backup payloads of a state, newest first."""
+        return [self.blob_path(digest) for _, digest in reversed(self.entries.get(name, ()))]
+
+    def latest(self, name: str) -> Optional[str]:
+        """Digest of the newest backup of a state."""
+        backups = self.entries.get(name)
+        return backups[-1][1] if backups else None
+
+    async def save(self):
+        """Persist the catalog and delete payloads no backup references anymore."""
+        garbage = [digest for digest in self._garbage if digest not in self.refcounts]
+        self._garbage.clear()
+        if garbage:
+            await self.io.run(self._remove_blobs, garbage)
+
+        if not self._dirty:
+            return
+        self._dirty = False
+        catalog = {
+            "version": CATALOG_VERSION,
+            "entries": {name: list(backups) for name, backups in self.entries.items() if backups}
+        }
+        await self.io.write_atomic(self.directory / CATALOG_FILE, json.dumps(catalog).encode())
+
+    def _remove_blobs(self, digests: List[str]):
+        """Delete unreferenced payloads (state I/O thread)."""
+        for digest in digests:
+            try:
+                self.blob_path(digest).unlink()
+                self.stats["blobs_removed"] += 1
+            except FileNotFoundError:
+                continue
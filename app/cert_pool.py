@@ -0,0 +1,246 @@
+"""
+Certificate Pool Module
+Pre-generates TLS key/certificate pairs in worker processes so rotation never
+waits on key generation.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+SUPPORTED_ALGORITHMS = ("rsa", "ecdsa-p256")
+
+# Consecutive generation failures after which waiting acquirers give up
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+def generate_key_pair(algorithm: str, common_name: str, validity_days: int, rsa_key_size: int = 2048) -> Tuple[bytes, bytes]:
+    """
+    Generate a private key and a self-signed certificate.
+
+    Runs inside worker processes, so it only takes and returns picklable values.
+
+    Args:
+        algorithm: "rsa" or "ecdsa-p256"
+        common_name: Certificate subject common name
+        validity_days: Certificate lifetime in days
+        rsa_key_size: Key size for RSA keys
+
+    Returns:
+        (certificate PEM, PKCS8 private key PEM)
+    """
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, rsa
+    import datetime as dt
+
+    if algorithm == "ecdsa-p256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "rsa":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=rsa_key_size)
+    else:
+        raise ValueError(f"Unsupported key algorithm: {algorithm}")
+
+    subject = issuer = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = dt.datetime.utcnow()
+    cert = x509.CertificateBuilder().subject_name(
+        subject
+    ).issuer_name(
+        issuer
+    ).public_key(
+        private_key.public_key()
+    ).serial_number(
+        x509.random_serial_number()
+    ).not_valid_before(
+        now
+    ).not_valid_after(
+        now + dt.timedelta(days=validity_days)
+    ).sign(private_key, hashes.SHA256())
+
+    return (
+        cert.public_bytes(serialization.Encoding.PEM),
+        private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+    )
+
+
+@dataclass
+class CertificateMaterial:
+    """A ready-to-install key/certificate pair."""
+    cert_pem: bytes
+    key_pem: bytes
+    algorithm: str
+    created_at: datetime
+
+
+class CertificatePool:
+    """Keeps a configurable number of pre-generated key/certificate pairs ready."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            config: Optional ``cert_pool`` configuration section
+        """
+        self.logger = logging.getLogger(__name__)
+        config = config or {}
+        self.algorithm = config.get("algorithm", "rsa")
+        if self.algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported key algorithm: {self.algorithm}")
+        self.depth = config.get("depth", 2)
+        self.workers = config.get("workers", 1)
+        self.common_name = config.get("common_name", "localhost")
+        self.validity_days = config.get("validity_days", 365)
+        self.rsa_key_size = config.get("rsa_key_size", 2048)
+        self.acquire_timeout = config.get("acquire_timeout", 120.0)
+
+        self.running = False
+        self.stats = {"generated": 0, "served": 0, "waited": 0, "failures": 0}
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._in_flight: Set[asyncio.Future] = set()
+        self._waiting = 0
+        self._refill = asyncio.Event()
+        # Set while generation keeps failing, so acquirers stop waiting
+        self._failing = asyncio.Event()
+        self._consecutive_failures = 0
+        self._last_error: Optional[BaseException] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._refill_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the worker processes and fill the pool in the background."""
+        if self.running:
+            return
+
+        self.running = True
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._refill_task = asyncio.create_task(self._refill_loop())
+        self._refill.set()
+        self.logger.info(f"Certificate pool started ({self.algorithm}, depth: {self.depth}, workers: {self.workers})")
+
+    async def stop(self):
+        """Stop refilling and shut the worker processes down."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._refill_task:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+        for future in self._in_flight:
+            future.cancel()
+        if self._executor:
+            await asyncio.to_thread(self._executor.shutdown, True, cancel_futures=True)
+            self._executor = None
+        self.logger.info("Certificate pool stopped")
+
+    async def acquire(self, timeout: Optional[float] = None) -> CertificateMaterial:
+        """
+        Take a ready key/certificate pair, waiting for one only if the pool is empty.
+
+        Args:
+            timeout: Seconds to wait for a pair (acquire_timeout by default)
+
+        Returns:
+            Pre-generated certificate material
+
+        Raises:
+            RuntimeError: Generation failed repeatedly or did not finish in time
+        """
+        if not self.running:
+            # Pool not started; generate directly without blocking the loop
+            cert_pem, key_pem = await asyncio.to_thread(self._generate)
+            return CertificateMaterial(cert_pem, key_pem, self.algorithm, datetime.now())
+
+        timeout = self.acquire_timeout if timeout is None else timeout
+        if self._ready.empty():
+            self.stats["waited"] += 1
+        self._waiting += 1
+        self._refill.set()
+        get_task = asyncio.create_task(self._ready.get())
+        failing_task = asyncio.create_task(self._failing.wait())
+        try:
+            await asyncio.wait(
+                (get_task, failing_task),
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            self._waiting -= 1
+            failing_task.cancel()
+            if not get_task.done():
+                get_task.cancel()
+
+        if not get_task.done():
+            if failing_task.done() and not failing_task.cancelled():
+                raise RuntimeError(f"Certificate generation is failing: {str(self._last_error)}") from self._last_error
+            raise RuntimeError(f"No certificate was generated within {timeout}s")
+        material = get_task.result()
+        self.stats["served"] += 1
+        self._refill.set()
+        return material
+
+    def _generate(self) -> Tuple[bytes, bytes]:
+        return generate_key_pair(self.algorithm, self.common_name, self.validity_days, self.rsa_key_size)
+
+    async def _refill_loop(self):
+        """Keep ready + in-flight pairs at the configured depth."""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            await self._refill.wait()
+            self._refill.clear()
+
+            # Waiting acquirers count against the depth so nobody waits forever
+            deficit = self.depth + self._waiting - self._ready.qsize() - len(self._in_flight)
+            for _ in range(max(0, deficit)):
+                future = loop.run_in_executor(
+                    self._executor, generate_key_pair,
+                    self.algorithm, self.common_name, self.validity_days, self.rsa_key_size
+                )
+                self._in_flight.add(future)
+                future.add_done_callback(self._on_generated)
+
+    def _on_generated(self, future: asyncio.Future):
+        """Move a finished pair into the pool."""
+        self._in_flight.discard(future)
+        if future.cancelled():
+            return
+        if future.exception():
+            self.stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = future.exception()
+            self.logger.error(f"Certificate pre-generation failed: {str(future.exception())}")
+            if self._consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                self._failing.set()
+            if self.running:
+                # Back off briefly before retrying
+                asyncio.get_running_loop().call_later(1.0, self._refill.set)
+            return
+
+        cert_pem, key_pem = future.result()
+        self._consecutive_failures = 0
+        self._failing.clear()
+        self._ready.put_nowait(CertificateMaterial(cert_pem, key_pem, self.algorithm, datetime.now()))
+        self.stats["generated"] += 1
+        self._refill.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool depth and refill counters."""
+        return {
+            "algorithm": self.algorithm,
+            "target_depth": self.depth,
+            "ready": self._ready.qsize(),
+            "in_flight": len(self._in_flight),
+            **self.stats
+        }
@@ -4,7 +4,8 @@ Provides a rich terminal user interface for the Dynamic Tunnel Manager.
 """
 
 import asyncio
-from typing import Dict, List, Optional
+import time
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from rich.live import Live
 from rich.table import Table
@@ -16,6 +17,11 @@ from rich import box
 from rich.align import Align
 from app.discovery import ApplicationInfo
 from app.tunnel_manager import TunnelInfo
+from app.tunnel_metrics import format_rate, sparkline
+from app.ui_index import AppFilter, AppIndex, SortedIndex
+
+PANELS = ("header", "main", "footer")
+SPARKLINE_WIDTH = 16
 
 class DTMUI:
     """Dynamic Tunnel Manager UI."""
@@ -41,6 +47,16 @@ class DTMUI:
         self.port_assignments: Dict[int, int] = {}
         self.last_rotation: Optional[datetime] = None
         
+        # Sorted and grouped views of active_apps, maintained incrementally
+        self.index = AppIndex()
+        
+        # Filter bar state
+        self.filter_mode = False  # Typing into the filter bar
+        self.filter_query = ""
+        self._app_filter = AppFilter()
+        self._filter_results: Optional[SortedIndex] = None  # Invalidated on data changes
+        self.filter_time_ms = 0.0
+        
         # Scrolling state for main process list
         self.scroll_position = 0
         self.items_per_page = config["ui"]["items_per_page"]
@@ -70,6 +86,19 @@ class DTMUI:
         # PID selection state
         self.available_pids = []
         self.pid_selection_index = 0
+        
+        # Dirty tracking: panels are only regenerated when their inputs change
+        self._dirty: Set[str] = set(PANELS)
+        self._wake = asyncio.Event()
+        self._data_versions: Optional[Tuple[int, ...]] = None
+        self._redraw_at: Optional[float] = None  # Deadline for time-based labels
+        self._console_size = None
+        
+        # Adaptive refresh: up to max_refresh_rate frames/s while data churns,
+        # backing off to one size/timer check per idle_refresh_interval
+        self.max_refresh_rate = config["ui"].get("max_refresh_rate", 20)
+        self.idle_refresh_interval = config["ui"].get("idle_refresh_interval", 1.0)
+        self.render_stats = {"frames": 0, "panels": 0, "last_ms": 0.0, "avg_ms": 0.0, "max_ms": 0.0}
 
     def _setup_layout(self):
         """Setup the layout structure."""
@@ -102,28 +131,23 @@ class DTMUI:
         table.add_column("Recommendations", width=None, ratio=2, overflow="fold")
         table.add_column("Tunnel Policy", width=None, ratio=1, overflow="fold")
         
-        # Group analyses by application name
-        app_analyses = {}
-        for pid, analysis in self.ai_analyses.items():
-            if pid in self.active_apps:
-                app_name = self.active_apps[pid].name
-                if app_name not in app_analyses:
-                    app_analyses[app_name] = {"pids": [], "analysis": analysis}
-                app_analyses[app_name]["pids"].append(pid)
-        
-        # Sort by application name
-        sorted_analyses = sorted(app_analyses.items(), key=lambda x: x[0])
+        # Analyzed applications, grouped and sorted by name
+        analyzed_names = self.index.analyzed_names
+        total_analyses = len(analyzed_names)
         
         # Ensure scroll position is within bounds
-        max_scroll = max(0, len(sorted_analyses) - self.ai_items_per_page)
+        max_scroll = max(0, total_analyses - self.ai_items_per_page)
         self.ai_scroll_position = min(max_scroll, self.ai_scroll_position)
         
         # Calculate visible range for AI analysis
         start_idx = self.ai_scroll_position
-        end_idx = min(start_idx + self.ai_items_per_page, len(sorted_analyses))
-        visible_analyses = sorted_analyses[start_idx:end_idx]
+        end_idx = min(start_idx + self.ai_items_per_page, total_analyses)
+        visible_analyses = []
+        for app_name in analyzed_names.page(start_idx, self.ai_items_per_page):
+            pids = sorted(self.index.analyzed_by_name[app_name])
+            visible_analyses.append((app_name, {"pids": pids, "analysis": self.ai_analyses[pids[0]]}))
         
-        if not sorted_analyses:
+        if not total_analyses:
             table.add_row(
                 "",
                 "No analyses yet",
@@ -160,6 +184,8 @@ class DTMUI:
                 ).replace("\n", " ")
                 
                 risk_level = recommendations.get("risk_level", "unknown")
+                if analysis.get("partial"):
+                    policy_text += " …"
                 risk_style = {
                     "low": "green",
                     "medium": "yellow",
@@ -177,9 +203,9 @@ class DTMUI:
         
         # Add scroll indicator and controls
         controls = Text()
-        if len(sorted_analyses) > self.ai_items_per_page:
+        if total_analyses > self.ai_items_per_page:
             current_page = (self.ai_scroll_position // self.ai_items_per_page) + 1
-            total_pages = (len(sorted_analyses) + self.ai_items_per_page - 1) // self.ai_items_per_page
+            total_pages = (total_analyses + self.ai_items_per_page - 1) // self.ai_items_per_page
             
             # Add scroll position indicator
             scroll_indicator = "↑ " if self.ai_scroll_position > 0 else "  "
@@ -187,7 +213,7 @@ class DTMUI:
             
             controls.append(f"{scroll_indicator} ", style="bold cyan")
             controls.append(f"Page {current_page}/{total_pages} ", style="cyan")
-            controls.append(f"(Showing {start_idx + 1}-{end_idx} of {len(sorted_analyses)})", style="dim")
+            controls.append(f"(Showing {start_idx + 1}-{end_idx} of {total_analyses})", style="dim")
         
         # Add instructions
         instructions = Text("\nPress [P] to analyze a process", style="cyan bold")
@@ -240,21 +266,25 @@ class DTMUI:
         table.add_column("Tunnel Port", justify="right", style="magenta", width=12)
         table.add_column("Remote Host", width=15)
         table.add_column("Remote Port", justify="right", width=12)
+        table.add_column("Conns", justify="right", width=6)
+        table.add_column("Throughput", justify="right", width=11)
+        table.add_column("Activity", style="magenta", width=SPARKLINE_WIDTH)
         table.add_column("Status", width=12)
         table.add_column("Action", width=15)
 
-        # Sort applications by PID for consistent display
-        sorted_apps = sorted(self.active_apps.items(), key=lambda x: x[0])
-        self.total_items = len(sorted_apps)
-
-        # Calculate visible range
-        start_idx = self.scroll_position
-        end_idx = min(start_idx + self.items_per_page, len(sorted_apps))
-        visible_apps = sorted_apps[start_idx:end_idx]
+        # Applications are shown in PID order; only the visible page is materialized
+        pids = self._filtered_pids()
+        self.total_items = len(pids)
+        visible_pids = pids.page(self.scroll_position, self.items_per_page)
 
-        for pid, app in visible_apps:
+        for pid in visible_pids:
+            app = self.active_apps.get(pid)
+            if app is None:
+                continue
             tunnel_port = self.port_assignments.get(pid, "N/A")
+            tunnel = self.active_tunnels.get(pid)
             tunnel_active = pid in self.active_tunnels
+            counters = getattr(tunnel, "counters", None)
             
             status_style = "green" if tunnel_active else "red"
             status = "🔒 Active" if tunnel_active else "⚪ Inactive"
@@ -280,6 +310,9 @@ class DTMUI:
                 str(tunnel_port),
                 app.remote_host[:15] or "localhost",  # Truncate long hosts
                 str(app.remote_port or "N/A"),
+                str(counters.connections_active) if counters else "-",
+                format_rate(counters.rate) if counters else "-",
+                sparkline(counters.history.values(), SPARKLINE_WIDTH) if counters else "",
                 Text(status, style=status_style),
                 Text(action, style=action_style)
             )
@@ -287,6 +320,7 @@ class DTMUI:
         # Add focus indicator to the title
         focus_indicator = "" if self.focus_ai_section else "[bold cyan]▶[/] "
         table.title = f"{focus_indicator}Active Applications"
+        table.caption = self._filter_caption()
 
         return table
 
@@ -297,6 +331,7 @@ class DTMUI:
                 ("↑/↓", "Scroll"),
                 ("T", "Toggle Auto-Tunnel"),
                 ("→", "Switch to AI Analysis"),
+                ("/", "Filter"),
                 ("R", "Force Port Rotation"),
                 ("Q", "Quit")
             ]
@@ -352,22 +387,23 @@ class DTMUI:
         table.add_column("Port", justify="right", width=10)
         table.add_column("Status", width=15)
         
-        # Sort processes by PID
-        sorted_apps = sorted(
-            [(pid, app) for pid, app in self.active_apps.items()],
-            key=lambda x: x[0]
-        )
-        self.available_pids = [pid for pid, _ in sorted_apps]
+        # Processes in PID order, straight from the index
+        self.available_pids = self._filtered_pids()
+        total_apps = len(self.available_pids)
         
         # Calculate pagination
         items_per_page = 11  # Number of items to show per page
-        total_pages = (len(sorted_apps) + items_per_page - 1) // items_per_page
+        total_pages = (total_apps + items_per_page - 1) // items_per_page
         current_page = self.pid_selection_index // items_per_page
         
         # Calculate visible range for current page
         start_idx = current_page * items_per_page
-        end_idx = min(start_idx + items_per_page, len(sorted_apps))
-        visible_apps = sorted_apps[start_idx:end_idx]
+        end_idx = min(start_idx + items_per_page, total_apps)
+        visible_apps = [
+            (pid, self.active_apps[pid])
+            for pid in self.available_pids.page(start_idx, items_per_page)
+            if pid in self.active_apps
+        ]
         
         # Calculate relative selection index within current page
         relative_index = self.pid_selection_index % items_per_page
@@ -387,10 +423,11 @@ class DTMUI:
         page_info = Text()
         if total_pages > 1:
             page_info.append(f"\nPage {current_page + 1}/{total_pages} ", style="cyan")
-            page_info.append(f"(Showing {start_idx + 1}-{end_idx} of {len(sorted_apps)})", style="dim")
+            page_info.append(f"(Showing {start_idx + 1}-{end_idx} of {total_apps})", style="dim")
         
         instructions = Text()
-        instructions.append("\n↑/↓ to select, ENTER to confirm, ESC to cancel", style="cyan")
+        instructions.append("\n↑/↓ to select, / to filter, ENTER to confirm, ESC to cancel", style="cyan")
+        table.caption = self._filter_caption()
         
         return Panel(
             Group(
@@ -403,19 +440,85 @@ class DTMUI:
             padding=(1, 2)
         )
 
+    def _filtered_pids(self) -> SortedIndex:
+        """PIDs matching the filter bar (all tracked PIDs if no filter is set)."""
+        if not self._app_filter:
+            return self.index.by_pid
+        if self._filter_results is None:
+            start = time.perf_counter()
+            self._filter_results = self.index.search(self._app_filter, self.active_tunnels)
+            self.filter_time_ms = (time.perf_counter() - start) * 1000
+        return self._filter_results
+
+    def _set_filter(self, query: str):
+        """Apply a new filter bar query and return to the first page."""
+        self.filter_query = query
+        self._app_filter = AppFilter.parse(query)
+        self._filter_results = None
+        self.scroll_position = 0
+        self.pid_selection_index = 0
+
+    def _filter_caption(self) -> Optional[Text]:
+        """Filter bar shown under the process tables."""
+        if not self.filter_mode and not self.filter_query:
+            return None
+        caption = Text()
+        if self.filter_mode:
+            caption.append(f"/ {self.filter_query}▌", style="bold yellow")
+        else:
+            caption.append(f"Filter: {self.filter_query}", style="yellow")
+        if self._app_filter:
+            caption.append(
+                f"  {len(self._filtered_pids())} matches ({self.filter_time_ms:.2f} ms)",
+                style="dim"
+            )
+        return caption
+
+    def mark_dirty(self, *panels: str):
+        """
+        Schedule panels for regeneration on the next frame.
+        
+        Args:
+            *panels: Panel names (header, main, footer); all panels if omitted
+        """
+        self._dirty.update(panels or PANELS)
+        self._wake.set()
+
     def update(
         self,
         apps: Dict[int, ApplicationInfo],
         tunnels: Dict[int, TunnelInfo],
         ports: Dict[int, int],
-        last_rotation: Optional[datetime]
+        last_rotation: Optional[datetime],
+        versions: Optional[Tuple[int, ...]] = None
     ):
-        """Update the UI with new data."""
+        """
+        Update the UI with new data.
+        
+        Args:
+            apps: Active applications by PID
+            tunnels: Active tunnels by PID
+            ports: Tunnel port assignments by PID
+            last_rotation: Time of the last port rotation
+            versions: Change counters of the data sources; if omitted the
+                data is assumed to have changed
+        """
+        if versions is None or versions != self._data_versions or last_rotation != self.last_rotation:
+            self._filter_results = None
+            self.mark_dirty("main", "footer")
+            if last_rotation != self.last_rotation and last_rotation is not None:
+                # The "Rotating" action label expires one second after a rotation
+                self._redraw_at = time.monotonic() + 1.0
+        self._data_versions = versions
+        
+        if apps is not self.active_apps or len(self.index) != len(apps):
+            # Not kept in sync through apply_app_changes; rebuild once
+            self.index.rebuild(apps, self.ai_analyses)
         self.active_apps = apps
         self.active_tunnels = tunnels
         self.port_assignments = ports
         self.last_rotation = last_rotation
-        self.total_items = len(apps)  # Update total items count
+        self.total_items = len(self._filtered_pids())  # Update total items count
         
         # Adjust scroll positions if needed
         if not self.focus_ai_section:
@@ -425,33 +528,101 @@ class DTMUI:
             max_ai_scroll = max(0, len(self.ai_analyses) - self.ai_items_per_page)
             self.ai_scroll_position = min(self.ai_scroll_position, max_ai_scroll)
 
-    def add_analysis_result(self, pid: int, analysis: Dict):
+    def apply_app_changes(self, added: List[ApplicationInfo], removed: List[ApplicationInfo]):
+        """
+        Apply an application discovery delta to the UI indexes.
+        
+        Args:
+            added: Newly discovered applications
+            removed: Applications that went away
+        """
+        self.index.apply_changes(added, removed, self.ai_analyses)
+        self._filter_results = None
+        self.mark_dirty("main", "footer")
+
+    def _index_analysis(self, pids: List[int]):
+        """Add analyzed PIDs to the analysis grouping."""
+        for pid in pids:
+            self.index.add_analysis(self.active_apps.get(pid), self.ai_analyses.get(pid))
+        if self._app_filter.risks:
+            self._filter_results = None
+
+    def add_analysis_result(self, pid: int, analysis: Dict, related_pids: Optional[List[int]] = None):
         """
         Add or update AI analysis results.
         
+        Selection state is left alone: analyses finish in the background,
+        possibly while another process is being picked.
+        
         Args:
             pid: The primary PID that was analyzed
             analysis: The analysis results to store
+            related_pids: PIDs of the same application, as selected when the
+                analysis started
         """
-        # Store the analysis for the primary PID
+        related_pids = related_pids or []
+        # Store the analysis for the primary PID and its group
         self.ai_analyses[pid] = analysis
+        for related_pid in related_pids:
+            self.ai_analyses[related_pid] = analysis
+        self._index_analysis([pid] + related_pids)
+        self.mark_dirty("main", "footer")
+
+    def set_analysis_result(self, pid: int, analysis: Dict):
+        """
+        Replace the stored analysis for a PID without touching selection state.
         
-        # If there are related PIDs, store the same analysis for them
-        if hasattr(self, 'related_pids') and self.related_pids:
-            for related_pid in self.related_pids:
-                if related_pid != pid:  # Skip the primary PID as it's already stored
-                    self.ai_analyses[related_pid] = analysis
-            
-        self.selected_pid = None  # Reset selection
-        self.related_pids = []    # Reset related PIDs
-        self.analysis_mode = False  # Exit analysis mode
+        Args:
+            pid: The PID that was re-analyzed
+            analysis: The refreshed analysis results
+        """
+        self.ai_analyses[pid] = analysis
+        self._index_analysis([pid])
+        self.mark_dirty("main", "footer")
+
+    def update_partial_analysis(self, pid: int, partial: Dict, related_pids: Optional[List[int]] = None):
+        """
+        Show partial AI recommendations while a streamed analysis is in progress.
+        
+        Args:
+            pid: The primary PID being analyzed
+            partial: Recommendation fields parsed so far
+            related_pids: PIDs of the same application, as selected when the
+                analysis started
+        """
+        related_pids = related_pids or []
+        analysis = {"recommendations": partial, "partial": True}
+        self.ai_analyses[pid] = analysis
+        for related_pid in related_pids:
+            self.ai_analyses[related_pid] = analysis
+        self._index_analysis([pid] + related_pids)
+        self.mark_dirty("main", "footer")
 
     def handle_input(self, key: str) -> bool:
         """Handle keyboard input."""
+        self.mark_dirty("main", "footer")
+        if self.filter_mode:
+            if key == 'escape':
+                self.filter_mode = False
+                self._set_filter("")
+            elif key == 'enter':
+                self.filter_mode = False
+            elif key == 'backspace':
+                self._set_filter(self.filter_query[:-1])
+            elif key == 'space':
+                self._set_filter(self.filter_query + " ")
+            elif len(key) == 1 and key.isprintable():
+                self._set_filter(self.filter_query + key)
+            return True
+        
         if self.analysis_mode:
             items_per_page = 11
             total_items = len(self.available_pids)
             
+            if key == '/':
+                self.filter_mode = True
+                return True
+            
             if key == 'escape':
                 self.analysis_mode = False
                 self.pid_input = ""
@@ -476,16 +647,17 @@ class DTMUI:
                 selected_app_name = self.active_apps[selected_pid].name
                 # Find all PIDs with the same application name
                 self.selected_pid = selected_pid  # Store the primary PID
-                self.related_pids = [  # Store related PIDs separately
-                    pid for pid, app in self.active_apps.items()
-                    if app.name == selected_app_name
-                ]
+                self.related_pids = self.index.related_pids(selected_app_name)
                 self.analysis_mode = False
                 return True
                 
         else:
             if key == 'q':
                 return False
+            elif key == '/' and self.current_view == "main":
+                self.filter_mode = True
+            elif key == 'escape' and self.filter_query:
+                self._set_filter("")
             elif key == 't' and self.current_view == "main":
                 self.config["auto_tunnel"] = not self.config["auto_tunnel"]
             elif key == 'right':  # Right arrow to go to AI view
@@ -522,30 +694,76 @@ class DTMUI:
         
         return True
 
+    def _check_triggers(self):
+        """Mark panels dirty for changes that are not data updates (resize, timers)."""
+        size = self.console.size
+        if size != self._console_size:
+            self._console_size = size
+            self._dirty.update(PANELS)
+        if self._redraw_at is not None and time.monotonic() >= self._redraw_at:
+            self._redraw_at = None
+            self._dirty.update(("main", "footer"))
+
+    def _render_frame(self, live: Live):
+        """Regenerate dirty panels and repaint."""
+        start = time.perf_counter()
+        dirty, self._dirty = self._dirty, set()
+        
+        if "header" in dirty:
+            self.layout["header"].update(self._generate_header())
+        if "main" in dirty:
+            if self.current_view == "main":
+                self.layout["main"].update(self._generate_apps_table())
+            elif self.analysis_mode:
+                self.layout["main"].update(self._generate_pid_selection())
+            else:
+                self.layout["main"].update(self._generate_ai_section())
+        # The footer uses the page size computed by the apps table
+        if "footer" in dirty:
+            self.layout["footer"].update(self._generate_footer())
+        live.refresh()
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        stats = self.render_stats
+        stats["frames"] += 1
+        stats["panels"] += len(dirty)
+        stats["last_ms"] = elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        stats["avg_ms"] = elapsed_ms if stats["frames"] == 1 else stats["avg_ms"] * 0.9 + elapsed_ms * 0.1
+
+    def render_metrics(self) -> Dict[str, float]:
+        """Frame count and per-frame render time (ms) of the UI."""
+        return dict(self.render_stats)
+
     async def run(self):
-        """Run the UI update loop."""
+        """Run the UI render loop, redrawing only when something changed."""
+        min_frame = 1.0 / self.max_refresh_rate
+        interval = min_frame
         with Live(
             self.layout,
-            refresh_per_second=4,
             screen=True,
             console=self.console,
-            auto_refresh=True
+            auto_refresh=False
         ) as live:
             try:
                 while True:
-                    # Update layout components
-                    self.layout["header"].update(self._generate_header())
-                    
-                    if self.current_view == "main":
-                        self.layout["main"].update(self._generate_apps_table())
-                    else:  # AI view
-                        if self.analysis_mode:
-                            self.layout["main"].update(self._generate_pid_selection())
-                        else:
-                            self.layout["main"].update(self._generate_ai_section())
-                    
-                    self.layout["footer"].update(self._generate_footer())
+                    timeout = interval
+                    if self._redraw_at is not None:
+                        timeout = max(0.0, min(timeout, self._redraw_at - time.monotonic()))
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                    self._check_triggers()
                     
-                    await asyncio.sleep(0.25)
+                    if self._dirty:
+                        self._render_frame(live)
+                        interval = min_frame
+                        # Changes arriving during this pause share the next frame
+                        await asyncio.sleep(min_frame)
+                    else:
+                        # Idle: back off towards the idle interval
+                        interval = min(self.idle_refresh_interval, interval * 2)
             except Exception as e:
-                self.console.print(f"[red]Error in UI: {str(e)}[/red]") 
+                self.console.print(f"[red]Error in UI: {str(e)}[/red]")
@@ -0,0 +1,147 @@
+"""
+Control Socket Module
+Local Unix-socket control interface, primarily for headless operation.
+
+Requests and responses are single-line JSON objects:
+    {"command": "analyze", "params": {"pid": 1234}}
+    {"ok": true, "result": {...}}  or  {"ok": false, "error": "..."}
+"""
+
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+DEFAULT_SOCKET_PATH = "run/dtm.sock"
+
+# A command handler receives the request params and returns a JSON-serializable result
+CommandHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class ControlServer:
+    """Serves control commands on a local Unix socket."""
+
+    def __init__(self, path: str, handlers: Dict[str, CommandHandler], max_request_bytes: int = 65536):
+        """
+        Initialize the control server.
+
+        Args:
+            path: Unix socket path
+            handlers: Command name -> handler
+            max_request_bytes: Longest accepted request line
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.handlers = handlers
+        self.max_request_bytes = max_request_bytes
+        self.running = False
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Bind the socket, owner-only, and start serving."""
+        if self.running:
+            return
+
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        if self.path.exists():
+            if await self._is_alive():
+                raise RuntimeError(f"Another DTM instance is listening on {self.path}")
+            self.path.unlink()  # Stale socket from an unclean exit
+
+        self._server = await asyncio.start_unix_server(
+            self._handle_client, path=str(self.path), limit=self.max_request_bytes
+        )
+        os.chmod(self.path, 0o600)
+        self.running = True
+        self.logger.info(f"Control socket listening on {self.path}")
+
+    async def stop(self):
+        """Stop serving and remove the socket file."""
+        if not self.running:
+            return
+
+        self.running = False
+        self._server.close()
+        await self._server.wait_closed()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        self.logger.info("Control socket stopped")
+
+    async def _is_alive(self) -> bool:
+        """Whether something is accepting connections on the socket path."""
+        try:
+            _, writer = await asyncio.open_unix_connection(str(self.path))
+        except OSError:
+            return False
+        writer.close()
+        await writer.wait_closed()
+        return True
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer requests from one client until it disconnects."""
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    response = {"ok": False, "error": "Request too large"}
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    break
+                if not line:
+                    break
+                response = await self._dispatch(line)
+                writer.write(json.dumps(response, default=str).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error serving control client: {str(e)}", exc_info=True)
+        finally:
+            writer.close()
+
+    async def _dispatch(self, line: bytes) -> Dict[str, Any]:
+        """Run the command in one request line."""
+        try:
+            request = json.loads(line)
+            command = request["command"]
+            params = request.get("params") or {}
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return {"ok": False, "error": "Malformed request"}
+
+        handler = self.handlers.get(command)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command: {command}"}
+
+        try:
+            return {"ok": True, "result": await handler(params)}
+        except (ValueError, KeyError, TypeError) as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            self.logger.error(f"Control command {command} failed: {str(e)}", exc_info=True)
+            return {"ok": False, "error": str(e)}
+
+
+async def send_command(path: str, command: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Send one command to a running DTM instance.
+
+    Args:
+        path: Unix socket path
+        command: Command name
+        params: Command parameters
+
+    Returns:
+        The decoded response
+    """
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        writer.write(json.dumps({"command": command, "params": params or {}}).encode() + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
@@ -6,8 +6,8 @@ Responsible for detecting and monitoring running applications with network conne
 import asyncio
 import logging
 import psutil
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set
+from dataclasses import dataclass, field
 from datetime import datetime
 
 @dataclass
@@ -20,6 +20,14 @@ class ApplicationInfo:
     remote_port: int
     created_at: datetime
     last_seen: datetime
+    local_host: str = ""
+    exe: str = ""
+    uid: Optional[int] = None
+    remote_hosts: Set[str] = field(default_factory=set)
+    local_hosts: Set[str] = field(default_factory=set)
+
+# Upper bound on local and remote hosts remembered per application
+MAX_REMOTE_HOSTS = 256
 
 class ApplicationDiscovery:
     """Handles discovery and monitoring of network-enabled applications."""
@@ -28,6 +36,9 @@ class ApplicationDiscovery:
         self.logger = logging.getLogger(__name__)
         self.running = False
         self.applications: Dict[int, ApplicationInfo] = {}
+        # Bumped whenever applications are added or removed
+        self.version = 0
+        self._listeners: List[Callable[[List[ApplicationInfo], List[ApplicationInfo]], None]] = []
         self._monitor_task: Optional[asyncio.Task] = None
 
     async def start_monitoring(self):
@@ -53,6 +64,16 @@ class ApplicationDiscovery:
                 pass
         self.logger.info("Application discovery monitoring stopped")
 
+    def add_listener(self, callback: Callable[[List[ApplicationInfo], List[ApplicationInfo]], None]):
+        """
+        Register a callback for application changes.
+
+        Args:
+            callback: Called after each scan that changed anything, with the
+                added and the removed applications
+        """
+        self._listeners.append(callback)
+
     async def _monitor_loop(self):
         """Main monitoring loop to discover applications."""
         while self.running:
@@ -66,36 +87,47 @@ class ApplicationDiscovery:
         """Scan for applications with network connections."""
         current_time = datetime.now()
         seen_pids = set()
+        added: List[ApplicationInfo] = []
 
         for conn in psutil.net_connections(kind='inet'):
             try:
                 if not conn.pid or not conn.laddr:
                     continue
 
-                # Get process information
-                process = psutil.Process(conn.pid)
                 local_port = conn.laddr.port
                 remote_host = conn.raddr.ip if conn.raddr else ''
                 remote_port = conn.raddr.port if conn.raddr else 0
 
-                app_info = ApplicationInfo(
-                    pid=conn.pid,
-                    name=process.name(),
-                    local_port=local_port,
-                    remote_host=remote_host,
-                    remote_port=remote_port,
-                    created_at=current_time,
-                    last_seen=current_time
-                )
-
                 if conn.pid in self.applications:
                     # Update existing application
-                    self.applications[conn.pid].last_seen = current_time
+                    app_info = self.applications[conn.pid]
+                    app_info.last_seen = current_time
                 else:
                     # New application discovered
+                    process = psutil.Process(conn.pid)
+                    app_info = ApplicationInfo(
+                        pid=conn.pid,
+                        name=process.name(),
+                        local_port=local_port,
+                        remote_host=remote_host,
+                        remote_port=remote_port,
+                        created_at=current_time,
+                        last_seen=current_time,
+                        local_host=conn.laddr.ip,
+                        exe=self._process_exe(process),
+                        uid=self._process_uid(process)
+                    )
                     self.applications[conn.pid] = app_info
+                    self.version += 1
+                    added.append(app_info)
                     self.logger.info(f"New application discovered: {app_info.name} (PID: {app_info.pid})")
 
+                # Remember every endpoint so new ones can be detected
+                if remote_host and len(app_info.remote_hosts) < MAX_REMOTE_HOSTS:
+                    app_info.remote_hosts.add(remote_host)
+                if len(app_info.local_hosts) < MAX_REMOTE_HOSTS:
+                    app_info.local_hosts.add(conn.laddr.ip)
+
                 seen_pids.add(conn.pid)
 
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
@@ -103,10 +135,34 @@ class ApplicationDiscovery:
 
         # Remove stale applications
         stale_pids = set(self.applications.keys()) - seen_pids
+        removed: List[ApplicationInfo] = []
         for pid in stale_pids:
             app = self.applications.pop(pid)
+            self.version += 1
+            removed.append(app)
             self.logger.info(f"Application removed: {app.name} (PID: {app.pid})")
 
+        if added or removed:
+            for callback in self._listeners:
+                try:
+                    callback(added, removed)
+                except Exception as e:
+                    self.logger.error(f"Application listener failed: {str(e)}")
+
+    def _process_exe(self, process: psutil.Process) -> str:
+        """Get the executable path of a process, if accessible."""
+        try:
+            return process.exe()
+        except (psutil.AccessDenied, psutil.ZombieProcess, OSError):
+            return ""
+
+    def _process_uid(self, process: psutil.Process) -> Optional[int]:
+        """Get the real UID of a process (Unix only)."""
+        try:
+            return process.uids().real
+        except (AttributeError, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
     def get_active_applications(self) -> List[ApplicationInfo]:
         """Get a list of currently active applications."""
         return list(self.applications.values()) 
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+Local Rules Module
+Deterministic fast-path classifier that answers well-understood cases without an AI call.
+"""
+
+import ipaddress
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Optional
+
+from app.discovery import MAX_REMOTE_HOSTS
+
+# Known application executables (lowercase), used for process classification
+KNOWN_PROCESSES: FrozenSet[str] = frozenset({
+    # Web Servers
+    "nginx.exe", "apache.exe", "httpd.exe", "tomcat.exe", "iis.exe",
+    # Databases
+    "mysqld.exe", "postgres.exe", "oracle.exe", "mongodb.exe", "redis-server.exe",
+    # Development
+    "node.exe", "python.exe", "java.exe", "ruby.exe", "php.exe",
+    # Applications
+    "chrome.exe", "firefox.exe", "msedge.exe", "outlook.exe", "teams.exe",
+    # Game Servers
+    "srcds.exe", "bedrock_server.exe",
+    # Common Services
+    "services.exe", "svchost.exe", "lsass.exe",
+    # Remote Access
+    "mstsc.exe", "rdpclip.exe", "ssh.exe", "putty.exe"
+})
+
+SYSTEM_PROCESSES: FrozenSet[str] = frozenset({"system", "services.exe", "svchost.exe"})
+
+# Trusted system daemons by executable path; only trusted when running as root
+# or a configured service uid, never when the uid is unknown. POSIX only: Windows
+# processes have no uid, so they always get a full analysis
+KNOWN_DAEMON_PATHS: FrozenSet[str] = frozenset({
+    "/usr/sbin/sshd", "/usr/sbin/chronyd", "/usr/sbin/ntpd", "/usr/sbin/cupsd",
+    "/usr/sbin/avahi-daemon", "/usr/sbin/named", "/usr/sbin/dnsmasq",
+    "/usr/lib/systemd/systemd-resolved", "/lib/systemd/systemd-resolved",
+    "/usr/lib/systemd/systemd-timesyncd", "/lib/systemd/systemd-timesyncd"
+})
+
+# Well-known service ports whose traffic is already encrypted by the protocol
+ENCRYPTED_SERVICE_PORTS: Dict[int, str] = {
+    22: "SSH", 443: "HTTPS", 465: "SMTPS", 636: "LDAPS", 853: "DNS-over-TLS",
+    993: "IMAPS", 995: "POP3S", 5223: "XMPP-TLS", 8443: "HTTPS-alt"
+}
+
+# Ports that always need a full analysis: plaintext credentials or common attack surface
+HIGH_RISK_PORTS: Dict[int, str] = {
+    21: "FTP", 23: "Telnet", 135: "MS-RPC", 139: "NetBIOS", 445: "SMB",
+    1433: "MSSQL", 3306: "MySQL", 3389: "RDP", 5432: "PostgreSQL",
+    5900: "VNC", 6379: "Redis", 27017: "MongoDB"
+}
+
+
+def _is_loopback(host: str) -> bool:
+    """Check whether a host string refers to the local machine."""
+    if not host or host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+@dataclass
+class RuleVerdict:
+    """Deterministic verdict produced by a local rule."""
+    rule: str
+    risk_level: str
+    should_tunnel: bool
+    reason: str
+    concerns: tuple = ()
+    recommendations: tuple = ()
+
+    def to_recommendations(self) -> Dict[str, Any]:
+        """Render the verdict in the same structure as an AI response."""
+        return {
+            "risk_level": self.risk_level,
+            "concerns": list(self.concerns),
+            "recommendations": list(self.recommendations),
+            "tunnel_policy": {
+                "should_tunnel": self.should_tunnel,
+                "reason": self.reason
+            }
+        }
+
+
+class LocalRuleEngine:
+    """Classifies applications locally and decides whether AI escalation is needed."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the rule engine.
+
+        Args:
+            config: Optional ``ai_analysis.local_rules`` configuration section
+        """
+        self.logger = logging.getLogger(__name__)
+        config = config or {}
+        self.enabled = config.get("enabled", True)
+        self.daemon_paths = KNOWN_DAEMON_PATHS | frozenset(
+            path.lower() for path in config.get("trusted_daemon_paths", [])
+        )
+        self.daemon_uids = frozenset({0} | {int(uid) for uid in config.get("trusted_daemon_uids", [])})
+        self.encrypted_ports = {
+            **ENCRYPTED_SERVICE_PORTS,
+            **{int(port): name for port, name in config.get("service_ports", {}).items()}
+        }
+        self.high_risk_ports = HIGH_RISK_PORTS
+
+    @staticmethod
+    def is_known_process(process_name: str) -> bool:
+        """Check if the process is a known application."""
+        return process_name.lower() in KNOWN_PROCESSES
+
+    @staticmethod
+    def is_system_process(process_name: str) -> bool:
+        """Check if the process is a core system process."""
+        return process_name.lower() in SYSTEM_PROCESSES
+
+    def evaluate(self, context: Dict[str, Any]) -> Optional[RuleVerdict]:
+        """
+        Evaluate an analysis context against the local rules.
+
+        Args:
+            context: Analysis context created by ``AIAnalyzer._create_analysis_context``
+
+        Returns:
+            RuleVerdict if the case is fully answered locally, None to escalate to the AI
+        """
+        if not self.enabled:
+            return None
+
+        local_host = context.get("local_host") or ""
+        local_hosts = set(context.get("local_hosts") or ()) | {local_host}
+        local_port = context.get("local_port") or 0
+        remote_host = context.get("remote_host") or ""
+        remote_port = context.get("remote_port") or 0
+        remote_hosts = set(context.get("remote_hosts") or ()) | {remote_host}
+        process_info = context.get("process_info", {})
+        exe = (process_info.get("exe") or "").lower()
+        uid = process_info.get("uid")
+        is_tunneled = context.get("dtm_state", {}).get("is_tunneled", False)
+
+        # High-risk services always get a full analysis
+        for port in (local_port, remote_port):
+            if port in self.high_risk_ports:
+                return None
+
+        # Every endpoint the process was seen on must be local, not just the first one;
+        # a full remote host set may have missed some, so it proves nothing
+        loopback_only = (
+            local_host
+            and all(host and _is_loopback(host) for host in local_hosts)
+            and len(remote_hosts) < MAX_REMOTE_HOSTS
+            and all(_is_loopback(host) for host in remote_hosts)
+        )
+        if loopback_only:
+            if is_tunneled:
+                return RuleVerdict(
+                    rule="loopback_tunneled",
+                    risk_level="low",
+                    should_tunnel=True,
+                    reason="Traffic is local and already routed through a DTM tunnel",
+                    recommendations=("Keep the existing tunnel and port rotation active",)
+                )
+            return RuleVerdict(
+                rule="loopback_only",
+                risk_level="low",
+                should_tunnel=False,
+                reason="Loopback-only listener; traffic never leaves the host",
+                concerns=("Local processes can still reach this port",),
+                recommendations=("Keep the listener bound to the loopback interface",)
+            )
+
+        if exe in self.daemon_paths and uid in self.daemon_uids:
+            return RuleVerdict(
+                rule="known_daemon",
+                risk_level="low",
+                should_tunnel=False,
+                reason=f"Trusted system daemon ({exe}) running as trusted uid {uid}",
+                recommendations=("Keep the daemon updated and restrict it with host firewall rules",)
+            )
+
+        service = self.encrypted_ports.get(remote_port) or self.encrypted_ports.get(local_port)
+        if service and self.is_known_process(context.get("app_name", "")):
+            return RuleVerdict(
+                rule="encrypted_service",
+                risk_level="low",
+                should_tunnel=False,
+                reason=f"Known application using {service}, which is already encrypted in transit",
+                recommendations=(f"Verify {service} certificates and keep the client up to date",)
+            )
+
+        return None
@@ -0,0 +1,224 @@
+"""
+Log Rotation Module
+Size- and time-based rotation of the JSON log file, with rotated segments
+compressed and pruned on a background thread.
+
+Rotated segments are named after the time they were rotated, e.g.
+``logs/dtm.json`` -> ``logs/dtm.20261018-221526.json.gz``.
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+try:
+    import zstandard
+except ImportError:  # Optional; gzip is used instead
+    zstandard = None
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+# Copy buffer for compression; segments are streamed, never read whole
+COPY_CHUNK_SIZE = 1024 * 1024
+
+class RotatingLogHandler(logging.FileHandler):
+    """
+    Log file handler that rotates by size and by time period.
+
+    Runs on the logging listener thread, which also decides when to flush.
+    Rotation only renames the file; compression and retention run on a
+    separate archiver thread so a large segment never holds up log writing.
+    """
+
+    def __init__(
+        self,
+        filename: Path,
+        max_bytes: int = 50 * 1024 * 1024,
+        interval: float = 86400,
+        backup_count: int = 20,
+        max_age_days: float = 14,
+        compression: str = "gzip"
+    ):
+        """
+        Initialize the handler.
+
+        Args:
+            filename: Active log file
+            max_bytes: Rotate once the file reaches this size (0 disables)
+            interval: Rotate when a record falls in a new period of this many
+                seconds, aligned to the epoch (0 disables)
+            backup_count: Rotated segments kept (0 keeps all)
+            max_age_days: Delete rotated segments older than this (0 keeps all)
+            compression: "gzip", "zstd" (needs the zstandard package) or "none"
+        """
+        self.logger = logging.getLogger(__name__)
+        self.base_path = Path(filename)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.max_age_days = max_age_days
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown log compression: {compression}")
+        if compression == "zstd" and zstandard is None:
+            # Logging is not running yet; record the fallback once it is
+            self._fallback_notice = "zstandard is not installed, compressing rotated logs with gzip"
+            compression = "gzip"
+        else:
+            self._fallback_notice = None
+        self.compression = compression
+        self._segment_pattern = re.compile(
+            re.escape(self.base_path.stem) + r"\.(\d{8}-\d{6})(?:-(\d+))?"
+            + re.escape(self.base_path.suffix) + r"(?:\.gz|\.zst)?$"
+        )
+        self._archiver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-archiver")
+        self._size = 0
+        self._rollover_at = 0.0
+        self._last_stamp = ""
+        self._last_counter = 0
+        super().__init__(filename, delay=True)
+
+        # Finish segments left uncompressed by an earlier run, then apply retention
+        self._archiver.submit(self._archive, self._pending_segments())
+        if self._should_rotate_on_open():
+            self._rotate()
+
+    def _period_end(self, timestamp: float) -> float:
+        """End of the rotation period containing timestamp."""
+        return (timestamp // self.interval + 1) * self.interval if self.interval else float("inf")
+
+    def _should_rotate_on_open(self) -> bool:
+        """Whether the existing file belongs to an earlier period or is already full."""
+        try:
+            stat = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return False
+        if stat.st_size == 0:
+            return False
+        return bool(self.max_bytes and stat.st_size >= self.max_bytes) or self._period_end(stat.st_mtime) <= time.time()
+
+    def _open(self):
+        stream = super()._open()
+        self._size = stream.seek(0, os.SEEK_END)
+        self._rollover_at = self._period_end(time.time())
+        if self._fallback_notice:
+            self.logger.warning(self._fallback_notice)
+            self._fallback_notice = None
+        return stream
+
+    def emit(self, record: logging.LogRecord):
+        """Write a record, rotating first if its period has ended or the file is full."""
+        try:
+            if record.created >= self._rollover_at or (self.max_bytes and self._size >= self.max_bytes):
+                if self.stream is not None or self._size:
+                    self._rotate()
+            if self.stream is None:
+                self.stream = self._open()
+            line = self.format(record) + self.terminator
+            self.stream.write(line)
+            # JSON lines are ASCII, so characters are bytes
+            self._size += len(line)
+        except Exception:
+            self.handleError(record)
+
+    def _rotate(self):
+        """Move the active file aside and queue it for compression."""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        self._size = 0
+        if not os.path.exists(self.baseFilename):
+            return
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        # Counters only grow within a second, even if retention freed a lower one
+        counter = self._last_counter + 1 if stamp == self._last_stamp else 0
+        while True:
+            suffix = f"-{counter}" if counter else ""
+            segment = self.base_path.with_name(f"{self.base_path.stem}.{stamp}{suffix}{self.base_path.suffix}")
+            if not (segment.exists() or Path(str(segment) + COMPRESSION_SUFFIXES[self.compression]).exists()):
+                break
+            counter += 1
+        self._last_stamp, self._last_counter = stamp, counter
+        os.replace(self.baseFilename, segment)
+        self._archiver.submit(self._archive, [segment])
+
+    def _segments(self) -> List[Path]:
+        """Rotated segments of this log, oldest first."""
+        # Ordered by name: mtimes of segments rotated within one tick can tie
+        segments = []
+        for path in self.base_path.parent.iterdir():
+            match = self._segment_pattern.match(path.name)
+            if match:
+                segments.append((match.group(1), int(match.group(2) or 0), path))
+        return [path for _, _, path in sorted(segments)]
+
+    def _pending_segments(self) -> List[Path]:
+        """Rotated segments that still need compressing."""
+        if self.compression == "none" or not self.base_path.parent.exists():
+            return []
+        return [path for path in self._segments() if not path.name.endswith((".gz", ".zst"))]
+
+    def _archive(self, segments: List[Path]):
+        """Compress segments and apply retention (archiver thread)."""
+        for segment in segments:
+            try:
+                self._compress(segment)
+            except Exception as e:
+                self.logger.error(f"Failed to compress log segment {segment}: {str(e)}")
+        try:
+            self._apply_retention()
+        except Exception as e:
+            self.logger.error(f"Failed to apply log retention: {str(e)}")
+
+    def _compress(self, segment: Path):
+        """Compress one segment next to itself and remove the original."""
+        if self.compression == "none":
+            return
+        target = Path(str(segment) + COMPRESSION_SUFFIXES[self.compression])
+        partial = target.with_name(target.name + ".tmp")
+        try:
+            source = open(segment, "rb")
+        except FileNotFoundError:
+            return  # Removed since it was queued; nothing left to archive
+        with source:
+            if self.compression == "zstd":
+                with open(partial, "wb") as raw:
+                    with zstandard.ZstdCompressor(level=3).stream_writer(raw) as destination:
+                        shutil.copyfileobj(source, destination, COPY_CHUNK_SIZE)
+            else:
+                with gzip.open(partial, "wb", compresslevel=6) as destination:
+                    shutil.copyfileobj(source, destination, COPY_CHUNK_SIZE)
+        os.utime(partial, (segment.stat().st_atime, segment.stat().st_mtime))
+        os.replace(partial, target)
+        segment.unlink()
+
+    def _apply_retention(self):
+        """
+        Delete archived segments beyond backup_count or older than max_age_days.
+
+        Segments still waiting for compression are left alone and only count
+        once archived, so a burst of rotations never deletes queued work.
+        """
+        segments = self._segments()
+        if self.compression != "none":
+            segments = [path for path in segments if path.name.endswith((".gz", ".zst"))]
+        expired = []
+        if self.backup_count and len(segments) > self.backup_count:
+            expired = segments[:len(segments) - self.backup_count]
+            segments = segments[len(expired):]
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            expired += [path for path in segments if path.stat().st_mtime < cutoff]
+        for path in expired:
+            path.unlink(missing_ok=True)
+
+    def close(self):
+        """Close the file and wait for pending compression."""
+        super().close()
+        self._archiver.shutdown(wait=True)
@@ -1,18 +1,36 @@
 """
 Logging Manager Module
 Centralizes logging configuration for the entire application.
+
+Records are put on a bounded queue by the logging call and written to the
+log file by a background listener thread, so logging from the event loop
+never waits for the disk.
 """
 
+import atexit
 import json
 import logging
+import queue
 import sys
+import time
 from datetime import datetime
+from json.encoder import encode_basestring_ascii
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+from app.log_rotation import RotatingLogHandler
+
+DEFAULT_LOG_FILE = "logs/dtm.json"
+
+# Upper bound on cached per-call-site JSON fragments
+MAX_CACHED_SITES = 4096
+
+_EXCEPTION_FORMATTER = logging.Formatter()
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging."""
-    
+
     def format(self, record: logging.LogRecord) -> str:
         """Format the log record as JSON."""
         log_obj: Dict[str, Any] = {
@@ -24,50 +42,263 @@ class JSONFormatter(logging.Formatter):
             "function": record.funcName,
             "line": record.lineno
         }
-        
+
         if record.exc_info:
             log_obj["exception"] = self.formatException(record.exc_info)
-            
+
         if hasattr(record, "extra"):
             log_obj.update(record.extra)
-            
+
         return json.dumps(log_obj)
 
-def setup_logging(log_level: str = "INFO") -> None:
+class FastJSONFormatter(logging.Formatter):
+    """
+    JSONFormatter with the same fields, built with fewer allocations.
+
+    Everything except the timestamp, message and exception is fixed per
+    call site, so it is encoded once and cached. The timestamp's date and
+    time are cached per second, and strings are escaped with the same C
+    encoder json.dumps uses. Timestamps always carry microseconds.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._sites: Dict[Tuple, Tuple[str, str]] = {}
+        self._second = -1
+        self._second_text = ""
+
+    def _site(self, record: logging.LogRecord) -> Tuple[str, str]:
+        """Encoded fields before and after the message for a call site."""
+        key = (record.name, record.levelno, record.pathname, record.funcName, record.lineno)
+        site = self._sites.get(key)
+        if site is None:
+            if len(self._sites) >= MAX_CACHED_SITES:
+                self._sites.clear()
+            site = (
+                f',"level":{encode_basestring_ascii(record.levelname)}'
+                f',"logger":{encode_basestring_ascii(record.name)},"message":',
+                f',"module":{encode_basestring_ascii(record.module)}'
+                f',"function":{encode_basestring_ascii(record.funcName or "")}'
+                f',"line":{record.lineno}'
+            )
+            self._sites[key] = site
+        return site
+
+    def _timestamp(self, created: float) -> str:
+        """ISO 8601 local time with microseconds."""
+        second = int(created)
+        if second != self._second:
+            self._second_text = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+            self._second = second
+        micros = int((created - second) * 1e6)
+        return f"{self._second_text}.{micros:06d}"
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format the log record as JSON."""
+        head, tail = self._site(record)
+        line = (
+            f'{{"timestamp":"{self._timestamp(record.created)}"{head}'
+            f'{encode_basestring_ascii(record.getMessage())}{tail}'
+        )
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line += f',"exception":{encode_basestring_ascii(record.exc_text)}'
+
+        if hasattr(record, "extra"):
+            # Rare; merge through json so duplicate keys behave like JSONFormatter
+            log_obj = json.loads(line + "}")
+            log_obj.update(record.extra)
+            return json.dumps(log_obj)
+        return line + "}"
+
+class DropQueueHandler(QueueHandler):
+    """
+    Queue handler with a bounded queue that never stalls the caller for long.
+
+    When the queue is full, records below WARNING are dropped at once;
+    warnings and errors wait up to block_timeout for space before being
+    dropped. The number of dropped records is logged once space frees up.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block_timeout: float = 0.1):
+        """
+        Initialize the handler.
+
+        Args:
+            log_queue: Bounded queue drained by the listener
+            block_timeout: Seconds a WARNING or higher record may wait for space
+        """
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Resolve the parts of a record that must be rendered on the calling thread.
+
+        Unlike QueueHandler.prepare, this keeps the message and exception
+        separate so the formatter can still structure them, and updates the
+        record in place instead of copying it: the merged message and the
+        cached exception text read the same to any other handler.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """Queue a record, dropping it under the policy above if the queue stays full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING or self.block_timeout <= 0:
+                self.dropped += 1
+                return
+            try:
+                self.queue.put(record, timeout=self.block_timeout)
+            except queue.Full:
+                self.dropped += 1
+                return
+
+        if self.dropped != self._reported:
+            notice = logging.makeLogRecord({
+                "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                "module": "logging_manager", "funcName": "enqueue",
+                "msg": f"Dropped {self.dropped - self._reported} log records (log queue full)"
+            })
+            try:
+                self.queue.put_nowait(notice)
+                self._reported = self.dropped
+            except queue.Full:
+                pass
+
+class LogListener(QueueListener):
+    """
+    Queue listener that batches file flushes.
+
+    Handlers are flushed when the queue runs empty, after flush_records
+    records, and after every ERROR or higher record.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, flush_records: int = 256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_records = flush_records
+        self._unflushed = 0
+
+    def handle(self, record: logging.LogRecord):
+        """Write a record, flushing according to the policy above."""
+        super().handle(record)
+        self._unflushed += 1
+        if (self._unflushed >= self.flush_records or record.levelno >= logging.ERROR
+                or self.queue.empty()):
+            for handler in self.handlers:
+                handler.flush()
+            self._unflushed = 0
+
+    def enqueue_sentinel(self):
+        # Wait for space instead of failing when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler that leaves flushing to the LogListener."""
+
+    def emit(self, record: logging.LogRecord):
+        """Write a record without flushing."""
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+def create_file_handler(log_file: Path, rotation: Optional[Dict[str, Any]]) -> logging.FileHandler:
+    """
+    File handler for the log pipeline.
+
+    Args:
+        log_file: Active log file
+        rotation: ``logging.rotation`` configuration section
+
+    Returns:
+        A RotatingLogHandler, or a BufferedFileHandler if rotation is disabled
+    """
+    rotation = rotation or {}
+    if not rotation.get("enabled", True):
+        return BufferedFileHandler(log_file)
+    return RotatingLogHandler(
+        log_file,
+        max_bytes=rotation.get("max_bytes", 50 * 1024 * 1024),
+        interval=rotation.get("interval", 86400),
+        backup_count=rotation.get("backup_count", 20),
+        max_age_days=rotation.get("max_age_days", 14),
+        compression=rotation.get("compression", "gzip")
+    )
+
+_listener: Optional[LogListener] = None
+
+def shutdown_logging() -> None:
+    """Write out all queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+def setup_logging(log_level: Optional[str] = None, config: Optional[Dict[str, Any]] = None) -> None:
     """
     Set up application-wide logging configuration.
     Writes structured JSON logs to file only, no terminal output.
-    
+    Calling it again replaces the previous configuration.
+
     Args:
-        log_level: The logging level to use (default: "INFO")
+        log_level: The logging level to use (default: config "level", else "INFO")
+        config: ``logging`` configuration section
     """
+    config = config or {}
+    log_level = log_level or config.get("level", "INFO")
+    log_file = Path(config.get("file", DEFAULT_LOG_FILE))
+    queue_config = config.get("queue", {})
+
     # Create logs directory if it doesn't exist
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    
+
     # Remove any existing handlers
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-    
-    # Add JSON file handler
-    json_handler = logging.FileHandler(log_dir / "dtm.json")
-    json_handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(json_handler)
-    
+    shutdown_logging()
+
+    # JSON file handler, fed from a bounded queue by a background thread
+    global _listener
+    log_queue = queue.Queue(queue_config.get("size", 10000))
+    json_handler = create_file_handler(log_file, config.get("rotation"))
+    json_handler.setFormatter(FastJSONFormatter())
+    _listener = LogListener(log_queue, json_handler, flush_records=queue_config.get("flush_records", 256))
+    _listener.start()
+    root_logger.addHandler(DropQueueHandler(log_queue, block_timeout=queue_config.get("block_timeout", 0.1)))
+
     # Set logging levels for noisy modules
     logging.getLogger("asyncio").setLevel(logging.WARNING)
     logging.getLogger("urllib3").setLevel(logging.WARNING)
-    
+
     # Log startup
     logger = logging.getLogger(__name__)
     logger.info("Logging system initialized", extra={
         "config": {
             "log_level": log_level,
-            "log_file": str(log_dir / "dtm.json"),
+            "log_file": str(log_file),
             "format": "JSON"
         }
-    }) 
\ No newline at end of file
+    })
+
+# Runs before logging's own exit hook, which would not see the queued records
+atexit.register(shutdown_logging)
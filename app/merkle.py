@@ -0,0 +1,173 @@
+"""
+Merkle Tree Module
+Structured hashing of JSON-like state with incremental updates and divergence reporting.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+DICT_NODE = b"d"
+LIST_NODE = b"l"
+
+# Path into a state: top-level key first, e.g. ("tunnels", "1234", "port")
+StatePath = Tuple[str, ...]
+
+_MISSING = object()
+
+
+class MerkleNode:
+    """Hash of a state value; containers keep their children's nodes."""
+
+    __slots__ = ("digest", "kind", "children")
+
+    def __init__(self, digest: bytes, kind: Optional[bytes] = None, children: Optional[Dict[str, "MerkleNode"]] = None):
+        self.digest = digest
+        self.kind = kind
+        self.children = children
+
+    @property
+    def hexdigest(self) -> str:
+        return self.digest.hex()
+
+
+def _leaf_digest(value: Any) -> bytes:
+    # Type-tagged encodings for common scalars; json.dumps for anything else
+    if isinstance(value, str):
+        encoded = b"s" + value.encode()
+    elif value is None or isinstance(value, bool):
+        encoded = b"c" + json.dumps(value).encode()
+    elif isinstance(value, int):
+        encoded = b"i" + str(value).encode()
+    elif isinstance(value, float):
+        encoded = b"f" + repr(value).encode()
+    else:
+        encoded = b"j" + json.dumps(value).encode()
+    return hashlib.sha256(LEAF_PREFIX + encoded).digest()
+
+
+def _node_digest(kind: bytes, children: Dict[str, MerkleNode]) -> bytes:
+    digest = hashlib.sha256(NODE_PREFIX + kind)
+    # Dict keys are hashed in sorted order, list items in position order
+    keys = sorted(children) if kind == DICT_NODE else children
+    for key in keys:
+        encoded = key.encode()
+        digest.update(len(encoded).to_bytes(4, "big"))
+        digest.update(encoded)
+        digest.update(children[key].digest)
+    return digest.digest()
+
+
+def build_tree(value: Any) -> MerkleNode:
+    """
+    Hash a JSON-like value into a Merkle tree.
+
+    Dict keys are stringified like json.dumps does, so a state hashes the same
+    before and after a JSON round trip. Lists holding only scalars become a
+    single leaf.
+
+    Args:
+        value: Dict, list or JSON scalar
+
+    Returns:
+        Root node of the tree
+    """
+    if isinstance(value, dict):
+        children = {str(key): build_tree(item) for key, item in value.items()}
+        return MerkleNode(_node_digest(DICT_NODE, children), DICT_NODE, children)
+    if isinstance(value, (list, tuple)):
+        if not any(isinstance(item, (dict, list, tuple)) for item in value):
+            # Lists of scalars (histories, port lists) hash as one leaf
+            return MerkleNode(hashlib.sha256(LEAF_PREFIX + b"j" + json.dumps(value).encode()).digest())
+        children = {str(index): build_tree(item) for index, item in enumerate(value)}
+        return MerkleNode(_node_digest(LIST_NODE, children), LIST_NODE, children)
+    return MerkleNode(_leaf_digest(value))
+
+
+def _child_value(value: Any, key: Any) -> Any:
+    """Look up a child of a container value by (stringified) key."""
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        for candidate, item in value.items():
+            if str(candidate) == str(key):
+                return item
+        return _MISSING
+    try:
+        return value[int(key)]
+    except (ValueError, IndexError, TypeError):
+        return _MISSING
+
+
+def update_path(node: MerkleNode, value: Any, path: Sequence[Any]) -> MerkleNode:
+    """
+    Re-hash only the subtree at path and its ancestors.
+
+    Args:
+        node: Current tree for value (modified in place)
+        value: The full, already mutated value
+        path: Path of the changed (added, replaced or removed) entry
+
+    Returns:
+        Root node of the updated tree
+    """
+    container = isinstance(value, dict) if node.kind == DICT_NODE else isinstance(value, (list, tuple))
+    if not path or node.kind is None or not container:
+        return build_tree(value)
+
+    key = str(path[0])
+    child_value = _child_value(value, path[0])
+    if child_value is _MISSING:
+        node.children.pop(key, None)
+    elif key in node.children:
+        node.children[key] = update_path(node.children[key], child_value, path[1:])
+    else:
+        node.children[key] = build_tree(child_value)
+
+    if node.kind == LIST_NODE:
+        if list(node.children) != [str(i) for i in range(len(value))]:
+            # Items were inserted or removed in the middle; positions shifted
+            return build_tree(value)
+        if not any(isinstance(item, (dict, list, tuple)) for item in value):
+            # No containers left, so build_tree hashes the list as one leaf
+            return build_tree(value)
+    node.digest = _node_digest(node.kind, node.children)
+    return node
+
+
+def find(node: Optional[MerkleNode], path: Sequence[Any]) -> Optional[MerkleNode]:
+    """Return the node at path, or None if it does not exist."""
+    for key in path:
+        if node is None or node.children is None:
+            return None
+        node = node.children.get(str(key))
+    return node
+
+
+def diff(expected: MerkleNode, actual: MerkleNode, path: StatePath = ()) -> List[StatePath]:
+    """
+    Find the deepest paths where two trees diverge.
+
+    Args:
+        expected: Tree of the trusted state
+        actual: Tree of the state being verified
+        path: Prefix of both trees' location
+
+    Returns:
+        Paths of diverging entries (empty if the trees are equal)
+    """
+    if expected.digest == actual.digest:
+        return []
+    if expected.kind is None or expected.kind != actual.kind:
+        return [path]
+
+    diverged = []
+    for key in list(expected.children) + [k for k in actual.children if k not in expected.children]:
+        left, right = expected.children.get(key), actual.children.get(key)
+        if left is None or right is None:
+            diverged.append(path + (key,))
+        else:
+            diverged.extend(diff(left, right, path + (key,)))
+    return diverged
@@ -0,0 +1,219 @@
+"""
+Model Router Module
+Latency-aware model selection with hedged requests for AI analysis calls.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds (roughly logarithmic, 50 ms .. 60 s)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0,
+    7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0
+)
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram with success/failure accounting."""
+
+    def __init__(self, decay_every: int = 500):
+        """
+        Initialize the histogram.
+
+        Args:
+            decay_every: Halve all counts after this many samples so old behaviour fades out
+        """
+        self.counts: List[float] = [0.0] * (len(LATENCY_BUCKETS) + 1)
+        self.successes = 0.0
+        self.failures = 0.0
+        self.decay_every = decay_every
+        self._since_decay = 0
+
+    @property
+    def samples(self) -> float:
+        """Number of (decayed) latency samples recorded."""
+        return sum(self.counts)
+
+    @property
+    def success_rate(self) -> float:
+        """Fraction of successful requests, optimistic when nothing is known yet."""
+        total = self.successes + self.failures
+        return self.successes / total if total else 1.0
+
+    def record(self, latency: float, success: bool):
+        """Record a completed request."""
+        if success:
+            self.counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self.successes += 1
+        else:
+            self.failures += 1
+
+        self._since_decay += 1
+        if self._since_decay >= self.decay_every:
+            self._since_decay = 0
+            self.counts = [count / 2 for count in self.counts]
+            self.successes /= 2
+            self.failures /= 2
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimate a latency percentile.
+
+        Args:
+            q: Percentile in the range 0..1
+
+        Returns:
+            Upper bound of the bucket containing the percentile, or None without samples
+        """
+        total = self.samples
+        if not total:
+            return None
+
+        threshold = total * q
+        running = 0.0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= threshold:
+                return LATENCY_BUCKETS[min(index, len(LATENCY_BUCKETS) - 1)]
+        return LATENCY_BUCKETS[-1]
+
+
+class ModelRouter:
+    """Routes requests to the best-performing model and hedges slow ones."""
+
+    def __init__(self, models: List[str], config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            models: Candidate models in configured preference order
+            config: Optional ``ai_analysis.routing`` configuration section
+        """
+        self.logger = logging.getLogger(__name__)
+        config = config or {}
+        self.models = list(dict.fromkeys(models))
+        self.hedging = config.get("hedging", True)
+        self.default_hedge_delay = config.get("hedge_delay", 5.0)
+        self.min_hedge_delay = config.get("min_hedge_delay", 0.5)
+        self.min_samples = config.get("min_samples", 20)
+        self.histograms: Dict[str, LatencyHistogram] = {
+            model: LatencyHistogram() for model in self.models
+        }
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "fallbacks": 0}
+
+    def _score(self, model: str) -> float:
+        """Lower is better: expected p95 latency inflated by the failure rate."""
+        histogram = self.histograms[model]
+        if histogram.samples < self.min_samples:
+            # Optimistic prior so under-sampled models still get explored
+            latency = self.default_hedge_delay
+        else:
+            latency = histogram.percentile(0.95)
+        return latency / max(histogram.success_rate, 0.05)
+
+    def ranked(self) -> List[str]:
+        """Return models ordered by preference (config order breaks ties)."""
+        scored = sorted((self._score(model), index, model) for index, model in enumerate(self.models))
+        return [model for _, _, model in scored]
+
+    def hedge_delay(self, model: str) -> float:
+        """Time to wait on a model before hedging to the next one."""
+        histogram = self.histograms[model]
+        if histogram.samples < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, histogram.percentile(0.95))
+
+    async def _timed(self, model: str, request_fn: Callable[[str], Awaitable[Any]]) -> Any:
+        """Run a request and record its latency and outcome."""
+        started = time.monotonic()
+        try:
+            result = await request_fn(model)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.histograms[model].record(time.monotonic() - started, success=False)
+            raise
+        self.histograms[model].record(time.monotonic() - started, success=True)
+        return result
+
+    async def call(self, request_fn: Callable[[str], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Run a request against the preferred model, hedging to the next model
+        when the current one exceeds its observed p95 latency.
+
+        Args:
+            request_fn: Coroutine function taking a model name and returning its result
+
+        Returns:
+            Tuple of (result, model that produced it)
+        """
+        self.stats["requests"] += 1
+        remaining = self.ranked()
+        tasks: Dict[asyncio.Task, str] = {}
+        hedges = set()
+        last_error: Optional[BaseException] = None
+        current = None
+
+        def launch() -> asyncio.Task:
+            nonlocal current
+            current = remaining.pop(0)
+            task = asyncio.create_task(self._timed(current, request_fn))
+            tasks[task] = current
+            return task
+
+        launch()
+        try:
+            while tasks:
+                timeout = self.hedge_delay(current) if self.hedging and remaining else None
+                done, _ = await asyncio.wait(
+                    tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Current model is slower than its p95: hedge with the next one
+                    self.stats["hedged"] += 1
+                    self.logger.warning(f"Model {current} exceeded {timeout:.2f}s, hedging to {remaining[0]}")
+                    hedges.add(launch())
+                    continue
+
+                for task in done:
+                    model = tasks.pop(task)
+                    if task.exception() is None:
+                        if task in hedges:
+                            self.stats["hedge_wins"] += 1
+                        elif model != self.models[0]:
+                            self.stats["fallbacks"] += 1
+                        return task.result(), model
+
+                    last_error = task.exception()
+                    self.logger.warning(f"Model {model} failed: {str(last_error)}")
+
+                # Every in-flight request failed, move on to the next model immediately
+                if not tasks and remaining:
+                    launch()
+        finally:
+            # Cancel the losers
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return routing metrics for display and logging."""
+        return {
+            "stats": dict(self.stats),
+            "models": {
+                model: {
+                    "p50": histogram.percentile(0.5),
+                    "p95": histogram.percentile(0.95),
+                    "success_rate": round(histogram.success_rate, 3),
+                    "samples": int(histogram.samples)
+                }
+                for model, histogram in self.histograms.items()
+            }
+        }
@@ -6,7 +6,7 @@ Handles dynamic port assignment and rotation for application tunnels.
 import asyncio
 import logging
 import random
-from typing import Set, Dict, Optional
+from typing import Dict, Iterable, Optional, Set
 from datetime import datetime, timedelta
 
 class PortNuker:
@@ -29,6 +29,8 @@ class PortNuker:
         self.used_ports: Set[int] = set()
         self.port_assignments: Dict[int, int] = {}  # pid -> port
         self.last_rotation: Optional[datetime] = None
+        # Bumped whenever port assignments change
+        self.version = 0
         self._rotation_task: Optional[asyncio.Task] = None
 
     async def start(self):
@@ -75,6 +77,7 @@ class PortNuker:
         port = random.choice(list(available_ports))
         self.used_ports.add(port)
         self.port_assignments[pid] = port
+        self.version += 1
         self.logger.info(f"Assigned port {port} to PID {pid}")
         return port
 
@@ -88,6 +91,7 @@ class PortNuker:
         if pid in self.port_assignments:
             port = self.port_assignments.pop(pid)
             self.used_ports.remove(port)
+            self.version += 1
             self.logger.info(f"Released port {port} from PID {pid}")
 
     async def _rotation_loop(self):
@@ -102,6 +106,37 @@ class PortNuker:
             except Exception as e:
                 self.logger.error(f"Error in rotation loop: {str(e)}", exc_info=True)
 
+    async def force_rotation(self):
+        """Rotate all port assignments now instead of waiting for the interval."""
+        await self._rotate_ports()
+        self.last_rotation = datetime.now()
+
+    def rotate_ports(self, pids: Iterable[int]) -> Dict[int, int]:
+        """
+        Rotate the ports of a subset of applications now.
+
+        The rotation schedule of the other applications is not affected.
+
+        Args:
+            pids: Process IDs to rotate; PIDs without a port are skipped
+
+        Returns:
+            New port per rotated PID
+        """
+        rotated: Dict[int, int] = {}
+        for pid in pids:
+            old_port = self.port_assignments.get(pid)
+            if old_port is None:
+                continue
+            new_port = self.assign_port_atomic(pid, exclude={old_port})
+            self.used_ports.discard(old_port)
+            self.port_assignments[pid] = new_port
+            rotated[pid] = new_port
+            self.logger.info(f"Rotating PID {pid} from port {old_port} to {new_port}")
+        if rotated:
+            self.version += 1
+        return rotated
+
     async def _rotate_ports(self):
         """Rotate ports for all active applications."""
         if not self.port_assignments:
@@ -122,6 +157,7 @@ class PortNuker:
 
         # Update assignments
         self.port_assignments = new_assignments
+        self.version += 1
         self.logger.info("Port rotation completed")
 
     def assign_port_atomic(self, pid: int, exclude: Set[int]) -> int:
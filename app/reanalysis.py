@@ -0,0 +1,174 @@
+"""
+Re-analysis Scheduler Module
+Periodically re-queries AI analysis for applications whose context has changed.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Set
+from app.ai_analysis import AIAnalyzer
+from app.discovery import ApplicationInfo
+
+# Context fields that invalidate a previous analysis when they change
+RELEVANT_FIELDS = (
+    "app_name", "exe", "uid", "local_host", "local_port", "local_hosts",
+    "remote_host", "remote_port", "remote_hosts", "is_tunneled"
+)
+
+
+class ReanalysisScheduler:
+    """Change-driven periodic re-analysis with a per-interval refresh budget."""
+
+    def __init__(
+        self,
+        analyzer: AIAnalyzer,
+        config: Dict[str, Any],
+        app_provider: Callable[[int], Optional[ApplicationInfo]],
+        on_result: Callable[[int, Dict[str, Any]], None]
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            analyzer: AI analyzer used for re-analysis
+            config: Application configuration dictionary
+            app_provider: Returns the current ApplicationInfo (with DTM state) for a PID,
+                or None if the application is gone
+            on_result: Called with (pid, analysis) for every completed re-analysis
+        """
+        self.logger = logging.getLogger(__name__)
+        self.analyzer = analyzer
+        self.app_provider = app_provider
+        self.on_result = on_result
+        self.scan_interval = config["ai_analysis"].get("scan_interval", 60)
+        self.refresh_budget = config["ai_analysis"].get("refresh_budget", 20)
+        self.running = False
+        self._snapshots: Dict[int, Dict[str, Any]] = {}  # pid -> relevant context at last analysis
+        self._analyzed_at: Dict[int, float] = {}
+        self._in_flight: Set[int] = set()
+        self._scan_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the re-analysis loop."""
+        if self.running:
+            return
+
+        self.running = True
+        self._scan_task = asyncio.create_task(self._scan_loop())
+        self.logger.info(
+            f"Re-analysis scheduler started (interval: {self.scan_interval}s, budget: {self.refresh_budget})"
+        )
+
+    async def stop(self):
+        """Stop the re-analysis loop."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._scan_task:
+            self._scan_task.cancel()
+            try:
+                await self._scan_task
+            except asyncio.CancelledError:
+                pass
+        self.logger.info("Re-analysis scheduler stopped")
+
+    def _snapshot(self, app_info: ApplicationInfo) -> Dict[str, Any]:
+        """Extract the fields relevant for change detection."""
+        context = self.analyzer._create_analysis_context(app_info)
+        return {
+            "app_name": context["app_name"],
+            "exe": context["process_info"]["exe"],
+            "uid": context["process_info"]["uid"],
+            "local_host": context["local_host"],
+            "local_port": context["local_port"],
+            "local_hosts": frozenset(getattr(app_info, 'local_hosts', ())),
+            "remote_host": context["remote_host"],
+            "remote_port": context["remote_port"],
+            "remote_hosts": frozenset(getattr(app_info, 'remote_hosts', ())),
+            "is_tunneled": context["dtm_state"]["is_tunneled"]
+        }
+
+    @staticmethod
+    def context_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Set[str]:
+        """Return the relevant fields that differ between two snapshots."""
+        return {field for field in RELEVANT_FIELDS if old.get(field) != new.get(field)}
+
+    def record(self, pid: int, app_info: ApplicationInfo):
+        """
+        Record that an application was analyzed so it is tracked for re-analysis.
+
+        Args:
+            pid: Process ID of the analyzed application
+            app_info: Application information used for the analysis
+        """
+        self._snapshots[pid] = self._snapshot(app_info)
+        self._analyzed_at[pid] = time.monotonic()
+
+    def forget(self, pid: int):
+        """Stop tracking an application."""
+        self._snapshots.pop(pid, None)
+        self._analyzed_at.pop(pid, None)
+
+    async def _scan_loop(self):
+        """Main loop for periodic re-analysis."""
+        while self.running:
+            try:
+                await asyncio.sleep(self.scan_interval)
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in re-analysis loop: {str(e)}", exc_info=True)
+
+    async def run_once(self) -> int:
+        """
+        Re-analyze changed applications, up to the refresh budget.
+
+        Returns:
+            Number of applications re-analyzed
+        """
+        changed = []
+        for pid in list(self._snapshots.keys()):
+            if pid in self._in_flight:
+                continue
+
+            app_info = self.app_provider(pid)
+            if app_info is None:
+                self.forget(pid)
+                continue
+
+            diff = self.context_diff(self._snapshots[pid], self._snapshot(app_info))
+            if diff:
+                changed.append((self._analyzed_at[pid], pid, app_info, diff))
+
+        if not changed:
+            return 0
+
+        # Stalest analyses first; the rest wait for the next interval
+        changed.sort(key=lambda item: item[0])
+        selected = changed[:self.refresh_budget]
+        if len(changed) > len(selected):
+            self.logger.info(
+                f"Re-analysis budget reached: {len(selected)} of {len(changed)} changed applications queued"
+            )
+
+        await asyncio.gather(*(
+            self._reanalyze(pid, app_info, diff) for _, pid, app_info, diff in selected
+        ))
+        return len(selected)
+
+    async def _reanalyze(self, pid: int, app_info: ApplicationInfo, diff: Set[str]):
+        """Re-analyze a single application."""
+        self._in_flight.add(pid)
+        try:
+            self.logger.info(f"Re-analyzing {app_info.name} (PID: {pid}), changed: {', '.join(sorted(diff))}")
+            analysis = await self.analyzer.analyze_application(app_info)
+            if pid in self._snapshots:
+                self.record(pid, app_info)
+                self.on_result(pid, analysis)
+        except Exception as e:
+            self.logger.error(f"Failed to re-analyze PID {pid}: {str(e)}")
+        finally:
+            self._in_flight.discard(pid)
@@ -0,0 +1,288 @@
+"""
+State Deltas Module
+Turns the application/tunnel state the UI consumes into sequence-numbered
+row deltas for remote clients, with bounded history for catching up, and
+per-client page streams for the web dashboard.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.discovery import ApplicationInfo
+from app.tunnel_manager import TunnelInfo
+from app.ui_index import SortedIndex
+
+# Columns of a state row, in tuple order (the PID is the row key)
+ROW_FIELDS = (
+    "name", "local_port", "remote_host", "remote_port",
+    "tunnel_port", "tunneled", "connections", "rate"
+)
+
+# Queued to a subscriber that fell too far behind; it must fetch a snapshot
+RESYNC = {"type": "resync"}
+
+
+# Column order of compact rows: the PID followed by ROW_FIELDS
+PAGE_FIELDS = ("pid",) + ROW_FIELDS
+
+
+def row_dict(pid: int, row: Tuple) -> Dict[str, Any]:
+    """Expand a row tuple into a JSON-ready dict."""
+    return {"pid": pid, **dict(zip(ROW_FIELDS, row))}
+
+
+def row_list(row: Dict[str, Any]) -> List[Any]:
+    """Compact a row dict into a PAGE_FIELDS ordered list."""
+    return [row[name] for name in PAGE_FIELDS]
+
+
+class Subscription:
+    """Bounded queue of deltas for one client."""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    def publish(self, delta: Dict[str, Any]):
+        """Queue a delta; a full queue is replaced by a resync request."""
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self) -> Dict[str, Any]:
+        """Next delta (or RESYNC)."""
+        return await self.queue.get()
+
+
+class StateDeltaTracker:
+    """Diffs successive state views and publishes the changed rows."""
+
+    def __init__(self, history_size: int = 1024, queue_size: int = 256):
+        """
+        Initialize the tracker.
+
+        Args:
+            history_size: Deltas kept for clients resuming from a sequence number
+            queue_size: Deltas buffered per subscriber before it must resync
+        """
+        self.logger = logging.getLogger(__name__)
+        self.seq = 0
+        self.rows: Dict[int, Tuple] = {}
+        self.pids = SortedIndex()
+        self.last_rotation: Optional[datetime] = None
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.queue_size = queue_size
+        self.subscribers: List[Subscription] = []
+        self._versions: Optional[Tuple[int, ...]] = None
+
+    def update(
+        self,
+        apps: Dict[int, ApplicationInfo],
+        tunnels: Dict[int, TunnelInfo],
+        ports: Dict[int, int],
+        last_rotation: Optional[datetime],
+        versions: Optional[Tuple[int, ...]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Record the current state; takes the same inputs as DTMUI.update.
+
+        Args:
+            apps: Active applications by PID
+            tunnels: Active tunnels by PID
+            ports: Tunnel port assignments by PID
+            last_rotation: Time of the last port rotation
+            versions: Change counters of the data sources; unchanged counters
+                skip the diff entirely
+
+        Returns:
+            The published delta, or None if nothing changed
+        """
+        if versions is not None and versions == self._versions and last_rotation == self.last_rotation:
+            return None
+        self._versions = versions
+
+        upserts = []
+        rows = {}
+        for pid, app in apps.items():
+            tunnel = tunnels.get(pid)
+            counters = getattr(tunnel, "counters", None)
+            row = (
+                app.name, app.local_port, app.remote_host, app.remote_port,
+                ports.get(pid), tunnel is not None,
+                counters.connections_active if counters else 0,
+                round(counters.rate, 1) if counters else 0.0
+            )
+            rows[pid] = row
+            if self.rows.get(pid) != row:
+                upserts.append(row_dict(pid, row))
+        removed = [pid for pid in self.rows if pid not in rows]
+
+        rotation_changed = last_rotation != self.last_rotation
+        if not upserts and not removed and not rotation_changed:
+            return None
+
+        for pid in removed:
+            self.pids.discard(pid)
+        for row in upserts:
+            if row["pid"] not in self.rows:
+                self.pids.add(row["pid"])
+        self.rows = rows
+        self.last_rotation = last_rotation
+
+        self.seq += 1
+        delta = {
+            "type": "delta", "seq": self.seq, "total": len(self.pids),
+            "upserts": upserts, "removed": removed
+        }
+        if rotation_changed:
+            delta["last_rotation"] = last_rotation.isoformat() if last_rotation else None
+        self.history.append(delta)
+        for subscription in self.subscribers:
+            subscription.publish(delta)
+        return delta
+
+    def snapshot(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Current rows in PID order.
+
+        Args:
+            offset: First row position
+            limit: Maximum number of rows (all if None)
+
+        Returns:
+            {"type": "snapshot", "seq", "total", "offset", "rows"}
+        """
+        pids = self.pids.page(offset, len(self.pids) if limit is None else limit)
+        return {
+            "type": "snapshot",
+            "seq": self.seq,
+            "total": len(self.pids),
+            "offset": offset,
+            "last_rotation": self.last_rotation.isoformat() if self.last_rotation else None,
+            "rows": [row_dict(pid, self.rows[pid]) for pid in pids]
+        }
+
+    def since(self, seq: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Deltas after a sequence number.
+
+        Args:
+            seq: Last sequence number the client applied
+
+        Returns:
+            The missed deltas, or None if they are no longer in the history
+            (the client needs a snapshot)
+        """
+        if seq == self.seq:
+            return []
+        if seq > self.seq or not self.history or seq < self.history[0]["seq"] - 1:
+            return None
+        return [delta for delta in self.history if delta["seq"] > seq]
+
+    def subscribe(self) -> Subscription:
+        """Start receiving new deltas."""
+        subscription = Subscription(self.queue_size)
+        self.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop receiving deltas."""
+        try:
+            self.subscribers.remove(subscription)
+        except ValueError:
+            pass
+
+
+class PageStream:
+    """
+    Delta stream for one client showing a page of the rows.
+
+    Only changes to rows on the page are sent, as compact lists. When rows
+    are added or removed before the end of the page (so the page itself
+    shifts), or the client's queue overflowed, a page snapshot is sent
+    instead. Every message carries ``prev``, the sequence number of the
+    message sent before it, so a client that misses one notices the gap
+    and reconnects.
+    """
+
+    def __init__(self, tracker: StateDeltaTracker, offset: int = 0, limit: int = 50):
+        """
+        Initialize the stream.
+
+        Args:
+            tracker: Source of the deltas
+            offset: First row position of the page
+            limit: Rows per page
+        """
+        self.tracker = tracker
+        self.offset = offset
+        self.limit = limit
+        self.subscription = tracker.subscribe()
+        self.sent_seq: Optional[int] = None
+        self._page: List[int] = []
+        self._total_sent = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Page snapshot at the tracker's current sequence number."""
+        tracker = self.tracker
+        self._page = tracker.pids.page(self.offset, self.limit)
+        self._total_sent = len(tracker.pids)
+        message = {
+            "type": "page",
+            "seq": tracker.seq,
+            "prev": self.sent_seq,
+            "total": self._total_sent,
+            "offset": self.offset,
+            "limit": self.limit,
+            "fields": PAGE_FIELDS,
+            "last_rotation": tracker.last_rotation.isoformat() if tracker.last_rotation else None,
+            "rows": [[pid, *tracker.rows[pid]] for pid in self._page]
+        }
+        self.sent_seq = tracker.seq
+        return message
+
+    def page_delta(self, delta: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Reduce a tracker delta to this page.
+
+        Args:
+            delta: Delta published by the tracker
+
+        Returns:
+            The message to send (a page delta or a page snapshot), or None
+            if the delta does not affect the page or was already covered
+        """
+        if delta is RESYNC:
+            return self.snapshot()
+        if self.sent_seq is not None and delta["seq"] <= self.sent_seq:
+            return None
+        # The tracker may be ahead of this delta; compare against its current page
+        if self.tracker.pids.page(self.offset, self.limit) != self._page:
+            return self.snapshot()
+
+        on_page = set(self._page)
+        rows = [row_list(row) for row in delta["upserts"] if row["pid"] in on_page]
+        message = {"type": "delta", "seq": delta["seq"], "prev": self.sent_seq, "total": delta["total"]}
+        if "last_rotation" in delta:
+            message["last_rotation"] = delta["last_rotation"]
+        elif not rows and delta["total"] == self._total_sent:
+            return None
+        message["rows"] = rows
+        self.sent_seq = delta["seq"]
+        self._total_sent = delta["total"]
+        return message
+
+    async def next(self) -> Dict[str, Any]:
+        """Wait for the next message that affects the page."""
+        while True:
+            message = self.page_delta(await self.subscription.get())
+            if message is not None:
+                return message
+
+    def close(self):
+        """Stop receiving deltas."""
+        self.tracker.unsubscribe(self.subscription)
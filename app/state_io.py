@@ -0,0 +1,192 @@
+"""
+State I/O Module
+Runs state-store disk and crypto work on a dedicated thread pool and provides
+durable atomic writes with group-committed fsyncs.
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def read_if_exists(path: Path) -> Optional[bytes]:
+    """Read a file, or return None if it does not exist."""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def fsync_directory(path: Path):
+    """Persist directory entry changes (renames, unlinks) to disk."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on every platform (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_temp(path: Path, data: bytes):
+    """Write a temp file; it is fsynced when its batch commits."""
+    with open(path, "wb") as handle:
+        handle.write(data)
+
+
+def _fsync_file(path: Path):
+    """Flush a file's data to disk."""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class StateIO:
+    """Dedicated executor for state-store I/O with group-committed atomic writes."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the state I/O executor.
+
+        Args:
+            config: Optional ``state_security`` configuration section
+        """
+        self.logger = logging.getLogger(__name__)
+        config = config or {}
+        self.fsync = config.get("fsync", True)
+        # Writes arriving within this window share one commit (seconds)
+        self.group_commit_window = config.get("group_commit_window", 0.002)
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.get("io_workers", 2),
+            thread_name_prefix="dtm-state-io"
+        )
+        self.stats = {"writes": 0, "commits": 0, "superseded": 0, "fsyncs": 0}
+        self._pending: List[Tuple[int, Path, Path, asyncio.Future]] = []
+        self._commit_task: Optional[asyncio.Task] = None
+        # Issue order per target, so a slow temp write never overwrites a newer one
+        self._sequence = itertools.count()
+        self._committed: Dict[Path, int] = {}
+        self._writers: Dict[Path, int] = {}
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the state I/O executor.
+
+        Args:
+            func: Blocking function (disk access, gpg, AEAD)
+            *args: Positional arguments for func
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            The callable's result
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def read_bytes(self, path: Path) -> Optional[bytes]:
+        """Read a file off the event loop, or return None if it does not exist."""
+        return await self.run(read_if_exists, path)
+
+    async def write_atomic(self, path: Path, data: bytes):
+        """
+        Durably replace a file's contents.
+
+        The data goes to a temp file in the same directory, which is fsynced and
+        moved into place with os.replace before the directory itself is fsynced.
+        Writes that arrive together are committed as one batch, and a later write
+        to the same path supersedes an earlier one that has not committed yet.
+
+        Args:
+            path: Target file path
+            data: New file contents
+        """
+        sequence = next(self._sequence)
+        self._writers[path] = self._writers.get(path, 0) + 1
+        try:
+            temp_path = path.with_name(f"{path.name}.{os.urandom(8).hex()}.tmp")
+            await self.run(_write_temp, temp_path, data)
+            self.stats["writes"] += 1
+
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((sequence, temp_path, path, future))
+            if self._commit_task is None or self._commit_task.done():
+                self._commit_task = asyncio.create_task(self._commit_loop())
+            await future
+        finally:
+            self._writers[path] -= 1
+            if not self._writers[path]:
+                del self._writers[path]
+                self._committed.pop(path, None)
+
+    async def _commit_loop(self):
+        """Commit pending writes in batches until none are left."""
+        while self._pending:
+            if self.group_commit_window > 0:
+                await asyncio.sleep(self.group_commit_window)
+            batch, self._pending = self._pending, []
+            try:
+                await self.run(self._commit_batch, [entry[:3] for entry in batch])
+            except Exception as e:
+                self.logger.error(f"State commit of {len(batch)} writes failed: {str(e)}")
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+    def _commit_batch(self, batch: List[Tuple[int, Path, Path]]):
+        """Fsync, rename and directory-fsync one batch of temp files (executor thread)."""
+        latest: Dict[Path, Tuple[int, Path]] = {}
+        try:
+            for sequence, temp_path, target in sorted(batch):
+                # Superseded writes are dropped; only the newest contents matter
+                if sequence < self._committed.get(target, -1):
+                    temp_path.unlink()
+                    self.stats["superseded"] += 1
+                    continue
+                if target in latest:
+                    latest[target][1].unlink()
+                    self.stats["superseded"] += 1
+                latest[target] = (sequence, temp_path)
+
+            for target, (sequence, temp_path) in latest.items():
+                if self.fsync:
+                    _fsync_file(temp_path)
+                    self.stats["fsyncs"] += 1
+                os.replace(temp_path, target)
+                self._committed[target] = sequence
+
+            if self.fsync:
+                for directory in {target.parent for target in latest}:
+                    fsync_directory(directory)
+                    self.stats["fsyncs"] += 1
+            self.stats["commits"] += 1
+        except Exception:
+            for _, temp_path, _ in batch:
+                try:
+                    temp_path.unlink(missing_ok=True)
+                except OSError:
+                    pass
+            raise
+
+    async def flush(self):
+        """Wait until every pending write has committed."""
+        while self._commit_task and not self._commit_task.done():
+            await asyncio.shield(self._commit_task)
+
+    async def close(self):
+        """Flush pending writes and shut the executor down."""
+        await self.flush()
+        await asyncio.to_thread(self.executor.shutdown, True)
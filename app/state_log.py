@@ -0,0 +1,368 @@
+"""
+State Log Module
+Append-only, log-structured backend for encrypted state with checkpointed
+recovery and background compaction.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from app.state_io import StateIO, fsync_directory
+
+# Record: crc32(4) | key length(2) | value length(4) | key | value
+RECORD_CRC = struct.Struct(">I")
+RECORD_LENGTHS = struct.Struct(">HI")
+RECORD_HEADER_SIZE = RECORD_CRC.size + RECORD_LENGTHS.size
+
+SEGMENT_PREFIX = "segment."
+SEGMENT_SUFFIX = ".log"
+CHECKPOINT_FILE = "checkpoint.json"
+
+# key -> (segment id, record offset, record length)
+Location = Tuple[int, int, int]
+
+
+def encode_record(key: str, value: bytes) -> bytes:
+    """Encode one key/value record with its checksum."""
+    key_bytes = key.encode()
+    body = RECORD_LENGTHS.pack(len(key_bytes), len(value)) + key_bytes + value
+    return RECORD_CRC.pack(zlib.crc32(body)) + body
+
+
+def decode_record(record: bytes) -> Optional[Tuple[str, bytes]]:
+    """Decode a complete record, or return None if it is torn or corrupt."""
+    if len(record) < RECORD_HEADER_SIZE:
+        return None
+    (crc,) = RECORD_CRC.unpack_from(record)
+    key_len, value_len = RECORD_LENGTHS.unpack_from(record, RECORD_CRC.size)
+    end = RECORD_HEADER_SIZE + key_len + value_len
+    if end > len(record) or zlib.crc32(record[RECORD_CRC.size:end]) != crc:
+        return None
+    key = record[RECORD_HEADER_SIZE:RECORD_HEADER_SIZE + key_len].decode()
+    return key, record[RECORD_HEADER_SIZE + key_len:end]
+
+
+def scan_segment(data: bytes, offset: int = 0) -> Tuple[List[Tuple[str, int, int]], int]:
+    """
+    Scan records in a segment.
+
+    Args:
+        data: Segment contents
+        offset: Record boundary to start from
+
+    Returns:
+        ([(key, offset, length), ...], end of the last valid record)
+    """
+    records = []
+    while offset + RECORD_HEADER_SIZE <= len(data):
+        key_len, value_len = RECORD_LENGTHS.unpack_from(data, offset + RECORD_CRC.size)
+        length = RECORD_HEADER_SIZE + key_len + value_len
+        decoded = decode_record(data[offset:offset + length])
+        if decoded is None:
+            break
+        records.append((decoded[0], offset, length))
+        offset += length
+    return records, offset
+
+
+class LogStructuredStore:
+    """Encrypted state store that appends records instead of rewriting files."""
+
+    def __init__(self, directory: Path, io: StateIO, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the log store.
+
+        Args:
+            directory: Directory holding segments and the checkpoint
+            io: State I/O executor used for all disk work
+            config: Optional ``state_security.log`` configuration section
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.io = io
+        config = config or {}
+        self.segment_size = config.get("segment_size", 4 * 1024 * 1024)
+        self.checkpoint_every = config.get("checkpoint_every", 100)
+        self.compaction_interval = config.get("compaction_interval", 30)
+        self.compaction_ratio = config.get("compaction_ratio", 0.5)
+        self.compaction_min_bytes = config.get("compaction_min_bytes", 1024 * 1024)
+
+        self.index: Dict[str, Location] = {}
+        self.segment_sizes: Dict[int, int] = {}
+        self.active_segment = 0
+        self.running = False
+        self.stats = {"appends": 0, "replayed": 0, "checkpoints": 0, "compactions": 0}
+        self._lock = asyncio.Lock()
+        self._since_checkpoint = 0
+        self._compaction_task: Optional[asyncio.Task] = None
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}"
+
+    def _list_segments(self) -> List[int]:
+        """Segment ids on disk, oldest first."""
+        segments = []
+        for path in self.directory.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            try:
+                segments.append(int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.segment_sizes.values())
+
+    @property
+    def live_bytes(self) -> int:
+        return sum(length for _, _, length in self.index.values())
+
+    @property
+    def garbage_ratio(self) -> float:
+        """Fraction of log bytes held by superseded records."""
+        total = self.total_bytes
+        return 1 - self.live_bytes / total if total else 0.0
+
+    async def open(self):
+        """Recover the index from the last checkpoint and start background compaction."""
+        async with self._lock:
+            await self.io.run(self._recover)
+        self.running = True
+        self._compaction_task = asyncio.create_task(self._compaction_loop())
+        self.logger.info(
+            f"State log opened: {len(self.index)} keys, {len(self.segment_sizes)} segments, "
+            f"{self.stats['replayed']} records replayed"
+        )
+
+    def _recover(self):
+        """Load the checkpoint and replay the log tail (state I/O thread)."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for temp_file in self.directory.glob("*.tmp"):
+            temp_file.unlink()
+
+        segments = self._list_segments()
+        index: Dict[str, Location] = {}
+        start_segment, start_offset = (segments[0] if segments else 0), 0
+
+        checkpoint_path = self.directory / CHECKPOINT_FILE
+        if checkpoint_path.exists():
+            try:
+                checkpoint = json.loads(checkpoint_path.read_bytes())
+                index = {key: tuple(location) for key, location in checkpoint["index"].items()}
+                start_segment, start_offset = checkpoint["segment"], checkpoint["offset"]
+            except (ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Ignoring unreadable state log checkpoint, replaying full log: {str(e)}")
+                index, start_segment, start_offset = {}, (segments[0] if segments else 0), 0
+            else:
+                # Without fsync the checkpoint can reach the disk before the records it covers
+                sizes = {segment: self._segment_path(segment).stat().st_size for segment in segments}
+                covered = [(start_segment, start_offset, 0)] + list(index.values())
+                if any(offset + length > sizes[segment] for segment, offset, length in covered if segment in sizes):
+                    self.logger.warning("State log checkpoint is ahead of the log, replaying full log")
+                    index, start_segment, start_offset = {}, (segments[0] if segments else 0), 0
+
+        replayed = 0
+        for segment in segments:
+            if segment < start_segment:
+                continue
+            path = self._segment_path(segment)
+            data = path.read_bytes()
+            offset = start_offset if segment == start_segment else 0
+            records, valid_end = scan_segment(data, offset)
+            for key, record_offset, length in records:
+                index[key] = (segment, record_offset, length)
+            replayed += len(records)
+
+            if valid_end < len(data):
+                if segment == segments[-1]:
+                    # Torn write at the tail of the log
+                    self.logger.warning(f"Truncating torn state log tail in {path.name} at {valid_end}")
+                    with open(path, "r+b") as handle:
+                        handle.truncate(valid_end)
+                        os.fsync(handle.fileno())
+                else:
+                    self.logger.error(f"Corrupt record in state log {path.name} at {valid_end}")
+
+        # Drop entries whose segment vanished and segments nothing references anymore
+        index = {key: location for key, location in index.items() if location[0] in segments}
+        referenced = {location[0] for location in index.values()}
+        for segment in segments:
+            if segment < start_segment and segment not in referenced:
+                self._segment_path(segment).unlink()
+        segments = [s for s in segments if s >= start_segment or s in referenced]
+
+        self.index = index
+        self.segment_sizes = {segment: self._segment_path(segment).stat().st_size for segment in segments}
+        self.active_segment = max(segments + [start_segment])
+        self.segment_sizes.setdefault(self.active_segment, 0)
+        self.stats["replayed"] = replayed
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Read the latest value for a key.
+
+        Args:
+            key: Record key (state file name)
+
+        Returns:
+            The stored value, or None if the key is unknown
+        """
+        async with self._lock:
+            location = self.index.get(key)
+            if location is None:
+                return None
+            return await self.io.run(self._read_value, location)
+
+    def _read_value(self, location: Location) -> bytes:
+        """Read and verify one record (state I/O thread)."""
+        segment, offset, length = location
+        with open(self._segment_path(segment), "rb") as handle:
+            handle.seek(offset)
+            decoded = decode_record(handle.read(length))
+        if decoded is None:
+            raise IOError(f"Corrupt state log record in segment {segment} at {offset}")
+        return decoded[1]
+
+    async def put_many(self, records: Dict[str, bytes]):
+        """
+        Append several records with a single write and fsync.
+
+        Args:
+            records: Mapping of key to (already encrypted) value
+        """
+        if not records:
+            return
+
+        async with self._lock:
+            if self.segment_sizes.get(self.active_segment, 0) >= self.segment_size:
+                self.active_segment += 1
+                self.segment_sizes[self.active_segment] = 0
+
+            encoded = [(key, encode_record(key, value)) for key, value in records.items()]
+            segment = self.active_segment
+            offset = await self.io.run(self._append, segment, b"".join(record for _, record in encoded))
+
+            for key, record in encoded:
+                self.index[key] = (segment, offset, len(record))
+                offset += len(record)
+            self.segment_sizes[segment] = offset
+            self.stats["appends"] += len(encoded)
+            self._since_checkpoint += len(encoded)
+
+            if self._since_checkpoint >= self.checkpoint_every:
+                await self._checkpoint()
+
+    def _append(self, segment: int, data: bytes) -> int:
+        """Append to a segment and return the starting offset (state I/O thread)."""
+        path = self._segment_path(segment)
+        created = not path.exists()
+        with open(path, "ab") as handle:
+            offset = handle.tell()
+            handle.write(data)
+            handle.flush()
+            if self.io.fsync:
+                os.fsync(handle.fileno())
+        if created and self.io.fsync:
+            fsync_directory(self.directory)
+        return offset
+
+    async def _checkpoint(self):
+        """Persist the index and the log position it covers (lock held)."""
+        checkpoint = {
+            "segment": self.active_segment,
+            "offset": self.segment_sizes.get(self.active_segment, 0),
+            "index": self.index
+        }
+        await self.io.write_atomic(self.directory / CHECKPOINT_FILE, json.dumps(checkpoint).encode())
+        self._since_checkpoint = 0
+        self.stats["checkpoints"] += 1
+
+    async def checkpoint(self):
+        """Write a checkpoint now."""
+        async with self._lock:
+            await self._checkpoint()
+
+    async def compact(self) -> bool:
+        """
+        Rewrite live records into a fresh segment and drop the old ones.
+
+        Returns:
+            True if a compaction ran
+        """
+        async with self._lock:
+            if not self.index:
+                return False
+            old_segments = list(self.segment_sizes)
+            compacted = self.active_segment + 1
+            index, size = await self.io.run(self._rewrite, compacted)
+
+            self.index = index
+            self.active_segment = compacted + 1
+            self.segment_sizes = {compacted: size, self.active_segment: 0}
+            await self._checkpoint()
+            await self.io.run(self._remove_segments, old_segments)
+            self.stats["compactions"] += 1
+            self.logger.info(f"Compacted state log into segment {compacted} ({len(index)} keys, {size} bytes)")
+            return True
+
+    def _rewrite(self, compacted: int) -> Tuple[Dict[str, Location], int]:
+        """Copy live records into a new segment (state I/O thread)."""
+        target = self._segment_path(compacted)
+        temp_path = target.with_name(f"{target.name}.tmp")
+        index: Dict[str, Location] = {}
+        offset = 0
+        with open(temp_path, "wb") as output:
+            for key, (segment, record_offset, length) in sorted(self.index.items(), key=lambda item: item[1]):
+                with open(self._segment_path(segment), "rb") as source:
+                    source.seek(record_offset)
+                    record = source.read(length)
+                output.write(record)
+                index[key] = (compacted, offset, length)
+                offset += length
+            output.flush()
+            if self.io.fsync:
+                os.fsync(output.fileno())
+        os.replace(temp_path, target)
+        if self.io.fsync:
+            fsync_directory(self.directory)
+        return index, offset
+
+    def _remove_segments(self, segments: List[int]):
+        """Delete segments superseded by a compaction (state I/O thread)."""
+        for segment in segments:
+            try:
+                self._segment_path(segment).unlink()
+            except FileNotFoundError:
+                continue
+
+    def needs_compaction(self) -> bool:
+        """Whether enough of the log is garbage to be worth compacting."""
+        return self.total_bytes >= self.compaction_min_bytes and self.garbage_ratio >= self.compaction_ratio
+
+    async def _compaction_loop(self):
+        """Background loop compacting the log when garbage accumulates."""
+        while self.running:
+            try:
+                await asyncio.sleep(self.compaction_interval)
+                if self.needs_compaction():
+                    await self.compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in state log compaction: {str(e)}", exc_info=True)
+
+    async def close(self):
+        """Stop compaction and write a final checkpoint."""
+        self.running = False
+        if self._compaction_task:
+            self._compaction_task.cancel()
+            try:
+                await self._compaction_task
+            except asyncio.CancelledError:
+                pass
+        await self.checkpoint()
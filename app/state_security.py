@@ -4,41 +4,266 @@ Provides PGP-based encryption for state management and certificate protection.
 """
 
 import asyncio
+import contextlib
+import ctypes
+import ctypes.util
 import json
+import logging
 import os
 import mmap
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional, List
+from typing import Dict, Any, Iterable, Tuple, Optional, List, Sequence
 import gnupg
 from cryptography.fernet import Fernet
-from base64 import b64encode, b64decode
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+from base64 import b64encode, b64decode, urlsafe_b64encode
 import hashlib
-import shutil
+import hmac
 import platform
 from rich.progress import Progress
+from app.backup_catalog import BackupCatalog
+from app.merkle import MerkleNode, StatePath, build_tree, diff, find, update_path
+from app.state_io import StateIO
+from app.state_log import LogStructuredStore
+
+def _buffer_address(buffer: mmap.mmap) -> int:
+    """Get the address of a writable mmap buffer."""
+    view = ctypes.c_char.from_buffer(buffer)
+    try:
+        return ctypes.addressof(view)
+    finally:
+        del view  # Release the buffer export so the mmap can be closed
+
+def lock_pages(buffer: mmap.mmap) -> bool:
+    """
+    Lock an mmap buffer into RAM so it is never swapped to disk.
+    
+    Returns:
+        True if the pages were locked, False if locking is unavailable
+    """
+    try:
+        address = _buffer_address(buffer)
+        if platform.system() == 'Windows':
+            return bool(ctypes.windll.kernel32.VirtualLock(
+                ctypes.c_void_p(address), ctypes.c_size_t(len(buffer))
+            ))
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        return libc.mlock(ctypes.c_void_p(address), ctypes.c_size_t(len(buffer))) == 0
+    except Exception:
+        return False  # Memory locking is a security enhancement but not critical
+
+def unlock_pages(buffer: mmap.mmap):
+    """Unlock pages previously locked with lock_pages."""
+    try:
+        address = _buffer_address(buffer)
+        if platform.system() == 'Windows':
+            ctypes.windll.kernel32.VirtualUnlock(ctypes.c_void_p(address), ctypes.c_size_t(len(buffer)))
+        else:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.munlock(ctypes.c_void_p(address), ctypes.c_size_t(len(buffer)))
+    except Exception:
+        pass
+
+class LockedKeySlot:
+    """Single secret held in a locked memory page with explicit zeroization."""
+    
+    def __init__(self, size: int = mmap.PAGESIZE):
+        """
+        Allocate the locked page.
+        
+        Args:
+            size: Slot size in bytes (rounded up by the OS to whole pages)
+        """
+        self._size = size
+        self._length = 0
+        self._memory = mmap.mmap(-1, size)
+        self.locked = lock_pages(self._memory)
+        
+    def store(self, secret: bytes):
+        """Store a secret, replacing and wiping any previous one."""
+        if len(secret) > self._size:
+            raise SecurityException("Secret does not fit in key slot")
+        self.zeroize()
+        self._memory[:len(secret)] = secret
+        self._length = len(secret)
+        
+    def load(self) -> Optional[bytes]:
+        """Return a copy of the stored secret, or None if the slot is empty."""
+        if not self._length:
+            return None
+        return self._memory[:self._length]
+        
+    def zeroize(self):
+        """Overwrite the slot with zeros."""
+        if self._length:
+            self._memory[:self._length] = b"\x00" * self._length
+            self._length = 0
+            
+    def close(self):
+        """Zeroize, unlock and release the slot."""
+        if self._memory.closed:
+            return
+        self.zeroize()
+        if self.locked:
+            unlock_pages(self._memory)
+        self._memory.close()
+        
+    def __del__(self):
+        """Ensure the secret is wiped when the slot is garbage collected."""
+        if hasattr(self, '_memory'):
+            self.close()
+
+# Envelope blob layout: magic | cipher id | data key id (8) | nonce (12) | ciphertext+tag
+ENVELOPE_MAGIC = b"DTMENV1"
+ENVELOPE_CIPHERS = {"aes-gcm": (1, AESGCM), "chacha20-poly1305": (2, ChaCha20Poly1305)}
+ENVELOPE_CIPHER_IDS = {cipher_id: cipher for cipher_id, cipher in ENVELOPE_CIPHERS.values()}
+
+# Slot sizes of the secure key arena; larger secrets get dedicated locked pages
+ARENA_SIZE_CLASSES = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+def _allocate_secure_pages(size: int) -> mmap.mmap:
+    """Allocate anonymous private pages for secret material."""
+    if platform.system() == 'Windows':
+        # On Windows, use basic memory mapping
+        return mmap.mmap(-1, size)
+    # On Unix systems, use additional security flags
+    return mmap.mmap(
+        -1,
+        size,
+        flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS,
+        prot=mmap.PROT_READ | mmap.PROT_WRITE
+    )
+
+class SecureArena:
+    """Locked slab arena holding many secrets addressed by key id."""
+    
+    def __init__(self, slab_size: int = 64 * 1024, max_size: int = 16 * 1024 * 1024):
+        """
+        Initialize the arena; slabs are allocated and locked on demand.
+        
+        Args:
+            slab_size: Bytes per slab; each slab serves a single size class
+            max_size: Upper bound on locked bytes held by the arena
+        """
+        self.slab_size = max(slab_size, ARENA_SIZE_CLASSES[-1])
+        self.max_size = max_size
+        self.locked = True
+        self._slabs: List[mmap.mmap] = []
+        self._large: Dict[str, mmap.mmap] = {}
+        # Per size class stack of free (slab, offset) slots
+        self._free: Dict[int, List[Tuple[int, int]]] = {size: [] for size in ARENA_SIZE_CLASSES}
+        # key_id -> (size class, slab, offset, length); size class 0 marks a dedicated mapping
+        self._index: Dict[str, Tuple[int, int, int, int]] = {}
+        
+    @property
+    def allocated_bytes(self) -> int:
+        """Bytes of locked memory currently mapped by the arena."""
+        return len(self._slabs) * self.slab_size + sum(len(memory) for memory in self._large.values())
+        
+    def stats(self) -> Dict[str, Any]:
+        """Arena occupancy for diagnostics."""
+        return {
+            "keys": len(self._index),
+            "slabs": len(self._slabs),
+            "allocated_bytes": self.allocated_bytes,
+            "free_slots": {size: len(slots) for size, slots in self._free.items()},
+            "locked": self.locked
+        }
+        
+    def _map(self, size: int) -> mmap.mmap:
+        """Map and lock new pages within the arena budget."""
+        if self.allocated_bytes + size > self.max_size:
+            raise SecurityException("Secure key arena is full")
+        memory = _allocate_secure_pages(size)
+        self.locked = lock_pages(memory) and self.locked
+        return memory
+        
+    def _grow(self, size_class: int):
+        """Add a slab carved into slots of one size class."""
+        slab_id = len(self._slabs)
+        self._slabs.append(self._map(self.slab_size))
+        self._free[size_class].extend(
+            (slab_id, offset) for offset in reversed(range(0, self.slab_size - size_class + 1, size_class))
+        )
+        
+    def store(self, key_id: str, secret: bytes):
+        """Store a secret under key_id, wiping any previous value."""
+        self.free(key_id)
+        size_class = next((size for size in ARENA_SIZE_CLASSES if len(secret) <= size), 0)
+        if not size_class:
+            pages = -(-len(secret) // mmap.PAGESIZE) * mmap.PAGESIZE
+            memory = self._map(pages)
+            memory[:len(secret)] = secret
+            self._large[key_id] = memory
+            self._index[key_id] = (0, -1, 0, len(secret))
+            return
+            
+        if not self._free[size_class]:
+            self._grow(size_class)
+        slab_id, offset = self._free[size_class].pop()
+        self._slabs[slab_id][offset:offset + len(secret)] = secret
+        self._index[key_id] = (size_class, slab_id, offset, len(secret))
+        
+    def load(self, key_id: str) -> Optional[bytes]:
+        """Return a copy of a secret, or None if key_id is unknown."""
+        entry = self._index.get(key_id)
+        if entry is None:
+            return None
+        size_class, slab_id, offset, length = entry
+        memory = self._large[key_id] if not size_class else self._slabs[slab_id]
+        return memory[offset:offset + length]
+        
+    def free(self, key_id: str):
+        """Zeroize a secret's slot and return it to the free list."""
+        entry = self._index.pop(key_id, None)
+        if entry is None:
+            return
+        size_class, slab_id, offset, length = entry
+        if not size_class:
+            memory = self._large.pop(key_id)
+            memory[:length] = bytes(length)
+            unlock_pages(memory)
+            memory.close()
+            return
+        self._slabs[slab_id][offset:offset + size_class] = bytes(size_class)
+        self._free[size_class].append((slab_id, offset))
+        
+    def __contains__(self, key_id: str) -> bool:
+        return key_id in self._index
+        
+    def close(self):
+        """Zeroize every secret and release all pages."""
+        for key_id in list(self._index):
+            self.free(key_id)
+        for slab in self._slabs:
+            if not slab.closed:
+                unlock_pages(slab)
+                slab.close()
+        self._slabs.clear()
+        self._free = {size: [] for size in ARENA_SIZE_CLASSES}
 
 class SecureMemoryStore:
     """Secure in-memory key storage with protection mechanisms."""
     
-    def __init__(self):
-        """Initialize secure memory storage based on platform."""
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize secure memory storage.
+        
+        Args:
+            config: Optional ``state_security.key_arena`` configuration section
+        """
+        config = config or {}
         self._memory_lock = asyncio.Lock()
         self._runtime_key = Fernet.generate_key()
         self._fernet = Fernet(self._runtime_key)
-        
-        # Create platform-specific secure memory
-        if platform.system() == 'Windows':
-            # On Windows, use basic memory mapping
-            self._secure_memory = mmap.mmap(-1, 4096)
-        else:
-            # On Unix systems, use additional security flags
-            self._secure_memory = mmap.mmap(
-                -1,
-                4096,
-                flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS,
-                prot=mmap.PROT_READ | mmap.PROT_WRITE
-            )
+        self._arena = SecureArena(
+            slab_size=config.get("slab_size", 64 * 1024),
+            max_size=config.get("max_size", 16 * 1024 * 1024)
+        )
         
     async def secure_store(self, key_id: str, key_data: bytes, runtime_id: bytes):
         """Store key data with memory protection."""
@@ -46,27 +271,24 @@ class SecureMemoryStore:
             # Encrypt key data with runtime ID
             encrypted_key = self._encrypt_with_runtime(key_data, runtime_id)
             
-            # Store in protected memory
-            self._secure_memory.seek(0)
-            self._secure_memory.write(encrypted_key)
-            
-            # Lock memory pages if possible
-            self._lock_memory_pages()
+            # Store in its own locked arena slot, wiping any previous value
+            self._arena.store(key_id, encrypted_key)
             
     async def secure_retrieve(self, key_id: str, runtime_id: bytes) -> bytes:
         """Retrieve key data with verification."""
         async with self._memory_lock:
-            # Verify runtime ID
-            if not self._verify_runtime(runtime_id):
-                raise SecurityException("Invalid runtime ID")
+            encrypted_key = self._arena.load(key_id)
+            if encrypted_key is None:
+                raise SecurityException(f"Key {key_id} not found in secure memory")
                 
-            # Read from protected memory
-            self._secure_memory.seek(0)
-            encrypted_key = self._secure_memory.read()
-            
-            # Decrypt with runtime ID
+            # Decrypt and verify runtime ID
             return self._decrypt_with_runtime(encrypted_key, runtime_id)
             
+    async def secure_delete(self, key_id: str):
+        """Wipe and release a stored key."""
+        async with self._memory_lock:
+            self._arena.free(key_id)
+            
     def _encrypt_with_runtime(self, data: bytes, runtime_id: bytes) -> bytes:
         """Encrypt data using runtime key."""
         combined = runtime_id + data
@@ -80,38 +302,166 @@ class SecureMemoryStore:
             raise SecurityException("Runtime ID mismatch")
         return decrypted[32:]
         
-    def _verify_runtime(self, runtime_id: bytes) -> bool:
-        """Verify runtime ID matches stored ID."""
+    def stats(self) -> Dict[str, Any]:
+        """Secure arena occupancy."""
+        return self._arena.stats()
+        
+    def close(self):
+        """Zeroize and release all stored keys."""
+        self._arena.close()
+        
+    def __del__(self):
+        """Cleanup secure memory."""
+        if hasattr(self, '_arena'):
+            self._arena.close()
+
+class AsyncRWLock:
+    """Asyncio readers-writer lock; waiting writers hold off new readers."""
+    
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        
+    @contextlib.asynccontextmanager
+    async def read(self):
+        """Shared access; any number of readers may hold it at once."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
         try:
-            self._secure_memory.seek(0)
-            encrypted_data = self._secure_memory.read()
-            decrypted = self._fernet.decrypt(encrypted_data)
-            return decrypted[:32] == runtime_id
-        except Exception:
-            return False
-            
-    def _lock_memory_pages(self):
-        """Prevent memory from being swapped if possible."""
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+                    
+    @contextlib.asynccontextmanager
+    async def write(self):
+        """Exclusive access."""
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
         try:
-            if platform.system() != 'Windows' and hasattr(os, "mlock"):
-                os.mlock(self._secure_memory)
-        except Exception:
-            pass  # Memory locking is a security enhancement but not critical
+            yield
+        finally:
+            async with self._condition:
+                self._writer = False
+                self._condition.notify_all()
+
+class CertificateCache:
+    """TTL-bounded LRU cache of decrypted certificates held in locked memory."""
+    
+    def __init__(self, ttl: float = 300.0, max_entries: int = 64, max_bytes: int = 4 * 1024 * 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl: Seconds a decrypted certificate may stay cached
+            max_entries: Maximum number of cached certificates
+            max_bytes: Locked memory budget for cached certificate bytes
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._arena = SecureArena(max_size=max_bytes)
+        # cert_id -> (expires_at, metadata), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        
+    def get(self, cert_id: str, count: bool = True) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Return cached (certificate bytes, metadata) unless missing or expired.
+        
+        Args:
+            cert_id: Certificate identifier
+            count: Whether the lookup counts towards hit/miss statistics
+        """
+        entry = self._entries.get(cert_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.invalidate(cert_id)
+            if count:
+                self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(cert_id)
+        if count:
+            self.stats["hits"] += 1
+        return self._arena.load(cert_id), entry[1]
+        
+    def put(self, cert_id: str, cert_bytes: bytes, metadata: Dict[str, Any]):
+        """Cache a decrypted certificate, evicting least recently used entries as needed."""
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        self.invalidate(cert_id)
+        while len(self._entries) >= self.max_entries:
+            self._evict()
+        while True:
+            try:
+                self._arena.store(cert_id, cert_bytes)
+                break
+            except SecurityException:
+                if not self._entries:
+                    return  # Larger than the whole budget; serve it uncached
+                self._evict()
+        self._entries[cert_id] = (time.monotonic() + self.ttl, metadata)
+        
+    def _evict(self):
+        cert_id, _ = self._entries.popitem(last=False)
+        self._arena.free(cert_id)
+        self.stats["evictions"] += 1
+        
+    def invalidate(self, cert_id: str):
+        """Drop and wipe a cached certificate."""
+        if self._entries.pop(cert_id, None) is not None:
+            self._arena.free(cert_id)
             
-    def __del__(self):
-        """Cleanup secure memory."""
-        if hasattr(self, '_secure_memory'):
-            self._secure_memory.close()
+    def clear(self):
+        """Wipe every cached certificate."""
+        for cert_id in list(self._entries):
+            self.invalidate(cert_id)
+            
+    def close(self):
+        """Wipe the cache and release its locked memory."""
+        self._entries.clear()
+        self._arena.close()
 
 class CertificateManager:
     """Manages SSL/TLS certificates with secure storage and verification."""
     
-    def __init__(self, state_manager: 'SecureStateManager', progress: Optional[Progress] = None):
+    def __init__(
+        self,
+        state_manager: 'SecureStateManager',
+        progress: Optional[Progress] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the certificate manager.
+        
+        Args:
+            state_manager: State manager providing encryption and storage
+            progress: Optional Rich progress display
+            config: Optional ``state_security.cert_cache`` configuration section
+        """
+        config = config or {}
         self.state_manager = state_manager
         self.cert_dir = self.state_manager.state_dirs['certificates']
         self.cert_index: Dict[str, Dict[str, Any]] = {}
-        self.cert_lock = asyncio.Lock()
+        # Loads share the lock; stores and rotations take it exclusively
+        self.cert_lock = AsyncRWLock()
         self.progress = progress
+        self.cache = CertificateCache(
+            ttl=config.get("ttl", 300.0),
+            max_entries=config.get("max_entries", 64),
+            max_bytes=config.get("max_bytes", 4 * 1024 * 1024)
+        )
+        # Memory-protection layer keyed to this runtime
+        self._memory_fernet = Fernet(urlsafe_b64encode(self.state_manager.pgp.runtime_id))
         
     async def initialize(self):
         """Initialize certificate management system."""
@@ -130,59 +480,46 @@ class CertificateManager:
         if self.progress:
             task = self.progress.add_task(f"Storing certificate {cert_id}...", total=None)
             
-        async with self.cert_lock:
+        async with self.cert_lock.write():
             try:
-                # Generate certificate hash
-                cert_hash = hashlib.sha256(cert_data).hexdigest()
-                
-                # Double encrypt certificate data
-                # First with Fernet for memory protection
-                fernet = Fernet(Fernet.generate_key())
-                memory_encrypted = fernet.encrypt(cert_data)
-                
-                # Then with PGP for storage
-                encrypted_cert = await self.state_manager.encrypt_state({
-                    "data": b64encode(memory_encrypted).decode(),
-                    "hash": cert_hash,
-                    "encrypted": True
-                }, skip_verification=True)
-                
-                # Store encrypted certificate with atomic write
-                cert_path = self.cert_dir / f"{cert_id}.cert"
-                temp_path = self.cert_dir / f"{cert_id}.{os.urandom(8).hex()}.tmp"
-                
-                # Write to temp file first
-                temp_path.write_bytes(encrypted_cert)
-                
-                # Atomic rename with proper cleanup
-                if cert_path.exists():
-                    cert_path.unlink()
-                temp_path.rename(cert_path)
-                
-                # Update certificate index with encryption metadata
-                self.cert_index[cert_id] = {
-                    "hash": cert_hash,
-                    "metadata": {
-                        **metadata,
-                        "encryption": "pgp+fernet",
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                }
-                await self._save_cert_index()
-                
-            except Exception as e:
-                # Clean up temp file on error
-                if 'temp_path' in locals() and temp_path.exists():
-                    try:
-                        temp_path.unlink()
-                    except Exception:
-                        pass
-                raise e
-                
+                await self._store_certificate(cert_id, cert_data, metadata)
             finally:
                 if self.progress:
                     self.progress.update(task, completed=True)
                     
+    async def _store_certificate(self, cert_id: str, cert_data: bytes, metadata: Dict[str, Any]):
+        """Encrypt and write a certificate (write lock held)."""
+        self.cache.invalidate(cert_id)
+        
+        # Generate certificate hash
+        cert_hash = hashlib.sha256(cert_data).hexdigest()
+        
+        # Double encrypt certificate data
+        # First with Fernet for memory protection
+        memory_encrypted = self._memory_fernet.encrypt(cert_data)
+        
+        # Then with PGP for storage
+        encrypted_cert = await self.state_manager.encrypt_state({
+            "data": b64encode(memory_encrypted).decode(),
+            "hash": cert_hash,
+            "encrypted": True
+        }, skip_verification=True)
+        
+        # Store encrypted certificate with a durable atomic write
+        cert_path = self.cert_dir / f"{cert_id}.cert"
+        await self.state_manager.io.write_atomic(cert_path, encrypted_cert)
+        
+        # Update certificate index with encryption metadata
+        self.cert_index[cert_id] = {
+            "hash": cert_hash,
+            "metadata": {
+                **metadata,
+                "encryption": "pgp+fernet",
+                "timestamp": datetime.utcnow().isoformat()
+            }
+        }
+        await self._save_cert_index()
+        
     async def _save_cert_index(self):
         """Save certificate index without verification."""
         await self.state_manager.save_state(
@@ -192,26 +529,34 @@ class CertificateManager:
         )
 
     async def load_certificate(self, cert_id: str) -> Tuple[bytes, Dict[str, Any]]:
-        """Load and verify certificate."""
-        async with self.cert_lock:
+        """Load and verify certificate, serving repeat loads from the locked cache."""
+        cached = self.cache.get(cert_id)
+        if cached:
+            return cached
+            
+        async with self.cert_lock.read():
+            # Another reader may have filled the cache while we waited
+            cached = self.cache.get(cert_id, count=False)
+            if cached:
+                return cached
+                
             if cert_id not in self.cert_index:
                 raise SecurityException(f"Certificate {cert_id} not found")
                 
             cert_path = self.cert_dir / f"{cert_id}.cert"
-            if not cert_path.exists():
+            encrypted_cert = await self.state_manager.io.read_bytes(cert_path)
+            if encrypted_cert is None:
                 raise SecurityException(f"Certificate file for {cert_id} missing")
                 
             try:
-                # Load and decrypt certificate
-                encrypted_cert = cert_path.read_bytes()
+                # Decrypt certificate
                 cert_data = await self.state_manager.decrypt_state(encrypted_cert)
                 
                 # Decrypt memory protection layer
                 memory_encrypted = b64decode(cert_data["data"])
                 if cert_data.get("encrypted", False):
                     # Handle double-encrypted certificates
-                    fernet = Fernet(self.state_manager.pgp.runtime_id[:32])
-                    cert_bytes = fernet.decrypt(memory_encrypted)
+                    cert_bytes = self._memory_fernet.decrypt(memory_encrypted)
                 else:
                     # Handle legacy certificates
                     cert_bytes = memory_encrypted
@@ -221,7 +566,9 @@ class CertificateManager:
                 if cert_hash != self.cert_index[cert_id]["hash"]:
                     raise SecurityException(f"Certificate {cert_id} hash mismatch")
                     
-                return cert_bytes, self.cert_index[cert_id]["metadata"]
+                metadata = self.cert_index[cert_id]["metadata"]
+                self.cache.put(cert_id, cert_bytes, metadata)
+                return cert_bytes, metadata
                 
             except Exception as e:
                 raise SecurityException(f"Failed to load certificate {cert_id}: {str(e)}")
@@ -233,18 +580,20 @@ class CertificateManager:
         
     async def rotate_certificate(self, cert_id: str, new_cert_data: bytes):
         """Rotate certificate with secure backup of previous version."""
-        async with self.cert_lock:
+        async with self.cert_lock.write():
             if cert_id not in self.cert_index:
                 raise SecurityException(f"Certificate {cert_id} not found")
                 
             # Backup existing certificate
-            old_cert_path = self.cert_dir / f"{cert_id}.cert"
-            backup_path = self.state_manager.state_dirs['backups'] / f"{cert_id}.{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.bak"
-            if old_cert_path.exists():
-                shutil.copy2(old_cert_path, backup_path)
+            old_cert = await self.state_manager.io.read_bytes(self.cert_dir / f"{cert_id}.cert")
+            if old_cert is not None:
+                await self.state_manager.backups.add(
+                    f"{cert_id}.cert", self.state_manager.backup_digest(old_cert), old_cert
+                )
+                await self.state_manager.backups.save()
                 
-            # Store new certificate
-            await self.store_certificate(
+            # Store new certificate (drops the cached old one)
+            await self._store_certificate(
                 cert_id,
                 new_cert_data,
                 self.cert_index[cert_id]["metadata"]
@@ -252,42 +601,127 @@ class CertificateManager:
 
     async def cleanup(self):
         """Clean up certificate manager resources."""
-        try:
-            await self._cleanup_temp_files()
-        except Exception:
-            pass
+        # Wipe decrypted certificates from memory
+        self.cache.close()
 
 class StateVerification:
     """Provides state verification and integrity checking."""
     
     def __init__(self, state_manager: 'SecureStateManager'):
+        self.logger = logging.getLogger(__name__)
         self.state_manager = state_manager
         self.verification_lock = asyncio.Lock()
-        self.state_hashes: Dict[str, str] = {}
+        # state_id -> {"root": hex digest, "keys": {top-level key: hex digest}}
+        self.state_hashes: Dict[str, Dict[str, Any]] = {}
+        # Full Merkle trees of states seen this runtime, for incremental updates
+        self.state_trees: Dict[str, MerkleNode] = {}
+        # state_id -> paths that diverged in the last failed verification
+        self.divergence: Dict[str, List[StatePath]] = {}
         self._is_saving = False  # Prevent recursive saves
         
     async def verify_state(self, state_id: str, state_data: Dict) -> bool:
         """Verify state integrity using stored hashes."""
         async with self.verification_lock:
-            state_hash = self._calculate_state_hash(state_data)
-            stored_hash = self.state_hashes.get(state_id)
+            tree = build_tree(state_data)
+            stored = self.state_hashes.get(state_id)
             
-            if not stored_hash:
-                self.state_hashes[state_id] = state_hash
+            if not stored:
+                self._record(state_id, tree)
                 if not self._is_saving:
                     await self._save_hash_index()
                 return True
                 
-            return state_hash == stored_hash
+            if tree.hexdigest == stored["root"]:
+                self.state_trees[state_id] = tree
+                self.divergence.pop(state_id, None)
+                return True
+                
+            self.divergence[state_id] = self._diverging_paths(state_id, tree)
+            self.logger.warning(
+                f"State {state_id} failed verification, diverged at: "
+                f"{', '.join('/'.join(path) or '<root>' for path in self.divergence[state_id])}"
+            )
+            return False
+            
+    def matches(self, state_id: str, state_data: Dict) -> bool:
+        """Check state data against its recorded root hash without side effects."""
+        stored = self.state_hashes.get(state_id)
+        return stored is not None and build_tree(state_data).hexdigest == stored["root"]
+        
+    def _diverging_paths(self, state_id: str, tree: MerkleNode) -> List[StatePath]:
+        """Locate divergence using the full tree if known, else stored top-level hashes."""
+        expected = self.state_trees.get(state_id)
+        if expected is not None:
+            return diff(expected, tree)
+            
+        stored_keys = self.state_hashes[state_id].get("keys")
+        if not stored_keys or tree.children is None:
+            return [()]
+        actual_keys = {key: node.hexdigest for key, node in tree.children.items()}
+        return [(key,) for key in sorted(stored_keys.keys() | actual_keys.keys())
+                if stored_keys.get(key) != actual_keys.get(key)]
+                
+    async def verify_subtree(self, state_id: str, path: Sequence[Any], value: Any) -> bool:
+        """
+        Verify one part of a state without hashing the rest.
+        
+        Args:
+            state_id: State identifier (file name)
+            path: Path of the subtree, top-level key first
+            value: Current value at that path
+            
+        Returns:
+            True if the subtree matches the recorded hash
+        """
+        async with self.verification_lock:
+            expected = find(self.state_trees.get(state_id), path)
+            if expected is not None:
+                expected_digest = expected.hexdigest
+            elif len(path) == 1 and state_id in self.state_hashes:
+                expected_digest = self.state_hashes[state_id].get("keys", {}).get(str(path[0]))
+            else:
+                expected_digest = None
+                
+            if expected_digest is None:
+                raise SecurityException(f"No recorded hash for {state_id} at {'/'.join(map(str, path))}")
+            return build_tree(value).hexdigest == expected_digest
             
-    async def update_state_hash(self, state_id: str, state_data: Dict):
-        """Update stored hash for state verification."""
+    async def update_state_hash(
+        self,
+        state_id: str,
+        state_data: Dict,
+        changed_paths: Optional[Iterable[Sequence[Any]]] = None
+    ):
+        """
+        Update stored hash for state verification.
+        
+        Args:
+            state_id: State identifier (file name)
+            state_data: Full current state
+            changed_paths: Paths mutated since the last update; when given, only
+                those subtrees and their ancestors are re-hashed
+        """
         if self._is_saving:
             return  # Skip if already saving to prevent recursion
             
         async with self.verification_lock:
-            self.state_hashes[state_id] = self._calculate_state_hash(state_data)
+            tree = self.state_trees.get(state_id)
+            if changed_paths is not None and tree is not None:
+                for path in changed_paths:
+                    tree = update_path(tree, state_data, path)
+            else:
+                tree = build_tree(state_data)
+            self._record(state_id, tree)
             await self._save_hash_index()
+            
+    def _record(self, state_id: str, tree: MerkleNode):
+        """Remember a state's tree and its persistable root/top-level hashes."""
+        self.state_trees[state_id] = tree
+        self.state_hashes[state_id] = {
+            "root": tree.hexdigest,
+            "keys": {key: node.hexdigest for key, node in (tree.children or {}).items()}
+        }
+        self.divergence.pop(state_id, None)
 
     async def _save_hash_index(self):
         """Save hash index to secure storage."""
@@ -302,25 +736,41 @@ class StateVerification:
             self._is_saving = False
 
     def _calculate_state_hash(self, state_data: Dict) -> str:
-        """Calculate deterministic hash of state data."""
-        serialized = json.dumps(state_data, sort_keys=True)
-        return hashlib.sha256(serialized.encode()).hexdigest()
+        """Calculate deterministic Merkle root hash of state data."""
+        return build_tree(state_data).hexdigest
         
     async def load_hash_index(self):
         """Load hash index from secure storage."""
-        hash_data = await self.state_manager.load_state("state_hashes.json")
-        self.state_hashes = hash_data if hash_data else {}
+        hash_data = await self.state_manager.load_state("state_hashes.json") or {}
+        # Entries written before Merkle hashing carry no usable tree; drop them
+        self.state_hashes = {
+            state_id: entry for state_id, entry in hash_data.items()
+            if isinstance(entry, dict) and "root" in entry
+        }
 
 class PGPStateEncryption:
     """PGP-based state encryption with secure key management."""
     
-    def __init__(self):
-        self.memory_key_store = SecureMemoryStore()
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the runtime PGP provider.
+        
+        Args:
+            config: Optional ``state_security`` configuration section
+        """
+        self.memory_key_store = SecureMemoryStore((config or {}).get("key_arena"))
         self.key_status = asyncio.Lock()
         self.runtime_id = os.urandom(32)
         self.gpg = gnupg.GPG()
         self.gpg.encoding = 'utf-8'
         self._runtime_password = None
+        self.private_key: Optional[str] = None
+        self.public_key: Optional[str] = None
+        self.key_fingerprint: Optional[str] = None
+        
+        # PBKDF2 runs once per runtime; the derived key lives in a locked page
+        self._kdf_salt: Optional[bytes] = None
+        self._derived_key = LockedKeySlot()
         
     def _generate_runtime_password(self) -> str:
         """Generate a strong runtime password."""
@@ -354,8 +804,10 @@ class PGPStateEncryption:
     async def initialize(self):
         """Initialize PGP key management."""
         async with self.key_status:
-            # Generate runtime password
+            # Generate runtime password and derive its key once
             self._runtime_password = self._generate_runtime_password()
+            self._kdf_salt = os.urandom(16)
+            self._derived_key.store(self._derive_key(self._runtime_password, self._kdf_salt))
             
             # Generate runtime keys
             self.private_key = await self._generate_private_key()
@@ -376,27 +828,62 @@ class PGPStateEncryption:
             # Clear sensitive data from memory
             self.private_key = None
             
-    def _encrypt_with_password(self, data: bytes, password: str) -> bytes:
-        """Encrypt data with runtime password."""
-        from cryptography.fernet import Fernet
+    async def _generate_private_key(self) -> str:
+        """Generate the runtime PGP keypair and return the armored private key."""
+        key_input = self.gpg.gen_key_input(
+            key_type="RSA",
+            key_length=2048,
+            name_real="DTM Runtime",
+            name_email="runtime@dtm.local",
+            passphrase=self._runtime_password
+        )
+        key = await asyncio.to_thread(self.gpg.gen_key, key_input)
+        if not key.fingerprint:
+            raise SecurityException(f"Failed to generate runtime key: {key.status}")
+        self.key_fingerprint = key.fingerprint
+        return self.gpg.export_keys(key.fingerprint, secret=True, passphrase=self._runtime_password)
+        
+    async def _derive_public_key(self) -> str:
+        """Return the recipient identifier of the runtime public key."""
+        return self.key_fingerprint
+        
+    async def get_public_key(self) -> str:
+        """Get the runtime public key used as encryption recipient."""
+        if not self.public_key:
+            raise SecurityException("Runtime keys not initialized")
+        return self.public_key
+        
+    def _derive_key(self, password: str, salt: bytes) -> bytes:
+        """Derive a Fernet key from a password with PBKDF2-HMAC-SHA256."""
         from cryptography.hazmat.primitives import hashes
         from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
         import base64
         
-        # Generate salt
-        salt = os.urandom(16)
-        
-        # Derive key from password
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
             iterations=480000,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
+        return base64.urlsafe_b64encode(kdf.derive(password.encode()))
+        
+    def _password_key(self, password: str, salt: bytes) -> bytes:
+        """Get the key for a password/salt pair, using the runtime cache when it applies."""
+        if password == self._runtime_password and salt == self._kdf_salt:
+            cached = self._derived_key.load()
+            if cached:
+                return cached
+        return self._derive_key(password, salt)
+        
+    def _encrypt_with_password(self, data: bytes, password: str) -> bytes:
+        """Encrypt data with runtime password."""
+        from cryptography.fernet import Fernet
+        
+        # Runtime password reuses the cached key; anything else gets a fresh salt
+        salt = self._kdf_salt if password == self._runtime_password and self._kdf_salt else os.urandom(16)
         
         # Encrypt data
-        f = Fernet(key)
+        f = Fernet(self._password_key(password, salt))
         encrypted_data = f.encrypt(data)
         
         # Combine salt and encrypted data
@@ -405,25 +892,13 @@ class PGPStateEncryption:
     def _decrypt_with_password(self, encrypted_data: bytes, password: str) -> bytes:
         """Decrypt data with runtime password."""
         from cryptography.fernet import Fernet
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-        import base64
         
         # Extract salt and encrypted data
         salt = encrypted_data[:16]
         data = encrypted_data[16:]
         
-        # Derive key from password
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=480000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        
         # Decrypt data
-        f = Fernet(key)
+        f = Fernet(self._password_key(password, salt))
         return f.decrypt(data)
         
     async def decrypt_state(self, encrypted_data: bytes) -> Dict:
@@ -444,7 +919,7 @@ class PGPStateEncryption:
             # Decrypt state
             decrypted_data = self.gpg.decrypt(
                 encrypted_data,
-                passphrase=None
+                passphrase=self._runtime_password
             )
             
             # Clear private key from scope
@@ -454,11 +929,17 @@ class PGPStateEncryption:
             
     async def cleanup(self):
         """Secure cleanup of keys and runtime password."""
-        if self.private_key:
-            self.gpg.delete_keys(self.private_key, True)
-            self.private_key = None
-        if self.public_key:
-            self.gpg.delete_keys(self.public_key)
+        # Wipe the wrapped private key from the secure arena
+        await self.memory_key_store.secure_delete("runtime_private_key")
+        # Wipe the cached derived key first so it never outlives the runtime
+        self._derived_key.zeroize()
+        self._kdf_salt = None
+        self.private_key = None
+        if self.key_fingerprint:
+            # Remove the runtime keypair from the keyring
+            self.gpg.delete_keys(self.key_fingerprint, True, passphrase=self._runtime_password)
+            self.gpg.delete_keys(self.key_fingerprint)
+            self.key_fingerprint = None
             self.public_key = None
         if self._runtime_password:
             self._runtime_password = None
@@ -466,8 +947,46 @@ class PGPStateEncryption:
 class SecureStateManager:
     """State manager with PGP encryption and verification."""
     
-    def __init__(self, pgp: PGPStateEncryption, progress: Optional[Progress] = None):
+    def __init__(
+        self,
+        pgp: PGPStateEncryption,
+        progress: Optional[Progress] = None,
+        config: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize the state manager.
+        
+        Args:
+            pgp: Runtime PGP encryption provider
+            progress: Optional Rich progress display
+            config: Optional ``state_security`` configuration section
+        """
         self.pgp = pgp
+        config = config or {}
+        
+        # "envelope": in-process AEAD with a runtime data key; "pgp": gpg per blob
+        self.encryption_mode = config.get("encryption", "envelope")
+        self.cipher_name = config.get("cipher", "aes-gcm")
+        if self.cipher_name not in ENVELOPE_CIPHERS:
+            raise SecurityException(f"Unsupported envelope cipher: {self.cipher_name}")
+        self._data_key = LockedKeySlot()
+        self._data_key_id: Optional[bytes] = None
+        # Disk and crypto work runs here instead of on the event loop
+        self.io = StateIO(config)
+        self.logger = logging.getLogger(__name__)
+        
+        # Write-behind: saves within this window are coalesced into one commit (seconds)
+        self.write_behind_window = config.get("write_behind_window", 0.05)
+        self._dirty: Dict[str, bytes] = {}
+        self._committing: Dict[str, bytes] = {}
+        self._commit_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"saves": 0, "coalesced": 0, "commits": 0}
+        
+        # "files": one encrypted file per state; "log": append-only segments
+        self.backend = config.get("backend", "files")
+        self._log_config = config.get("log", {})
+        self.log_store: Optional[LogStructuredStore] = None
         # Define all state directories
         self.state_dirs = {
             'state': Path("~/.dtm/state").expanduser(),
@@ -479,9 +998,10 @@ class SecureStateManager:
         for dir_path in self.state_dirs.values():
             dir_path.mkdir(parents=True, exist_ok=True)
             
+        self.backups = BackupCatalog(self.state_dirs['backups'], self.io, config.get("backup_retention", 5))
         self.verification = StateVerification(self)
         self.progress = progress
-        self.certificates = CertificateManager(self, progress)
+        self.certificates = CertificateManager(self, progress, config.get("cert_cache"))
         
     async def initialize(self):
         """Initialize state management system."""
@@ -491,6 +1011,13 @@ class SecureStateManager:
         try:
             # Clean up all state directories
             await self._cleanup_all_temp_files()
+            await self.backups.load()
+            # Fresh in-memory data key for envelope encryption
+            if self.encryption_mode == "envelope":
+                self._initialize_data_key()
+            if self.backend == "log":
+                self.log_store = LogStructuredStore(self.state_dirs['state'] / "log", self.io, self._log_config)
+                await self.log_store.open()
             # Initialize components
             await self.verification.load_hash_index()
             await self.certificates.initialize()
@@ -504,40 +1031,92 @@ class SecureStateManager:
             task = self.progress.add_task("Cleaning up temporary files...", total=None)
             
         try:
-            for dir_name, dir_path in self.state_dirs.items():
-                # Clean .tmp files
-                for temp_file in dir_path.glob("*.tmp"):
-                    try:
-                        temp_file.unlink()
-                    except Exception:
-                        pass
-                        
-                # Clean any orphaned backup files in state and certificates dirs
-                if dir_name != 'backups':  # Skip backup dir itself
-                    for backup_file in dir_path.glob("*.bak"):
-                        try:
-                            backup_file.unlink()
-                        except Exception:
-                            pass
+            await self.io.run(self._remove_temp_files)
         finally:
             if self.progress:
                 self.progress.update(task, completed=True)
                 
+    def _remove_temp_files(self):
+        """Remove leftover temp, orphaned backup and stale envelope key files (state I/O thread)."""
+        for dir_name, dir_path in self.state_dirs.items():
+            # Clean .tmp files
+            for temp_file in dir_path.glob("*.tmp"):
+                try:
+                    temp_file.unlink()
+                except Exception:
+                    pass
+                    
+            # Clean any orphaned backup files in state and certificates dirs
+            if dir_name != 'backups':  # Skip backup dir itself
+                for backup_file in dir_path.glob("*.bak"):
+                    try:
+                        backup_file.unlink()
+                    except Exception:
+                        pass
+
+        # Wrapped envelope key files left by earlier versions; nothing reads them
+        for key_file in self.state_dirs['state'].glob("envelope.*.key"):
+            try:
+                key_file.unlink()
+            except Exception:
+                pass
+                
+    def _initialize_data_key(self):
+        """
+        Generate the runtime data key.
+
+        The key is never written to disk: it lives in its locked slot and,
+        like the runtime PGP key, dies with the runtime.
+        """
+        self._data_key.store(os.urandom(32))
+        self._data_key_id = os.urandom(8)
+        
+    def _seal(self, plaintext: bytes) -> bytes:
+        """Encrypt a blob with the runtime data key."""
+        cipher_id, cipher = ENVELOPE_CIPHERS[self.cipher_name]
+        header = ENVELOPE_MAGIC + bytes([cipher_id]) + self._data_key_id
+        nonce = os.urandom(12)
+        return header + nonce + cipher(self._data_key.load()).encrypt(nonce, plaintext, header)
+        
+    def _open(self, blob: bytes) -> bytes:
+        """Decrypt a blob sealed with _seal."""
+        header_len = len(ENVELOPE_MAGIC) + 9
+        if len(blob) < header_len + 12 or not blob.startswith(ENVELOPE_MAGIC):
+            raise SecurityException("Not an envelope blob")
+        header, nonce, ciphertext = blob[:header_len], blob[header_len:header_len + 12], blob[header_len + 12:]
+        cipher = ENVELOPE_CIPHER_IDS.get(header[len(ENVELOPE_MAGIC)])
+        key_id = header[len(ENVELOPE_MAGIC) + 1:]
+        if cipher is None:
+            raise SecurityException("Unknown envelope cipher")
+        if key_id != self._data_key_id:
+            raise SecurityException(f"Envelope data key {key_id.hex()} is not available in this runtime")
+        try:
+            return cipher(self._data_key.load()).decrypt(nonce, ciphertext, header)
+        except InvalidTag:
+            raise SecurityException("Envelope blob failed authentication")
+        
     async def encrypt_state(self, state_data: Dict, skip_verification: bool = False) -> bytes:
         """
-        Encrypt state data using runtime public key.
+        Encrypt state data using the runtime data key (envelope mode) or runtime public key.
         
         Args:
             state_data: Dictionary containing state data to encrypt
             skip_verification: If True, skips state verification to prevent recursion
         """
+        return await self._encrypt_bytes(json.dumps(state_data).encode())
+        
+    async def _encrypt_bytes(self, state_bytes: bytes) -> bytes:
+        """Encrypt serialized state data."""
+        if self.encryption_mode == "envelope":
+            return await self.io.run(self._seal, state_bytes)
+            
         async with self.pgp.key_status:
             # Get public key for encryption
             public_key = await self.pgp.get_public_key()
             
             # Serialize and encrypt state
-            state_bytes = json.dumps(state_data).encode()
-            encrypted_state = self.pgp.gpg.encrypt(
+            encrypted_state = await self.io.run(
+                self.pgp.gpg.encrypt,
                 state_bytes,
                 recipients=[public_key],
                 armor=True,
@@ -547,18 +1126,23 @@ class SecureStateManager:
             return str(encrypted_state).encode()
             
     async def decrypt_state(self, encrypted_data: bytes) -> Dict:
-        """Decrypt state data using protected runtime private key."""
+        """Decrypt envelope or legacy PGP-per-blob state data."""
+        if encrypted_data.startswith(ENVELOPE_MAGIC):
+            return json.loads(await self.io.run(self._open, encrypted_data))
+            
+        # Legacy format: whole blob encrypted with gpg
         async with self.pgp.key_status:
             # Retrieve private key securely
-            encrypted_private_key = await self.memory_key_store.secure_retrieve(
+            encrypted_private_key = await self.pgp.memory_key_store.secure_retrieve(
                 key_id="runtime_private_key",
                 runtime_id=self.pgp.runtime_id
             )
             
             # Decrypt state
-            decrypted_data = self.pgp.gpg.decrypt(
+            decrypted_data = await self.io.run(
+                self.pgp.gpg.decrypt,
                 encrypted_data,
-                passphrase=None
+                passphrase=self.pgp._runtime_password
             )
             
             # Clear private key from scope
@@ -566,54 +1150,130 @@ class SecureStateManager:
             
             return json.loads(str(decrypted_data))
             
-    async def save_state(self, state_data: Dict, filename: str, skip_verification: bool = False):
-        """Save encrypted state to file with verification."""
-        if self.progress:
-            task = self.progress.add_task(f"Saving state: {filename}...", total=None)
-            
-        try:
-            # Update state verification if not skipped
-            if not skip_verification:
-                await self.verification.update_state_hash(filename, state_data)
+    async def save_state(
+        self,
+        state_data: Dict,
+        filename: str,
+        skip_verification: bool = False,
+        changed_paths: Optional[Iterable[Sequence[Any]]] = None
+    ):
+        """
+        Save encrypted state to file with verification.
+        
+        With write-behind enabled the state is only marked dirty here; it is
+        committed together with every other dirty state and the hash index once
+        the write-behind window elapses, or on flush().
+        
+        Args:
+            state_data: Dictionary containing state data to save
+            filename: State file name
+            skip_verification: If True, skips the hash index update
+            changed_paths: Optional paths mutated since the last save, letting the
+                hash index re-hash only those subtrees
+        """
+        self.stats["saves"] += 1
+        
+        # Update state verification if not skipped (marks the hash index dirty)
+        if not skip_verification:
+            await self.verification.update_state_hash(filename, state_data, changed_paths)
             
-            # Encrypt state data
-            encrypted_data = await self.encrypt_state(state_data, skip_verification=skip_verification)
+        # Snapshot now so later caller mutations don't leak into the commit
+        state_bytes = json.dumps(state_data).encode()
+        
+        if self.write_behind_window <= 0:
+            self._committing[filename] = state_bytes
+            try:
+                await self._commit({filename: state_bytes})
+            finally:
+                self._committing.pop(filename, None)
+            return
             
-            # Save with atomic write using random temp file name
-            temp_file = self.state_dirs['state'] / f"{filename}.{os.urandom(8).hex()}.tmp"
-            target_file = self.state_dirs['state'] / filename
+        if filename in self._dirty:
+            self.stats["coalesced"] += 1
+        self._dirty[filename] = state_bytes
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
             
-            # Write to temp file first
-            temp_file.write_bytes(encrypted_data)
+    async def _delayed_flush(self):
+        """Commit dirty states once the write-behind window elapses."""
+        await asyncio.sleep(self.write_behind_window)
+        try:
+            await self.flush()
+        except Exception as e:
+            self.logger.error(f"Write-behind commit failed, will retry on next flush: {str(e)}")
             
-            # Atomic rename with proper cleanup
-            if target_file.exists():
-                target_file.unlink()
-            temp_file.rename(target_file)
+    async def flush(self):
+        """Commit all dirty states and the hash index now."""
+        async with self._commit_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+            self._committing.update(dirty)
+            try:
+                await self._commit(dirty)
+            except Exception:
+                # Keep failed states dirty unless a newer version arrived meanwhile
+                for filename, state_bytes in dirty.items():
+                    self._dirty.setdefault(filename, state_bytes)
+                raise
+            finally:
+                for filename in dirty:
+                    self._committing.pop(filename, None)
+                    
+    async def _commit(self, states: Dict[str, bytes]):
+        """Encrypt and durably write a set of states and their backups."""
+        if self.progress:
+            task = self.progress.add_task(f"Saving state: {', '.join(states)}...", total=None)
             
-            # Create backup
-            await self._create_backup(filename, encrypted_data)
+        try:
+            if self.log_store:
+                # One append and one fsync for the whole commit
+                encrypted = await asyncio.gather(*(self._encrypt_bytes(b) for b in states.values()))
+                await self.log_store.put_many(dict(zip(states, encrypted)))
+                self.stats["commits"] += 1
+                return
+                
+            # Writes issued together share one group commit in StateIO
+            await asyncio.gather(*(
+                self._write_state(filename, state_bytes) for filename, state_bytes in states.items()
+            ))
             
-        except Exception as e:
-            # Clean up temp file on error
-            if 'temp_file' in locals() and temp_file.exists():
-                try:
-                    temp_file.unlink()
-                except Exception:
-                    pass
-            raise e
+            # One catalog write (and garbage sweep) per commit
+            await self.backups.save()
+            self.stats["commits"] += 1
             
         finally:
             if self.progress:
                 self.progress.update(task, completed=True)
                 
+    async def _write_state(self, filename: str, state_bytes: bytes):
+        """Encrypt one state and write it plus a timestamped backup."""
+        encrypted_data = await self._encrypt_bytes(state_bytes)
+        
+        # Durable atomic write (temp file, fsync, os.replace, directory fsync)
+        await self.io.write_atomic(self.state_dirs['state'] / filename, encrypted_data)
+        
+        # Create backup; identical state contents share one stored payload
+        await self.backups.add(filename, self.backup_digest(state_bytes), encrypted_data)
+        
+    def backup_digest(self, data: bytes) -> str:
+        """Keyed content digest used to deduplicate backups without exposing plaintext hashes."""
+        return hmac.new(self.pgp.runtime_id, data, hashlib.sha256).hexdigest()
+        
     async def load_state(self, filename: str) -> Optional[Dict]:
         """Load and verify state from file."""
-        file_path = self.state_dirs['state'] / filename
-        if not file_path.exists():
+        # Read-your-writes for states not yet committed to disk
+        pending = self._dirty.get(filename) or self._committing.get(filename)
+        if pending is not None:
+            return json.loads(pending)
+            
+        if self.log_store:
+            encrypted_data = await self.log_store.get(filename)
+        else:
+            encrypted_data = await self.io.read_bytes(self.state_dirs['state'] / filename)
+        if encrypted_data is None:
             return None
             
-        encrypted_data = file_path.read_bytes()
         state_data = await self.decrypt_state(encrypted_data)
         
         # Verify state integrity
@@ -626,91 +1286,49 @@ class SecureStateManager:
             
         return state_data
         
-    async def _create_backup(self, filename: str, encrypted_data: bytes):
-        """Create encrypted backup of state data."""
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        backup_path = self.state_dirs['backups'] / f"{filename}.{timestamp}.bak"
-        backup_path.write_bytes(encrypted_data)
-        
-        # Cleanup old backups for this specific file
-        await self._cleanup_file_backups(filename)
-        
     async def _restore_backup(self, filename: str) -> Optional[Dict]:
-        """Attempt to restore state from most recent backup."""
-        backup_files = sorted(
-            self.state_dirs['backups'].glob(f"{filename}.*.bak"),
-            reverse=True
-        )
-        
-        for backup_file in backup_files:
+        """Restore the newest backup that decrypts and verifies, checking candidates in parallel."""
+        candidates = self.backups.candidates(filename)
+        if not candidates:
+            return None
+            
+        async def try_backup(backup_file: Path) -> Optional[Dict]:
             try:
-                encrypted_data = backup_file.read_bytes()
+                encrypted_data = await self.io.read_bytes(backup_file)
+                if encrypted_data is None:
+                    return None
                 state_data = await self.decrypt_state(encrypted_data)
-                if await self.verification.verify_state(filename, state_data):
-                    return state_data
+                return state_data if self.verification.matches(filename, state_data) else None
             except Exception:
-                continue
+                return None
                 
-        return None
+        results = await asyncio.gather(*(try_backup(path) for path in candidates))
+        return next((state for state in results if state is not None), None)
         
-    async def _cleanup_file_backups(self, filename: str):
-        """Remove old backups for a specific file, keeping only the last 5."""
-        try:
-            backup_files = sorted(
-                self.state_dirs['backups'].glob(f"{filename}.*.bak"),
-                key=lambda x: x.stat().st_mtime,
-                reverse=True
-            )
-            
-            # Remove all but the last 5 backups
-            for old_backup in backup_files[5:]:
-                try:
-                    old_backup.unlink()
-                except Exception:
-                    continue
-        except Exception:
-            pass  # Don't fail if cleanup fails
-
     async def cleanup(self):
         """Clean up all state management resources."""
         if self.progress:
             task = self.progress.add_task("Cleaning up state management...", total=None)
             
         try:
+            # Drain write-behind states before anything is torn down
+            await self.flush()
+            if self._flush_task:
+                self._flush_task.cancel()
             await self._cleanup_all_temp_files()
             # Clean up certificates
             await self.certificates.cleanup()
-            # Keep only last 5 backups for each file
-            await self._cleanup_all_backups()
+            # Persist the backup catalog and drop unreferenced payloads
+            await self.backups.save()
+            if self.log_store:
+                await self.log_store.close()
         finally:
+            # Drain pending commits, then wipe the envelope data key
+            await self.io.close()
+            self._data_key.zeroize()
             if self.progress:
                 self.progress.update(task, completed=True)
                 
-    async def _cleanup_all_backups(self):
-        """Clean up old backups for all state files."""
-        try:
-            backup_pattern = "*.bak"
-            backup_files = {}
-            
-            # Group backup files by their base name
-            for backup_file in self.state_dirs['backups'].glob(backup_pattern):
-                base_name = backup_file.name.split('.')[0]
-                if base_name not in backup_files:
-                    backup_files[base_name] = []
-                backup_files[base_name].append(backup_file)
-            
-            # Keep only last 5 backups for each file
-            for base_name, files in backup_files.items():
-                sorted_files = sorted(files, key=lambda x: x.stat().st_mtime, reverse=True)
-                for old_backup in sorted_files[5:]:
-                    try:
-                        old_backup.unlink()
-                    except Exception:
-                        continue
-                        
-        except Exception:
-            pass  # Don't fail if cleanup fails
-
 class SecurityException(Exception):
     """Custom exception for security-related errors."""
     pass 
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Stream Parser Module
+Incremental JSON parser for streamed AI completions.
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+# Characters that can appear in a JSON number or literal (true/false/null)
+_LITERAL_CHARS = frozenset("-+.0123456789eEtruefalsn")
+
+
+class IncrementalJSONParser:
+    """
+    Parses a JSON object from text chunks as they arrive.
+
+    Every completed scalar value is reported as a ``(path, value)`` event, and the
+    partially built document is available through ``document`` at any time.
+    Text before the first ``{`` (e.g. a Markdown code fence) and after the closing
+    ``}`` is ignored.
+    """
+
+    def __init__(self):
+        self.document: Optional[dict] = None
+        self.done = False
+        # Each frame: [container, key or index, expecting]
+        self._stack: List[list] = []
+        self._string: Optional[List[str]] = None
+        self._escape = False
+        self._literal: Optional[List[str]] = None
+
+    def _path(self) -> Tuple[Any, ...]:
+        """Path of the value currently being parsed."""
+        return tuple(frame[1] for frame in self._stack)
+
+    def _store(self, value: Any):
+        """Place a completed value into the innermost container."""
+        frame = self._stack[-1]
+        container = frame[0]
+        if isinstance(container, dict):
+            container[frame[1]] = value
+        else:
+            container.append(value)
+        frame[2] = "comma"
+
+    def _open(self, container: Any):
+        """Start a new object or array."""
+        if self._stack:
+            self._store(container)
+        else:
+            self.document = container
+        key = None if isinstance(container, dict) else 0
+        expecting = "key" if isinstance(container, dict) else "value"
+        self._stack.append([container, key, expecting])
+
+    def _close(self):
+        """Finish the innermost container."""
+        self._stack.pop()
+        if not self._stack:
+            self.done = True
+
+    def _finish_scalar(self, value: Any, events: List[Tuple[Tuple[Any, ...], Any]]):
+        """Handle a completed string, number or literal."""
+        frame = self._stack[-1]
+        if frame[2] == "key":
+            frame[1] = value
+            frame[2] = "colon"
+            return
+        events.append((self._path(), value))
+        self._store(value)
+
+    def _finish_literal(self, events: List[Tuple[Tuple[Any, ...], Any]]):
+        """Decode a pending number or literal."""
+        raw = "".join(self._literal)
+        self._literal = None
+        self._finish_scalar(json.loads(raw), events)
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple[Any, ...], Any]]:
+        """
+        Feed a chunk of text into the parser.
+
+        Args:
+            chunk: Next piece of the streamed completion
+
+        Returns:
+            List of (path, value) events for scalars completed by this chunk
+        """
+        events: List[Tuple[Tuple[Any, ...], Any]] = []
+
+        for char in chunk:
+            if self.done:
+                break
+
+            if self._string is not None:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    value = json.loads('"' + "".join(self._string) + '"')
+                    self._string = None
+                    self._finish_scalar(value, events)
+                    continue
+                self._string.append(char)
+                continue
+
+            if self._literal is not None:
+                if char in _LITERAL_CHARS:
+                    self._literal.append(char)
+                    continue
+                self._finish_literal(events)
+
+            if not self._stack:
+                if char == "{":
+                    self._open({})
+                continue
+
+            frame = self._stack[-1]
+            if char.isspace():
+                continue
+            if char == '"':
+                self._string = []
+            elif char == ":":
+                frame[2] = "value"
+            elif char == ",":
+                if isinstance(frame[0], dict):
+                    frame[2] = "key"
+                else:
+                    frame[1] += 1
+                    frame[2] = "value"
+            elif char == "{":
+                self._open({})
+            elif char == "[":
+                self._open([])
+            elif char in "}]":
+                self._close()
+            elif char in _LITERAL_CHARS:
+                self._literal = [char]
+
+        return events
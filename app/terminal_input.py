@@ -0,0 +1,204 @@
+"""
+Terminal Input Module
+Event-driven keyboard input: reads stdin in cbreak mode from the event loop
+and decodes escape sequences into key names.
+"""
+
+import asyncio
+import codecs
+import logging
+import os
+import sys
+from typing import Callable, List, Optional, TextIO
+
+try:
+    import termios
+    import tty
+except ImportError:  # Windows
+    termios = None
+    tty = None
+
+# Escape sequences (after ESC) for keys the UI understands; both the CSI
+# ("[A") and the application cursor mode SS3 ("OA") forms are accepted
+ESCAPE_SEQUENCES = {
+    "[A": "up", "[B": "down", "[C": "right", "[D": "left",
+    "OA": "up", "OB": "down", "OC": "right", "OD": "left",
+    "[H": "home", "[F": "end", "OH": "home", "OF": "end",
+    "[1~": "home", "[4~": "end", "[3~": "delete",
+    "[5~": "pageup", "[6~": "pagedown", "[Z": "shift+tab"
+}
+
+CONTROL_KEYS = {
+    "\r": "enter", "\n": "enter",
+    "\x7f": "backspace", "\x08": "backspace",
+    "\t": "tab", " ": "space"
+}
+
+ESC = "\x1b"
+
+
+class KeyDecoder:
+    """Incrementally decodes terminal input into key names."""
+
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+
+    @property
+    def pending(self) -> bool:
+        """Whether a partial escape sequence is waiting for more input."""
+        return bool(self._buffer)
+
+    def feed(self, data: bytes) -> List[str]:
+        """
+        Decode newly read bytes.
+
+        Args:
+            data: Raw bytes from the terminal
+
+        Returns:
+            Key names ("up", "enter", "escape", ...) and printable characters
+        """
+        buffer = self._buffer + self._utf8.decode(data)
+        keys = []
+        i = 0
+        while i < len(buffer):
+            char = buffer[i]
+            if char != ESC:
+                if char in CONTROL_KEYS:
+                    keys.append(CONTROL_KEYS[char])
+                elif char.isprintable():
+                    keys.append(char)
+                i += 1
+                continue
+
+            if i + 1 == len(buffer):
+                break  # Lone ESC or the start of a sequence; wait for more
+            introducer = buffer[i + 1]
+            if introducer == "O":
+                end = i + 2
+            elif introducer == "[":
+                # CSI: parameter/intermediate bytes, then a final byte in @-~
+                end = i + 2
+                while end < len(buffer) and not "@" <= buffer[end] <= "~":
+                    end += 1
+            else:
+                # ESC followed by another key (or ESC ESC): a plain escape
+                keys.append("escape")
+                i += 1
+                continue
+
+            if end >= len(buffer):
+                break
+            key = ESCAPE_SEQUENCES.get(buffer[i + 1:end + 1])
+            if key:
+                keys.append(key)  # Unknown sequences are dropped
+            i = end + 1
+
+        self._buffer = buffer[i:]
+        return keys
+
+    def flush(self) -> List[str]:
+        """
+        Resolve a partial sequence that timed out.
+
+        A buffered ESC that no sequence followed was the escape key itself.
+
+        Returns:
+            Keys decoded from the buffered input
+        """
+        if not self._buffer:
+            return []
+        self._buffer = self._buffer[1:]
+        return ["escape"] + self.feed(b"")
+
+
+class TerminalInput:
+    """Dispatches key presses from a terminal as they arrive."""
+
+    def __init__(self, on_key: Callable[[str], None], stream: Optional[TextIO] = None, escape_timeout: float = 0.05):
+        """
+        Initialize the terminal reader.
+
+        Args:
+            on_key: Called with each decoded key name
+            stream: Terminal to read (defaults to stdin)
+            escape_timeout: Seconds to wait for the rest of an escape sequence
+        """
+        self.logger = logging.getLogger(__name__)
+        self.on_key = on_key
+        self.stream = stream or sys.stdin
+        self.escape_timeout = escape_timeout
+        self.decoder = KeyDecoder()
+        self.running = False
+        self._fd: Optional[int] = None
+        self._saved_attributes = None
+        self._escape_timer: Optional[asyncio.TimerHandle] = None
+
+    @staticmethod
+    def supported(stream: Optional[TextIO] = None) -> bool:
+        """Whether cbreak terminal input is available for the stream."""
+        stream = stream or sys.stdin
+        try:
+            return termios is not None and stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def start(self):
+        """Switch the terminal to cbreak mode and start dispatching keys."""
+        if self.running:
+            return
+
+        self._fd = self.stream.fileno()
+        self._saved_attributes = termios.tcgetattr(self._fd)
+        # No line buffering or echo; Ctrl+C still raises SIGINT
+        tty.setcbreak(self._fd)
+        asyncio.get_running_loop().add_reader(self._fd, self._on_readable)
+        self.running = True
+        self.logger.info("Terminal input started")
+
+    def stop(self):
+        """Stop dispatching keys and restore the terminal mode."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self._escape_timer:
+            self._escape_timer.cancel()
+            self._escape_timer = None
+        try:
+            asyncio.get_running_loop().remove_reader(self._fd)
+        except RuntimeError:
+            pass  # Event loop already closed
+        termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved_attributes)
+        self.logger.info("Terminal input stopped")
+
+    def _on_readable(self):
+        """Read and dispatch whatever input is available (event loop callback)."""
+        try:
+            data = os.read(self._fd, 1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        if not data:
+            self.logger.warning("Terminal input closed")
+            self.stop()
+            return
+
+        if self._escape_timer:
+            self._escape_timer.cancel()
+            self._escape_timer = None
+        self._dispatch(self.decoder.feed(data))
+        if self.decoder.pending:
+            self._escape_timer = asyncio.get_running_loop().call_later(self.escape_timeout, self._on_escape_timeout)
+
+    def _on_escape_timeout(self):
+        """Emit a lone ESC once no escape sequence followed it."""
+        self._escape_timer = None
+        self._dispatch(self.decoder.flush())
+
+    def _dispatch(self, keys: List[str]):
+        for key in keys:
+            try:
+                self.on_key(key)
+            except Exception as e:
+                self.logger.error(f"Error handling key {key!r}: {str(e)}", exc_info=True)
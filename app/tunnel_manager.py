@@ -5,11 +5,19 @@ Handles creation and management of secure tunnels for applications.
 
 import asyncio
 import logging
+import os
 import ssl
-from typing import Dict, Optional, Tuple
-from dataclasses import dataclass
+import time
+from typing import Any, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
+from app.cert_pool import CertificateMaterial, CertificatePool
+from app.tunnel_metrics import TunnelCounters
+
+CERT_DIR = Path("config/certificates")
+# Private key and certificate in one file, so a single rename swaps the pair
+CERT_PAIR_PATH = CERT_DIR / "tunnel.pem"
 
 @dataclass
 class TunnelInfo:
@@ -20,21 +28,49 @@ class TunnelInfo:
     remote_host: str
     created_at: datetime
     ssl_context: ssl.SSLContext
+    counters: TunnelCounters = field(default_factory=TunnelCounters)
 
 class TunnelManager:
     """Manages secure tunnels for applications."""
 
-    def __init__(self):
-        """Initialize the Tunnel Manager."""
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the Tunnel Manager.
+
+        Args:
+            config: Optional application configuration dictionary
+        """
         self.logger = logging.getLogger(__name__)
         self.tunnels: Dict[int, TunnelInfo] = {}
         self.servers: Dict[int, asyncio.Server] = {}
         self._ssl_context: Optional[ssl.SSLContext] = None
+        cert_config = (config or {}).get("cert_pool", {})
+        self.cert_pool = CertificatePool(cert_config)
+        self.last_cert_rotation: Optional[datetime] = None
+        # Seconds between scheduled certificate rotations; 0 disables them
+        self.cert_rotation_interval = cert_config.get("rotation_interval", 0)
+        self._cert_rotation_task: Optional[asyncio.Task] = None
+        # Bumped whenever tunnels are created or removed
+        self.version = 0
+        
+        # Throughput sampling; metrics_version is bumped when sampled values change
+        metrics_config = (config or {}).get("tunnel_metrics", {})
+        self.sample_interval = metrics_config.get("sample_interval", 1.0)
+        self.history_size = metrics_config.get("history_size", 60)
+        self.metrics_version = 0
+        self._sample_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Initialize the tunnel manager and SSL context."""
         try:
-            self._ssl_context = self._create_ssl_context()
+            if self.cert_rotation_interval:
+                # Pre-generation only pays off when certificates are rotated;
+                # otherwise the single install generates one pair directly
+                await self.cert_pool.start()
+            self._ssl_context = await self._create_ssl_context()
+            self._sample_task = asyncio.create_task(self._sample_loop())
+            if self.cert_rotation_interval:
+                self._cert_rotation_task = asyncio.create_task(self._cert_rotation_loop())
             self.logger.info("Tunnel Manager initialized successfully")
         except Exception as e:
             self.logger.error(f"Failed to initialize Tunnel Manager: {str(e)}", exc_info=True)
@@ -44,20 +80,24 @@ class TunnelManager:
         """Shutdown all active tunnels and cleanup resources."""
         for pid in list(self.tunnels.keys()):
             await self.remove_tunnel(pid)
+        for task in (self._sample_task, self._cert_rotation_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.cert_pool.stop()
         self.logger.info("Tunnel Manager shutdown complete")
 
-    def _create_ssl_context(self) -> ssl.SSLContext:
+    async def _create_ssl_context(self) -> ssl.SSLContext:
         """Create SSL context for secure tunnels."""
         try:
             context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
-            cert_path = Path("config/certificates/cert.pem")
-            key_path = Path("config/certificates/key.pem")
-
-            # Create self-signed certificate if not exists
-            if not cert_path.exists() or not key_path.exists():
-                self._generate_self_signed_cert()
-
-            context.load_cert_chain(cert_path, key_path)
+            if not self._load_certificate(context):
+                # Install a pre-generated self-signed certificate if none is usable
+                await self._install_certificate(await self.cert_pool.acquire())
+                context.load_cert_chain(CERT_PAIR_PATH)
             context.check_hostname = False
             context.verify_mode = ssl.CERT_NONE  # For self-signed certificates
             return context
@@ -65,53 +105,79 @@ class TunnelManager:
             self.logger.error(f"Failed to create SSL context: {str(e)}", exc_info=True)
             raise
 
-    def _generate_self_signed_cert(self):
-        """Generate self-signed certificate for development use."""
-        from cryptography import x509
-        from cryptography.x509.oid import NameOID
-        from cryptography.hazmat.primitives import hashes
-        from cryptography.hazmat.primitives.asymmetric import rsa
-        from cryptography.hazmat.primitives import serialization
-        import datetime
-
-        # Generate key
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048
-        )
+    def _load_certificate(self, context: ssl.SSLContext) -> bool:
+        """
+        Load the installed certificate into a context.
+
+        Falls back to the separate cert.pem/key.pem files of earlier
+        versions. A missing, unreadable or mismatched pair is reported as
+        unusable so a fresh one gets installed.
 
-        # Generate certificate
-        subject = issuer = x509.Name([
-            x509.NameAttribute(NameOID.COMMON_NAME, u"localhost")
-        ])
-
-        cert = x509.CertificateBuilder().subject_name(
-            subject
-        ).issuer_name(
-            issuer
-        ).public_key(
-            private_key.public_key()
-        ).serial_number(
-            x509.random_serial_number()
-        ).not_valid_before(
-            datetime.datetime.utcnow()
-        ).not_valid_after(
-            datetime.datetime.utcnow() + datetime.timedelta(days=365)
-        ).sign(private_key, hashes.SHA256())
-
-        # Save certificate and private key
-        cert_path = Path("config/certificates")
-        cert_path.mkdir(parents=True, exist_ok=True)
-
-        with open(cert_path / "cert.pem", "wb") as f:
-            f.write(cert.public_bytes(serialization.Encoding.PEM))
-
-        with open(cert_path / "key.pem", "wb") as f:
-            f.write(private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
-            ))
+        Returns:
+            Whether a certificate was loaded
+        """
+        legacy = (CERT_DIR / "cert.pem", CERT_DIR / "key.pem")
+        if CERT_PAIR_PATH.exists():
+            files = (CERT_PAIR_PATH, None)
+        elif all(path.exists() for path in legacy):
+            files = legacy
+        else:
+            return False
+        try:
+            context.load_cert_chain(*files)
+            return True
+        except (ssl.SSLError, OSError) as e:
+            self.logger.warning(f"Installed tunnel certificate is unusable, replacing it: {str(e)}")
+            return False
+
+    async def _install_certificate(self, material: CertificateMaterial):
+        """Atomically replace the installed key/certificate pair."""
+        def write():
+            CERT_DIR.mkdir(parents=True, exist_ok=True)
+            temp_path = CERT_PAIR_PATH.with_name(CERT_PAIR_PATH.name + ".tmp")
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(material.key_pem + material.cert_pem)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, CERT_PAIR_PATH)
+            dir_fd = os.open(CERT_DIR, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+        await asyncio.to_thread(write)
+
+    async def rotate_certificate(self):
+        """
+        Rotate the tunnel certificate using a pre-generated key pair.
+
+        The shared SSL context is reloaded in place, so running tunnel servers
+        present the new certificate on their next handshake.
+        """
+        material = await self.cert_pool.acquire()
+        await self._install_certificate(material)
+        if self._ssl_context:
+            self._ssl_context.load_cert_chain(CERT_PAIR_PATH)
+        self.last_cert_rotation = datetime.now()
+        self.logger.info(f"Rotated tunnel certificate ({material.algorithm}), pool: {self.cert_pool.metrics()}")
+
+    async def _cert_rotation_loop(self):
+        """Rotate the tunnel certificate every cert_rotation_interval seconds."""
+        while True:
+            try:
+                # Measured from the installed certificate, so restarts keep the schedule
+                installed_at = CERT_PAIR_PATH.stat().st_mtime if CERT_PAIR_PATH.exists() else 0
+                delay = installed_at + self.cert_rotation_interval - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self.rotate_certificate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Scheduled certificate rotation failed: {str(e)}")
+                await asyncio.sleep(60)
 
     async def create_tunnel(self, pid: int, local_port: int, remote_host: str, remote_port: int) -> TunnelInfo:
         """
@@ -135,7 +201,8 @@ class TunnelManager:
             remote_port=remote_port,
             remote_host=remote_host,
             created_at=datetime.now(),
-            ssl_context=self._ssl_context
+            ssl_context=self._ssl_context,
+            counters=TunnelCounters(self.history_size)
         )
 
         try:
@@ -148,6 +215,7 @@ class TunnelManager:
 
             self.tunnels[pid] = tunnel_info
             self.servers[pid] = server
+            self.version += 1
             self.logger.info(f"Created tunnel for PID {pid} on port {local_port}")
             return tunnel_info
 
@@ -169,10 +237,32 @@ class TunnelManager:
 
         if pid in self.tunnels:
             tunnel = self.tunnels.pop(pid)
+            self.version += 1
             self.logger.info(f"Removed tunnel for PID {pid} from port {tunnel.local_port}")
 
+    async def _sample_loop(self):
+        """Sample every tunnel's counters into its throughput history."""
+        last_sample = time.monotonic()
+        while True:
+            try:
+                await asyncio.sleep(self.sample_interval)
+                now = time.monotonic()
+                changed = False
+                for tunnel in list(self.tunnels.values()):
+                    changed |= tunnel.counters.sample(now - last_sample)
+                last_sample = now
+                if changed:
+                    self.metrics_version += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error sampling tunnel metrics: {str(e)}")
+
     async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, tunnel: TunnelInfo):
         """Handle incoming connections to the tunnel."""
+        counters = tunnel.counters
+        counters.connections_total += 1
+        counters.connections_active += 1
         try:
             remote_reader, remote_writer = await asyncio.open_connection(
                 tunnel.remote_host,
@@ -182,23 +272,40 @@ class TunnelManager:
 
             # Create bidirectional proxy
             await asyncio.gather(
-                self._proxy_data(reader, remote_writer, "client -> remote"),
-                self._proxy_data(remote_reader, writer, "remote -> client")
+                self._proxy_data(reader, remote_writer, "client -> remote", counters, True),
+                self._proxy_data(remote_reader, writer, "remote -> client", counters, False)
             )
 
+        except OSError as e:
+            # Refused, reset or TLS failures are routine under connection churn; no traceback
+            self.logger.warning(
+                f"Tunnel connection to {tunnel.remote_host}:{tunnel.remote_port} failed: {str(e)}"
+            )
         except Exception as e:
             self.logger.error(f"Error in tunnel connection: {str(e)}", exc_info=True)
         finally:
+            counters.connections_active -= 1
             writer.close()
             await writer.wait_closed()
 
-    async def _proxy_data(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, direction: str):
-        """Proxy data between connections."""
+    async def _proxy_data(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        direction: str,
+        counters: TunnelCounters,
+        outbound: bool
+    ):
+        """Proxy data between connections, counting relayed bytes."""
         try:
             while True:
                 data = await reader.read(8192)
                 if not data:
                     break
+                if outbound:
+                    counters.bytes_sent += len(data)
+                else:
+                    counters.bytes_received += len(data)
                 writer.write(data)
                 await writer.drain()
         except Exception as e:
@@ -0,0 +1,112 @@
+"""
+Tunnel Metrics Module
+Per-tunnel byte and connection counters, sampled into fixed-size throughput
+histories for display.
+"""
+
+from typing import List, Sequence
+
+SPARK_BLOCKS = "▁▂▃▄▅▆▇█"
+
+
+class RingBuffer:
+    """Fixed-size buffer of the most recent samples."""
+
+    __slots__ = ("_values", "_next", "_count")
+
+    def __init__(self, size: int):
+        self._values = [0.0] * size
+        self._next = 0
+        self._count = 0
+
+    def append(self, value: float):
+        """Store a sample, overwriting the oldest one once full."""
+        self._values[self._next] = value
+        self._next = (self._next + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def values(self) -> List[float]:
+        """Samples from oldest to newest."""
+        if self._count < len(self._values):
+            return self._values[:self._count]
+        return self._values[self._next:] + self._values[:self._next]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class TunnelCounters:
+    """
+    Traffic counters for one tunnel.
+
+    The relay path only increments plain integer attributes; all derived
+    values are computed when the counters are sampled.
+    """
+
+    __slots__ = (
+        "bytes_sent", "bytes_received", "connections_total", "connections_active",
+        "rate", "history", "_last_total", "_last_active"
+    )
+
+    def __init__(self, history_size: int = 60):
+        """
+        Initialize the counters.
+
+        Args:
+            history_size: Number of throughput samples kept
+        """
+        self.bytes_sent = 0  # client -> remote
+        self.bytes_received = 0  # remote -> client
+        self.connections_total = 0
+        self.connections_active = 0
+        self.rate = 0.0  # bytes/s over the last sample interval
+        self.history = RingBuffer(history_size)
+        self._last_total = 0
+        self._last_active = 0
+
+    def sample(self, elapsed: float) -> bool:
+        """
+        Record the throughput since the previous sample.
+
+        Args:
+            elapsed: Seconds since the previous sample
+
+        Returns:
+            Whether the displayed values changed
+        """
+        total = self.bytes_sent + self.bytes_received
+        rate = (total - self._last_total) / elapsed if elapsed > 0 else 0.0
+        changed = rate != self.rate or self.connections_active != self._last_active
+        self._last_total = total
+        self._last_active = self.connections_active
+        self.rate = rate
+        self.history.append(rate)
+        return changed
+
+
+def sparkline(values: Sequence[float], width: int) -> str:
+    """
+    Render the last samples as a block-character sparkline.
+
+    Args:
+        values: Samples, oldest first
+        width: Number of characters (most recent samples are kept)
+
+    Returns:
+        Sparkline scaled to the largest visible sample
+    """
+    values = values[-width:]
+    peak = max(values, default=0)
+    if peak <= 0:
+        return SPARK_BLOCKS[0] * len(values)
+    top = len(SPARK_BLOCKS) - 1
+    return "".join(SPARK_BLOCKS[round(value / peak * top)] for value in values)
+
+
+def format_rate(rate: float) -> str:
+    """Human-readable bytes per second."""
+    for unit in ("B/s", "KB/s", "MB/s"):
+        if rate < 1024:
+            return f"{rate:.0f} {unit}" if unit == "B/s" else f"{rate:.1f} {unit}"
+        rate /= 1024
+    return f"{rate:.1f} GB/s"
@@ -0,0 +1,318 @@
+"""
+UI Index Module
+Incrementally maintained indexes over tracked applications, so the UI can
+page, group, look up and filter processes without scanning every entry per frame.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Any, Collection, Dict, Iterable, Iterator, List, Optional, Set
+from app.discovery import ApplicationInfo
+
+# Name substrings of at least this length are answered from the trigram index
+TRIGRAM = 3
+TUNNEL_STATUSES = {"active": True, "tunneled": True, "inactive": False}
+
+
+def trigrams(text: str) -> Set[str]:
+    """All substrings of length TRIGRAM."""
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+def analysis_risk(analysis: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Lower-cased risk level of an analysis, if it has one."""
+    if not analysis:
+        return None
+    risk = analysis.get("recommendations", {}).get("risk_level")
+    return risk.lower() if isinstance(risk, str) else None
+
+
+@dataclass
+class AppFilter:
+    """
+    Parsed filter bar query.
+
+    Space separated terms are combined with AND:
+    ``^pre`` (name prefix), ``port:8080`` or ``8080`` (local port),
+    ``status:active|inactive`` (tunnel status), ``risk:high`` (AI risk level);
+    anything else matches a name substring. Matching is case-insensitive.
+    """
+    substrings: List[str] = field(default_factory=list)
+    prefixes: List[str] = field(default_factory=list)
+    ports: Set[int] = field(default_factory=set)
+    risks: Set[str] = field(default_factory=set)
+    tunneled: Optional[bool] = None
+
+    @classmethod
+    def parse(cls, query: str) -> "AppFilter":
+        """Parse a filter bar query; unknown ``key:`` terms match as substrings."""
+        parsed = cls()
+        for term in query.lower().split():
+            key, _, value = term.partition(":")
+            if term.isdigit():
+                parsed.ports.add(int(term))
+            elif key == "port" and value.isdigit():
+                parsed.ports.add(int(value))
+            elif key == "status" and value in TUNNEL_STATUSES:
+                parsed.tunneled = TUNNEL_STATUSES[value]
+            elif key == "risk" and value:
+                parsed.risks.add(value)
+            elif term.startswith("^") and len(term) > 1:
+                parsed.prefixes.append(term[1:])
+            else:
+                parsed.substrings.append(term)
+        return parsed
+
+    def __bool__(self) -> bool:
+        return bool(self.substrings or self.prefixes or self.ports or self.risks or self.tunneled is not None)
+
+
+class SortedIndex:
+    """Sorted, duplicate-free sequence of keys kept in order with bisect."""
+
+    def __init__(self, keys: Iterable[Any] = ()):
+        # Sets and dicts are already duplicate-free
+        self._keys: List[Any] = sorted(keys if isinstance(keys, (set, frozenset, dict)) else set(keys))
+
+    def add(self, key: Any):
+        """Insert a key, keeping the sequence sorted."""
+        position = bisect_left(self._keys, key)
+        if position == len(self._keys) or self._keys[position] != key:
+            self._keys.insert(position, key)
+
+    def discard(self, key: Any):
+        """Remove a key if present."""
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def page(self, start: int, count: int) -> List[Any]:
+        """Keys at positions [start, start + count)."""
+        return self._keys[start:start + count]
+
+    def position(self, key: Any) -> int:
+        """Position at which key is (or would be) stored."""
+        return bisect_left(self._keys, key)
+
+    def __contains__(self, key: Any) -> bool:
+        position = bisect_left(self._keys, key)
+        return position < len(self._keys) and self._keys[position] == key
+
+    def __getitem__(self, position: int) -> Any:
+        return self._keys[position]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._keys)
+
+
+class AppIndex:
+    """Indexes over the UI's applications, updated from discovery deltas."""
+
+    def __init__(self):
+        # All tracked PIDs, in display order
+        self.by_pid = SortedIndex()
+        # Application name -> PIDs running it
+        self.pids_by_name: Dict[str, Set[int]] = {}
+        # Names with at least one analyzed, tracked PID, and those PIDs
+        self.analyzed_names = SortedIndex()
+        self.analyzed_by_name: Dict[str, Set[int]] = {}
+        # Filter indexes: lower-cased names (sorted for prefixes, by trigram
+        # for substrings), local ports and AI risk levels
+        self.pids_by_key: Dict[str, Set[int]] = {}
+        self.keys = SortedIndex()
+        self.keys_by_trigram: Dict[str, Set[str]] = {}
+        self.pids_by_port: Dict[int, Set[int]] = {}
+        self.pids_by_risk: Dict[str, Set[int]] = {}
+        self.risk_by_pid: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.by_pid)
+
+    def add_app(self, app: ApplicationInfo, analysis: Optional[Dict[str, Any]] = None):
+        """
+        Index a newly tracked application.
+
+        Args:
+            app: The application
+            analysis: AI analysis stored for its PID, if any
+        """
+        self.by_pid.add(app.pid)
+        self.pids_by_name.setdefault(app.name, set()).add(app.pid)
+        self.pids_by_port.setdefault(app.local_port, set()).add(app.pid)
+
+        key = app.name.lower()
+        if key not in self.pids_by_key:
+            self.pids_by_key[key] = set()
+            self.keys.add(key)
+            for gram in trigrams(key):
+                self.keys_by_trigram.setdefault(gram, set()).add(key)
+        self.pids_by_key[key].add(app.pid)
+
+        if analysis is not None:
+            self.add_analysis(app, analysis)
+
+    def remove_app(self, app: ApplicationInfo):
+        """Drop an application that is no longer tracked."""
+        self.by_pid.discard(app.pid)
+        self._discard(self.pids_by_name, app.name, app.pid)
+        self._discard(self.pids_by_port, app.local_port, app.pid)
+        if self._discard(self.analyzed_by_name, app.name, app.pid):
+            self.analyzed_names.discard(app.name)
+        risk = self.risk_by_pid.pop(app.pid, None)
+        if risk is not None:
+            self._discard(self.pids_by_risk, risk, app.pid)
+
+        key = app.name.lower()
+        if self._discard(self.pids_by_key, key, app.pid):
+            self.keys.discard(key)
+            for gram in trigrams(key):
+                self._discard(self.keys_by_trigram, gram, key)
+
+    def add_analysis(self, app: Optional[ApplicationInfo], analysis: Optional[Dict[str, Any]] = None):
+        """
+        Record that a tracked application has an analysis.
+
+        Args:
+            app: The analyzed application (ignored if None or not tracked)
+            analysis: The analysis, used for the risk level index
+        """
+        if app is None or app.pid not in self.by_pid:
+            return
+        pids = self.analyzed_by_name.setdefault(app.name, set())
+        if not pids:
+            self.analyzed_names.add(app.name)
+        pids.add(app.pid)
+
+        risk = analysis_risk(analysis)
+        previous = self.risk_by_pid.get(app.pid)
+        if risk != previous:
+            if previous is not None:
+                self._discard(self.pids_by_risk, previous, app.pid)
+            if risk is not None:
+                self.risk_by_pid[app.pid] = risk
+                self.pids_by_risk.setdefault(risk, set()).add(app.pid)
+            else:
+                del self.risk_by_pid[app.pid]
+
+    def apply_changes(
+        self,
+        added: List[ApplicationInfo],
+        removed: List[ApplicationInfo],
+        analyses: Optional[Dict[int, Any]] = None
+    ):
+        """
+        Apply an application discovery delta.
+
+        Args:
+            added: Newly discovered applications
+            removed: Applications that went away
+            analyses: AI analyses by PID, for added applications
+        """
+        analyses = analyses or {}
+        for app in removed:
+            self.remove_app(app)
+        for app in added:
+            self.add_app(app, analyses.get(app.pid))
+
+    def related_pids(self, name: str) -> List[int]:
+        """PIDs running an application, in ascending order."""
+        return sorted(self.pids_by_name.get(name, ()))
+
+    def rebuild(self, apps: Dict[int, ApplicationInfo], analyses: Dict[int, Any]):
+        """
+        Rebuild every index from scratch.
+
+        Args:
+            apps: Tracked applications by PID
+            analyses: AI analyses by PID
+        """
+        self.__init__()
+        self.by_pid = SortedIndex(apps)
+        for pid, app in apps.items():
+            self.pids_by_name.setdefault(app.name, set()).add(pid)
+            self.pids_by_port.setdefault(app.local_port, set()).add(pid)
+            self.pids_by_key.setdefault(app.name.lower(), set()).add(pid)
+            if pid in analyses:
+                self.analyzed_by_name.setdefault(app.name, set()).add(pid)
+                risk = analysis_risk(analyses[pid])
+                if risk is not None:
+                    self.risk_by_pid[pid] = risk
+                    self.pids_by_risk.setdefault(risk, set()).add(pid)
+        self.analyzed_names = SortedIndex(self.analyzed_by_name)
+        self.keys = SortedIndex(self.pids_by_key)
+        for key in self.pids_by_key:
+            for gram in trigrams(key):
+                self.keys_by_trigram.setdefault(gram, set()).add(key)
+
+    def search(self, app_filter: AppFilter, tunneled: Collection[int] = ()) -> SortedIndex:
+        """
+        Find the tracked PIDs matching a filter.
+
+        Args:
+            app_filter: Parsed filter bar query
+            tunneled: PIDs that currently have a tunnel
+
+        Returns:
+            Matching PIDs in display order
+        """
+        candidates: List[Set[int]] = []
+        for prefix in app_filter.prefixes:
+            candidates.append(self._pids_for_keys(self._keys_with_prefix(prefix)))
+        for substring in app_filter.substrings:
+            candidates.append(self._pids_for_keys(self._keys_containing(substring)))
+        if app_filter.ports:
+            candidates.append(set().union(*(self.pids_by_port.get(port, ()) for port in app_filter.ports)))
+        if app_filter.risks:
+            candidates.append(set().union(*(self.pids_by_risk.get(risk, ()) for risk in app_filter.risks)))
+
+        if candidates:
+            # Intersect starting from the most selective term
+            candidates.sort(key=len)
+            matches = candidates[0]
+            for pids in candidates[1:]:
+                matches = matches & pids
+        else:
+            matches = set(self.by_pid)
+
+        if app_filter.tunneled is not None:
+            matches = {pid for pid in matches if (pid in tunneled) == app_filter.tunneled}
+        return SortedIndex(matches)
+
+    def _keys_with_prefix(self, prefix: str) -> List[str]:
+        """Lower-cased names starting with prefix (range scan of the sorted keys)."""
+        start = self.keys.position(prefix)
+        end = self.keys.position(prefix + "\U0010ffff")
+        return self.keys.page(start, end - start)
+
+    def _keys_containing(self, substring: str) -> Iterable[str]:
+        """Lower-cased names containing substring."""
+        if len(substring) < TRIGRAM:
+            return [key for key in self.keys if substring in key]
+        # Names holding every trigram of the substring, rarest trigram first
+        grams = sorted((self.keys_by_trigram.get(gram, set()) for gram in trigrams(substring)), key=len)
+        keys = set(grams[0])
+        for gram_keys in grams[1:]:
+            keys &= gram_keys
+        if len(substring) == TRIGRAM:
+            return keys
+        # Trigrams can match out of order; confirm the whole substring
+        return [key for key in keys if substring in key]
+
+    def _pids_for_keys(self, keys: Iterable[str]) -> Set[int]:
+        """Union of the PIDs running any of the given lower-cased names."""
+        return set().union(*map(self.pids_by_key.__getitem__, keys))
+
+    @staticmethod
+    def _discard(groups: Dict[Any, Set[Any]], key: Any, member: Any) -> bool:
+        """Remove member from a group; returns True if the group became empty."""
+        members = groups.get(key)
+        if members is None:
+            return False
+        members.discard(member)
+        if not members:
+            del groups[key]
+            return True
+        return False
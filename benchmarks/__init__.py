@@ -0,0 +1,3 @@
+"""
+Dynamic Tunnel Manager (DTM) - Benchmarks and load-test tooling
+"""
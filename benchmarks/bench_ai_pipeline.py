@@ -0,0 +1,156 @@
+"""
+AI Pipeline Benchmark
+Drives AIAnalyzer.analyze_application at a target concurrency against the local
+mock OpenRouter server (or any compatible endpoint) and reports throughput,
+latency percentiles and retry/fallback counters.
+
+Examples:
+    python -m benchmarks.bench_ai_pipeline --requests 500 --concurrency 50
+    python -m benchmarks.bench_ai_pipeline --latency lognormal:1.0:0.8 \\
+        --model-latency anthropic/claude-2=constant:0.4 --burst-every 10 --burst-length 1
+    python -m benchmarks.bench_ai_pipeline --base-url http://127.0.0.1:8765/api/v1 --stream
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from app.ai_analysis import AIAnalyzer
+from app.discovery import ApplicationInfo
+from benchmarks.mock_openrouter import MockOpenRouterServer, add_behavior_arguments, behavior_from_args
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / "config" / "config.json"
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of a sample list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _make_app(index: int) -> ApplicationInfo:
+    """Synthetic application that always escalates past the local rules."""
+    now = datetime.now()
+    app = ApplicationInfo(
+        pid=10000 + index,
+        name=f"bench-app-{index % 50}",
+        local_port=20000 + index % 1000,
+        remote_host=f"203.0.113.{index % 250 + 1}",
+        remote_port=8080,
+        created_at=now,
+        last_seen=now,
+        local_host="0.0.0.0"
+    )
+    app.dtm_state = {"is_tunneled": False, "tunnel_port": None, "auto_tunnel": True, "last_rotation": None}
+    return app
+
+
+def _build_config(args: argparse.Namespace, base_url: str) -> Dict:
+    """Load config.json and point it at the benchmark endpoint."""
+    config = copy.deepcopy(json.loads(CONFIG_PATH.read_text()))
+    config["openrouter"]["base_url"] = base_url
+    config["openrouter"]["api_key"] = "bench"
+    config["ai_analysis"]["stream"] = args.stream
+    config["ai_analysis"]["max_retries"] = args.max_retries
+    config["ai_analysis"].setdefault("local_rules", {})["enabled"] = False
+    if args.hedge_delay is not None:
+        config["ai_analysis"].setdefault("routing", {})["hedge_delay"] = args.hedge_delay
+    return config
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict:
+    """Run the benchmark and return the collected metrics."""
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = MockOpenRouterServer(behavior_from_args(args))
+        await server.start()
+        base_url = server.base_url
+
+    analyzer = AIAnalyzer(_build_config(args, base_url))
+    await analyzer.initialize()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            analysis = await analyzer.analyze_application(_make_app(index))
+            latencies.append(time.perf_counter() - started)
+            if analysis.get("error") or analysis["recommendations"].get("risk_level") == "unknown":
+                failures += 1
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await analyzer.shutdown()
+        if server:
+            await server.stop()
+
+    metrics = analyzer.metrics()
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(args.requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        "failed_analyses": failures,
+        "retries": metrics["retries"],
+        "fallbacks": metrics["fallbacks"],
+        "hedged": metrics["hedged"],
+        "hedge_wins": metrics["hedge_wins"],
+        "routing": analyzer.router.snapshot()["models"],
+        "server": server.stats if server else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the AIAnalyzer pipeline")
+    parser.add_argument("--requests", type=int, default=200, help="Total analyses to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent analyses in flight")
+    parser.add_argument("--base-url", help="Use an external endpoint instead of the built-in mock")
+    parser.add_argument("--stream", action="store_true", help="Use streaming (SSE) completions")
+    parser.add_argument("--max-retries", type=int, default=2, help="Retries per model on 429/5xx")
+    parser.add_argument("--hedge-delay", type=float, help="Override the default hedge delay in seconds")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    add_behavior_arguments(parser)
+    parser.add_argument("--verbose", action="store_true", help="Show analyzer warnings")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+    results = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Requests:     {results['requests']} @ concurrency {results['concurrency']}")
+    print(f"Throughput:   {results['requests_per_s']} req/s ({results['elapsed_s']} s)")
+    print(f"Latency:      p50 {results['p50_ms']} ms | p99 {results['p99_ms']} ms | mean {results['mean_ms']} ms")
+    print(f"Failures:     {results['failed_analyses']}")
+    print(f"Retries:      {results['retries']}")
+    print(f"Fallbacks:    {results['fallbacks']} (hedged: {results['hedged']}, hedge wins: {results['hedge_wins']})")
+    for model, stats in results["routing"].items():
+        print(f"  {model}: p50 {stats['p50']} s, p95 {stats['p95']} s, "
+              f"success {stats['success_rate']}, samples {stats['samples']}")
+    if results["server"]:
+        print(f"Server:       {results['server']}")
+
+
+if __name__ == "__main__":
+    main()
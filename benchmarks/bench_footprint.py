@@ -0,0 +1,105 @@
+"""
+Footprint Benchmark
+Compares the resident memory and CPU use of headless mode against the
+terminal UI mode by running main.py both ways and sampling the processes.
+
+The UI mode runs on a pseudo-terminal whose output is drained and discarded.
+Both runs use a throwaway working directory with a copy of config/, so no
+logs, sockets or certificates are written to the checkout.
+
+Example:
+    python -m benchmarks.bench_footprint --warmup 5 --duration 20
+"""
+
+import argparse
+import fcntl
+import os
+import pty
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import termios
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _drain(fd: int):
+    """Discard terminal output so the UI never blocks on a full pty."""
+    try:
+        while os.read(fd, 65536):
+            pass
+    except OSError:
+        pass
+
+
+def _measure(headless: bool, warmup: float, duration: float) -> Dict[str, float]:
+    """Run main.py in one mode and sample its footprint."""
+    with tempfile.TemporaryDirectory(prefix="dtm-footprint-") as workdir:
+        shutil.copytree(ROOT / "config", Path(workdir) / "config")
+        command = [sys.executable, str(ROOT / "main.py")]
+        master = None
+        if headless:
+            command.append("--headless")
+            process = subprocess.Popen(command, cwd=workdir, stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            master, slave = pty.openpty()
+            fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", 40, 160, 0, 0))
+            process = subprocess.Popen(command, cwd=workdir, stdin=slave, stdout=slave,
+                                       stderr=subprocess.DEVNULL, start_new_session=True)
+            os.close(slave)
+            threading.Thread(target=_drain, args=(master,), daemon=True).start()
+
+        try:
+            proc = psutil.Process(process.pid)
+            time.sleep(warmup)
+            cpu_before = proc.cpu_times()
+            started = time.monotonic()
+            time.sleep(duration)
+            cpu_after = proc.cpu_times()
+            elapsed = time.monotonic() - started
+            memory = proc.memory_full_info()
+            return {
+                "rss_mb": memory.rss / 2 ** 20,
+                "uss_mb": memory.uss / 2 ** 20,
+                "threads": proc.num_threads(),
+                "cpu_percent": (
+                    (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+                ) / elapsed * 100
+            }
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            if master is not None:
+                os.close(master)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds before sampling")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds sampled")
+    args = parser.parse_args()
+
+    results = {
+        "ui": _measure(False, args.warmup, args.duration),
+        "headless": _measure(True, args.warmup, args.duration)
+    }
+    print(f"{'mode':<10}{'RSS MB':>10}{'USS MB':>10}{'threads':>10}{'CPU %':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['rss_mb']:>10.1f}{result['uss_mb']:>10.1f}"
+              f"{result['threads']:>10}{result['cpu_percent']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
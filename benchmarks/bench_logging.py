@@ -0,0 +1,144 @@
+"""
+Logging Benchmark
+Measures records/s for the JSON formatters and for logging calls through the
+previous synchronous FileHandler setup against the queued pipeline.
+
+For the queued pipeline, "caller" is the rate at which the logging calls
+return (what the event loop sees) and "end-to-end" includes the listener
+writing every record to disk. --flush-delay simulates a slow disk by
+sleeping on every flush of the log file.
+
+Example:
+    python -m benchmarks.bench_logging --records 200000
+    python -m benchmarks.bench_logging --records 5000 --flush-delay 0.5
+"""
+
+import argparse
+import logging
+import queue
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+from app.logging_manager import (
+    BufferedFileHandler, DropQueueHandler, FastJSONFormatter, JSONFormatter, LogListener
+)
+
+
+def _format_rate(formatter: logging.Formatter, count: int) -> float:
+    """Records/s for formatting alone."""
+    record = logging.LogRecord(
+        "app.tunnel_manager", logging.INFO, __file__, 42,
+        "Connection from %s to %s:%d closed", ("127.0.0.1:50000", "example.com", 443), None, "_proxy_data"
+    )
+    started = time.perf_counter()
+    for _ in range(count):
+        formatter.format(record)
+    return count / (time.perf_counter() - started)
+
+
+class _SlowFile:
+    """File wrapper whose flush takes at least delay seconds."""
+
+    def __init__(self, stream, delay: float):
+        self._stream = stream
+        self._delay = delay
+
+    def flush(self):
+        self._stream.flush()
+        time.sleep(self._delay)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _open(handler: logging.FileHandler, flush_delay: float) -> logging.FileHandler:
+    """Open the handler's file now, slowed down if requested."""
+    handler.stream = handler._open()
+    if flush_delay:
+        handler.stream = _SlowFile(handler.stream, flush_delay)
+    return handler
+
+
+def _log_calls(logger: logging.Logger, count: int) -> Tuple[float, List[float]]:
+    """Seconds spent in count logging calls, and each call's latency."""
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        call_started = time.perf_counter()
+        logger.info("Connection from %s to %s:%d closed", "127.0.0.1:50000", "example.com", i)
+        latencies.append(time.perf_counter() - call_started)
+    return time.perf_counter() - started, latencies
+
+
+def _latency(latencies: List[float]) -> str:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p99 {p99 * 1e6:,.1f} us, max {ordered[-1] * 1e3:,.2f} ms"
+
+
+def _synchronous(path: Path, count: int, flush_delay: float) -> Tuple[float, List[float]]:
+    """Records/s and call latencies through the previous FileHandler + JSONFormatter setup."""
+    logger = logging.getLogger("bench.sync")
+    handler = _open(logging.FileHandler(path, delay=True), flush_delay)
+    handler.setFormatter(JSONFormatter())
+    logger.addHandler(handler)
+    try:
+        elapsed, latencies = _log_calls(logger, count)
+        return count / elapsed, latencies
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def _queued(path: Path, count: int, queue_size: int, flush_delay: float) -> tuple:
+    """(caller records/s, call latencies, end-to-end records/s, dropped) through the queued pipeline."""
+    logger = logging.getLogger("bench.queued")
+    log_queue = queue.Queue(queue_size)
+    file_handler = _open(BufferedFileHandler(path, delay=True), flush_delay)
+    file_handler.setFormatter(FastJSONFormatter())
+    listener = LogListener(log_queue, file_handler)
+    handler = DropQueueHandler(log_queue)
+    logger.addHandler(handler)
+    listener.start()
+    try:
+        started = time.perf_counter()
+        elapsed, latencies = _log_calls(logger, count)
+        listener.stop()
+        total = time.perf_counter() - started
+        return count / elapsed, latencies, count / total, handler.dropped
+    finally:
+        logger.removeHandler(handler)
+        file_handler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the JSON logging pipeline")
+    parser.add_argument("--records", type=int, default=200000, help="Records per measurement")
+    parser.add_argument("--queue-size", type=int, default=10000, help="Queue bound of the queued pipeline")
+    parser.add_argument("--flush-delay", type=float, default=0.0, help="Simulated disk latency per flush, in ms")
+    args = parser.parse_args()
+
+    logging.getLogger("bench").propagate = False
+    logging.getLogger("bench").setLevel(logging.INFO)
+    print(f"Formatter JSONFormatter:     {_format_rate(JSONFormatter(), args.records):>12,.0f} records/s")
+    print(f"Formatter FastJSONFormatter: {_format_rate(FastJSONFormatter(), args.records):>12,.0f} records/s")
+
+    delay = args.flush_delay / 1000
+    with tempfile.TemporaryDirectory(prefix="dtm-logbench-") as workdir:
+        sync_rate, sync_latencies = _synchronous(Path(workdir) / "sync.json", args.records, delay)
+        caller_rate, latencies, total_rate, dropped = _queued(
+            Path(workdir) / "queued.json", args.records, args.queue_size, delay
+        )
+        with open(Path(workdir) / "queued.json") as f:
+            written = sum(1 for _ in f)
+
+    print(f"Synchronous FileHandler:     {sync_rate:>12,.0f} records/s, {_latency(sync_latencies)}")
+    print(f"Queued pipeline (caller):    {caller_rate:>12,.0f} records/s, {_latency(latencies)}, "
+          f"{dropped:,} dropped")
+    print(f"Queued pipeline (end-to-end):{total_rate:>12,.0f} records/s, {written:,} lines written")
+
+
+if __name__ == "__main__":
+    main()
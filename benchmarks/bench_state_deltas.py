@@ -0,0 +1,90 @@
+"""
+State Delta Benchmark
+Compares the per-update cost of the web dashboard's page delta stream with
+shipping a full JSON snapshot of the state every tick.
+
+Each tick re-assigns the tunnel port of a fraction of the applications (the
+churn), runs StateDeltaTracker.update over the whole state and reduces the
+delta to one dashboard page.
+
+Example:
+    python -m benchmarks.bench_state_deltas --apps 5000 --churn 0.01 --ticks 200
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from app.discovery import ApplicationInfo
+from app.state_deltas import PageStream, StateDeltaTracker
+
+
+def _apps(count: int) -> Dict[int, ApplicationInfo]:
+    """Synthetic tracked applications."""
+    now = datetime.now()
+    return {
+        pid: ApplicationInfo(pid, f"app-{pid % 97}", 1024 + pid % 50000, "10.0.0.1", 443, now, now)
+        for pid in range(1000, 1000 + count)
+    }
+
+
+def _encode(message) -> int:
+    """Size of a message as sent on the wire."""
+    return len(json.dumps(message, separators=(",", ":")))
+
+
+def _summary(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    return f"mean {statistics.fmean(ordered):.3f}, p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]:.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard page deltas against full snapshots")
+    parser.add_argument("--apps", type=int, default=5000, help="Tracked applications")
+    parser.add_argument("--churn", type=float, default=0.01, help="Fraction of rows changed per tick")
+    parser.add_argument("--ticks", type=int, default=200, help="Updates measured")
+    parser.add_argument("--page", type=int, default=50, help="Dashboard page size")
+    args = parser.parse_args()
+
+    random.seed(0)
+    apps = _apps(args.apps)
+    ports = {pid: 5000 + pid % 1000 for pid in apps}
+    pids = list(apps)
+    tracker = StateDeltaTracker()
+    stream = PageStream(tracker, offset=0, limit=args.page)
+    tracker.update(apps, {}, ports, None, (0,))
+    stream.snapshot()
+
+    delta_ms, delta_bytes, snapshot_ms, snapshot_bytes = [], [], [], []
+    changed = max(1, int(args.apps * args.churn))
+    for tick in range(1, args.ticks + 1):
+        for pid in random.sample(pids, changed):
+            ports[pid] += 1
+
+        started = time.perf_counter()
+        delta = tracker.update(apps, {}, ports, None, (tick,))
+        message = stream.page_delta(delta)
+        size = _encode(message) if message else 0
+        delta_ms.append((time.perf_counter() - started) * 1000)
+        delta_bytes.append(size)
+        stream.subscription.queue.get_nowait()  # Drained by PageStream.next() when serving
+
+        started = time.perf_counter()
+        size = _encode(tracker.snapshot())
+        snapshot_ms.append((time.perf_counter() - started) * 1000)
+        snapshot_bytes.append(size)
+
+    stream.close()
+    print(f"{args.apps} apps, {changed} rows changed per tick, page of {args.page}, {args.ticks} ticks")
+    print(f"Full snapshot: {_summary(snapshot_ms)} ms, {statistics.fmean(snapshot_bytes):,.0f} B per update")
+    print(f"Page delta:    {_summary(delta_ms)} ms (diff + page reduction), "
+          f"{statistics.fmean(delta_bytes):,.0f} B per update")
+    print(f"Bytes per update: {statistics.fmean(delta_bytes) / statistics.fmean(snapshot_bytes):.2%} of a snapshot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+State Load Benchmark
+Measures the runtime private-key unwrap performed on every state load, with the
+per-runtime derived-key cache against the previous per-operation PBKDF2.
+
+Example:
+    python -m benchmarks.bench_state_load --ops 1000 --baseline-ops 20
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from app.state_security import PGPStateEncryption
+
+
+def _time_ops(operation: Callable[[], bytes], count: int) -> List[float]:
+    """Run an operation count times and return per-op latencies in seconds."""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "total_s": sum(ordered)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state-load key unwrap latency")
+    parser.add_argument("--ops", type=int, default=1000, help="Operations to time with the key cache")
+    parser.add_argument("--baseline-ops", type=int, default=20,
+                        help="Operations to time without the cache (extrapolated to --ops)")
+    parser.add_argument("--key-size", type=int, default=4096, help="Size of the wrapped private key in bytes")
+    args = parser.parse_args()
+
+    pgp = PGPStateEncryption()
+    pgp._runtime_password = pgp._generate_runtime_password()
+    pgp._kdf_salt = os.urandom(16)
+    pgp._derived_key.store(pgp._derive_key(pgp._runtime_password, pgp._kdf_salt))
+    wrapped_key = pgp._encrypt_with_password(os.urandom(args.key_size), pgp._runtime_password)
+
+    def unwrap() -> bytes:
+        return pgp._decrypt_with_password(wrapped_key, pgp._runtime_password)
+
+    cached = _summary(_time_ops(unwrap, args.ops))
+
+    # Baseline: empty the slot so every call runs PBKDF2 again
+    pgp._derived_key.zeroize()
+    baseline = _summary(_time_ops(unwrap, args.baseline_ops))
+    baseline_total = baseline["mean_ms"] / 1000 * args.ops
+
+    print(f"Key slot locked in RAM: {pgp._derived_key.locked}")
+    print(f"Per-op PBKDF2 (before): mean {baseline['mean_ms']:.2f} ms, p99 {baseline['p99_ms']:.2f} ms "
+          f"-> {baseline_total:.1f} s for {args.ops} loads (extrapolated from {args.baseline_ops})")
+    print(f"Cached key (after):     mean {cached['mean_ms']:.4f} ms, p99 {cached['p99_ms']:.4f} ms "
+          f"-> {cached['total_s']:.3f} s for {args.ops} loads")
+    print(f"Speedup:                {baseline['mean_ms'] / cached['mean_ms']:.0f}x")
+
+    pgp._derived_key.close()
+
+
+if __name__ == "__main__":
+    main()
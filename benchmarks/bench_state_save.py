@@ -0,0 +1,93 @@
+"""
+State Save Benchmark
+Compares per-save latency and on-disk size of envelope encryption (in-process
+AEAD with an in-memory runtime data key) against the legacy gpg-per-blob format.
+
+Runs against a throwaway HOME and GNUPGHOME so no real state or keyring is touched.
+
+Example:
+    python -m benchmarks.bench_state_save --saves 200 --state-size 4096
+    python -m benchmarks.bench_state_save --write-behind 0.05
+    python -m benchmarks.bench_state_save --backend log
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+    }
+
+
+async def _run(args: argparse.Namespace):
+    from app.state_security import PGPStateEncryption, SecureStateManager
+
+    pgp = PGPStateEncryption()
+    await pgp.initialize()
+    manager = SecureStateManager(pgp, config={
+        "encryption": "envelope",
+        "cipher": args.cipher,
+        "write_behind_window": args.write_behind,
+        "backend": args.backend
+    })
+    await manager.initialize()
+
+    state = {"payload": os.urandom(args.state_size // 2).hex(), "counter": 0}
+    results = {}
+    try:
+        for mode in ("pgp", "envelope"):
+            manager.encryption_mode = mode
+            samples = []
+            for i in range(args.saves):
+                state["counter"] = i
+                started = time.perf_counter()
+                await manager.save_state(state, f"bench_{mode}.json", skip_verification=True)
+                samples.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            await manager.flush()
+            flush_ms = (time.perf_counter() - started) * 1000
+            size = len(await manager._encrypt_bytes(json.dumps(state).encode()))
+            results[mode] = {**_summary(samples), "flush_ms": flush_ms, "size": size}
+    finally:
+        await manager.cleanup()
+        await pgp.cleanup()
+
+    plain = len(state["payload"]) + 32
+    for mode, stats in results.items():
+        print(f"{mode:>9}: mean {stats['mean_ms']:.3f} ms, p50 {stats['p50_ms']:.3f} ms, "
+              f"p99 {stats['p99_ms']:.3f} ms, final flush {stats['flush_ms']:.3f} ms, "
+              f"blob {stats['size']} B ({stats['size'] / plain:.2f}x plaintext)")
+    print(f"  commits: {manager.stats['commits']} for {manager.stats['saves']} saves")
+    print(f"  speedup: {results['pgp']['mean_ms'] / results['envelope']['mean_ms']:.1f}x per save")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark state save latency per encryption mode")
+    parser.add_argument("--saves", type=int, default=100, help="Saves per mode")
+    parser.add_argument("--state-size", type=int, default=4096, help="Approximate serialized state size in bytes")
+    parser.add_argument("--cipher", default="aes-gcm", choices=["aes-gcm", "chacha20-poly1305"])
+    parser.add_argument("--backend", default="files", choices=["files", "log"], help="State store backend")
+    parser.add_argument("--write-behind", type=float, default=0.0,
+                        help="Write-behind window in seconds (0 commits every save)")
+    args = parser.parse_args()
+
+    # Isolate state directories and keyring
+    os.environ["HOME"] = tempfile.mkdtemp(prefix="dtm-bench-")
+    os.environ["GNUPGHOME"] = tempfile.mkdtemp(prefix="dtm-bench-gpg-")
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Mock OpenRouter Server
+Local stand-in for the OpenRouter chat-completions API used to load-test AIAnalyzer.
+
+Run standalone:
+    python -m benchmarks.mock_openrouter --port 8765 --latency lognormal:0.8:0.5 --error-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+# Canned analysis returned by the mock model
+MOCK_ANALYSIS = {
+    "risk_level": "medium",
+    "concerns": [
+        "Unencrypted traffic to a remote host",
+        "Port is reachable from other local processes"
+    ],
+    "recommendations": [
+        "Route the connection through a DTM tunnel",
+        "Enable port rotation for this application"
+    ],
+    "tunnel_policy": {
+        "should_tunnel": True,
+        "reason": "Remote traffic should be protected by a secure tunnel"
+    }
+}
+
+
+@dataclass
+class LatencyDistribution:
+    """Latency distribution parsed from ``kind:param[:param]`` specs."""
+    kind: str = "constant"
+    a: float = 0.2
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a distribution spec.
+
+        Supported: ``constant:S``, ``uniform:MIN:MAX``, ``exponential:MEAN``,
+        ``lognormal:MEDIAN:SIGMA``.
+        """
+        kind, *params = spec.split(":")
+        values = [float(p) for p in params] + [0.0, 0.0]
+        if kind not in ("constant", "uniform", "exponential", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        return cls(kind, values[0], values[1])
+
+    def sample(self) -> float:
+        """Draw a latency in seconds."""
+        if self.kind == "uniform":
+            return random.uniform(self.a, self.b)
+        if self.kind == "exponential":
+            return random.expovariate(1 / self.a) if self.a > 0 else 0.0
+        if self.kind == "lognormal":
+            return random.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self.a
+
+
+@dataclass
+class MockBehavior:
+    """Failure and latency behavior of the mock server."""
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    model_latency: Dict[str, LatencyDistribution] = field(default_factory=dict)
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    burst_every: float = 0.0
+    burst_length: float = 0.0
+    retry_after: float = 1.0
+    stream_chunk: int = 16
+
+
+class MockOpenRouterServer:
+    """Minimal asyncio HTTP/1.1 server speaking the chat-completions protocol."""
+
+    def __init__(self, behavior: Optional[MockBehavior] = None, host: str = "127.0.0.1", port: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.behavior = behavior or MockBehavior()
+        self.host = host
+        self.port = port
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "malformed": 0}
+        self._server: Optional[asyncio.Server] = None
+        self._started_at = time.monotonic()
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to put into ``openrouter.base_url``."""
+        return f"http://{self.host}:{self.port}/api/v1"
+
+    async def start(self):
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started_at = time.monotonic()
+        self.logger.info(f"Mock OpenRouter listening on {self.base_url}")
+
+    async def stop(self):
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def _in_burst(self) -> bool:
+        """Whether the server is currently inside a 429 burst window."""
+        if self.behavior.burst_every <= 0:
+            return False
+        elapsed = time.monotonic() - self._started_at
+        return (elapsed % self.behavior.burst_every) < self.behavior.burst_length
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, dict, bytes]]:
+        """Read one HTTP request, or None when the client closed the connection."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode().split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, value = line.decode().split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return method, path, headers, body
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on a keep-alive connection."""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, _, body = request
+                await self._respond(writer, method, path, body)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Client went away, e.g. a cancelled hedge loser
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes):
+        """Produce a response according to the configured behavior."""
+        self.stats["requests"] += 1
+        if method != "POST" or not path.endswith("/chat/completions"):
+            self._write(writer, 404, {"error": {"message": "not found"}})
+            return
+
+        payload = json.loads(body or b"{}")
+        model = payload.get("model", "")
+        latency = self.behavior.model_latency.get(model, self.behavior.latency).sample()
+        await asyncio.sleep(latency)
+
+        if self._in_burst():
+            self.stats["rate_limited"] += 1
+            self._write(
+                writer, 429, {"error": {"message": "rate limited"}},
+                {"Retry-After": str(self.behavior.retry_after)}
+            )
+            return
+
+        if random.random() < self.behavior.error_rate:
+            self.stats["errors"] += 1
+            self._write(writer, 500, {"error": {"message": "upstream error"}})
+            return
+
+        content = json.dumps(MOCK_ANALYSIS)
+        if random.random() < self.behavior.malformed_rate:
+            self.stats["malformed"] += 1
+            content = content[:len(content) // 2]
+        else:
+            self.stats["ok"] += 1
+
+        if payload.get("stream"):
+            await self._write_stream(writer, model, content)
+        else:
+            self._write(writer, 200, {
+                "id": f"mock-{self.stats['requests']}",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]
+            })
+
+    def _write(self, writer: asyncio.StreamWriter, status: int, body: dict, headers: Optional[dict] = None):
+        """Write a JSON response."""
+        data = json.dumps(body).encode()
+        reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}[status]
+        head = [f"HTTP/1.1 {status} {reason}", "Content-Type: application/json", f"Content-Length: {len(data)}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, model: str, content: str):
+        """Write a Server-Sent Events response using chunked encoding."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+
+        def chunk(text: str):
+            data = text.encode()
+            writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+        chunk(": OPENROUTER PROCESSING\n\n")
+        size = self.behavior.stream_chunk
+        for start in range(0, len(content), size):
+            delta = {"model": model, "choices": [{"index": 0, "delta": {"content": content[start:start + size]}}]}
+            chunk(f"data: {json.dumps(delta)}\n\n")
+            await writer.drain()
+            await asyncio.sleep(0)
+        chunk("data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+
+
+def add_behavior_arguments(parser: argparse.ArgumentParser):
+    """Register mock behavior command-line options."""
+    parser.add_argument("--latency", default="lognormal:0.3:0.5",
+                        help="Latency distribution, e.g. constant:0.2, uniform:0.1:0.5, lognormal:0.3:0.5")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=SPEC",
+                        help="Per-model latency override (repeatable)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of truncated JSON answers")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Start a 429 burst every N seconds")
+    parser.add_argument("--burst-length", type=float, default=0.0, help="Length of each 429 burst in seconds")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After value sent with 429s")
+
+
+def behavior_from_args(args: argparse.Namespace) -> MockBehavior:
+    """Build a MockBehavior from parsed command-line options."""
+    model_latency = {}
+    for item in args.model_latency:
+        model, spec = item.split("=", 1)
+        model_latency[model] = LatencyDistribution.parse(spec)
+    return MockBehavior(
+        latency=LatencyDistribution.parse(args.latency),
+        model_latency=model_latency,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after
+    )
+
+
+async def _serve(args: argparse.Namespace):
+    server = MockOpenRouterServer(behavior_from_args(args), args.host, args.port)
+    await server.start()
+    print(f"Mock OpenRouter listening on {server.base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenRouter stand-in for AI pipeline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_behavior_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -4,46 +4,107 @@ Dynamic Tunnel Manager (DTM) - Main Application
 This is the entry point for the Dynamic Tunnel Manager application.
 """
 
+import argparse
 import asyncio
 import logging
+import signal
 import sys
 import json
+import string
 from pathlib import Path
 from datetime import datetime
-import keyboard
-from rich.logging import RichHandler
+from typing import Any, Dict, List, Optional
 from app.discovery import ApplicationDiscovery
 from app.tunnel_manager import TunnelManager
 from app.port_nuker import PortNuker
 from app.ai_analysis import AIAnalyzer
+from app.reanalysis import ReanalysisScheduler
 from app.logging_manager import setup_logging
-from app.cli_ui import DTMUI
+from app.control_socket import DEFAULT_SOCKET_PATH, ControlServer, send_command
+from app.state_deltas import StateDeltaTracker
+from app.ui_index import AppIndex
 
 # Configure base directory
 BASE_DIR = Path(__file__).resolve().parent
 
+# Keys polled and forwarded to the UI while the filter bar is being edited
+# (keyboard polling fallback only)
+FILTER_KEYS = list(string.ascii_lowercase + string.digits + ":^-._") + ["space", "backspace", "enter", "escape"]
+
 class DTMApplication:
     """Main application class for Dynamic Tunnel Manager."""
 
-    def __init__(self):
-        """Initialize the application components."""
-        # Set up logging first
-        setup_logging()
+    def __init__(self, headless: bool = False):
+        """
+        Initialize the application components.
+        
+        Args:
+            headless: Run without the terminal UI and keyboard input
+        """
         self.logger = logging.getLogger(__name__)
         
-        # Load configuration
+        # Load configuration, then apply its logging section
         self.config = self._load_config()
+        setup_logging(config=self.config.get("logging"))
+        self.headless = headless
         
         # Initialize components
         self.app_discovery = ApplicationDiscovery()
-        self.tunnel_manager = TunnelManager()
+        self.tunnel_manager = TunnelManager(config=self.config)
         self.port_nuker = PortNuker()
         self.ai_analyzer = AIAnalyzer(config=self.config)
-        self.ui = DTMUI(config=self.config)
+        self.reanalysis = ReanalysisScheduler(
+            analyzer=self.ai_analyzer,
+            config=self.config,
+            app_provider=self._get_app_with_state,
+            on_result=self._set_analysis_result
+        )
+        
+        # Latest AI analysis per PID, mirrored into the UI when there is one
+        self.analyses: Dict[int, Dict] = {}
+        self.ui = None
+        self.terminal_input = None
+        if not headless:
+            # Imported here so headless mode never loads Rich or touches the terminal
+            from app.cli_ui import DTMUI
+            from app.terminal_input import TerminalInput
+            self.ui = DTMUI(config=self.config)
+            self.app_discovery.add_listener(self.ui.apply_app_changes)
+            self.terminal_input = TerminalInput(self._on_key)
+        
+        # Local control socket; always on when headless
+        control_config = self.config.get("control_socket", {})
+        self.control_server = None
+        if headless or control_config.get("enabled", False):
+            self.control_server = ControlServer(
+                control_config.get("path", DEFAULT_SOCKET_PATH),
+                handlers={
+                    "status": self._cmd_status,
+                    "rotate": self._cmd_rotate,
+                    "rotate-cert": self._cmd_rotate_cert,
+                    "toggle-auto-tunnel": self._cmd_toggle_auto_tunnel,
+                    "analyze": self._cmd_analyze
+                }
+            )
+        
+        # Management API; off unless configured, as it needs the optional web dependencies
+        api_config = self.config.get("api", {})
+        self.api = None
+        self.app_index = None
+        self.state_deltas = None
+        if api_config.get("enabled", False):
+            from app.api import ManagementAPI
+            self.app_index = AppIndex()
+            self.app_discovery.add_listener(self._apply_app_changes)
+            self.state_deltas = StateDeltaTracker()
+            self.api = ManagementAPI(self, api_config)
         
         # Internal state
         self.running = False
         self._monitor_task = None
+        self._analysis_tasks = set()
+        # PIDs whose tunnel was removed on request; auto-tunneling leaves them alone
+        self.tunnel_exclusions = set()
         
     def _load_config(self) -> dict:
         """Load application configuration."""
@@ -148,6 +209,11 @@ class DTMApplication:
             await self.tunnel_manager.initialize()
             await self.port_nuker.start()
             await self.ai_analyzer.initialize()
+            await self.reanalysis.start()
+            if self.control_server:
+                await self.control_server.start()
+            if self.api:
+                await self.api.start()
             self.running = True
             self.logger.info("All components initialized successfully")
         except Exception as e:
@@ -157,50 +223,120 @@ class DTMApplication:
     async def shutdown(self):
         """Shutdown all components."""
         self.running = False
+        if self.api:
+            await self.api.stop()
+        if self.control_server:
+            await self.control_server.stop()
         await self.app_discovery.stop()
         await self.tunnel_manager.shutdown()
         await self.port_nuker.stop()
+        await self.reanalysis.stop()
         await self.ai_analyzer.shutdown()
         self.logger.info("Application shutdown complete")
 
     async def _handle_new_application(self, app_info):
         """Handle newly discovered application."""
-        if not self.ui.config["auto_tunnel"]:
+        if not self.config["auto_tunnel"]:
             return
 
         try:
-            # Get port from port nuker
-            tunnel_port = self.port_nuker.assign_port(app_info.pid)
-            
-            # Create tunnel
-            await self.tunnel_manager.create_tunnel(
-                pid=app_info.pid,
-                local_port=tunnel_port,
-                remote_host=app_info.remote_host or "localhost",
-                remote_port=app_info.local_port
-            )
+            await self._create_tunnel(app_info)
 
-            # Analyze with AI if enabled
-            if self.ui.config["ai_analysis"]:
-                analysis = await self.ai_analyzer.analyze_application(app_info)
+            # Analyze with AI if enabled; stored and tracked for re-analysis like a manual one
+            if self.config["ai_analysis"]:
+                analysis = await self._perform_ai_analysis(app_info.pid)
                 self.logger.info(f"AI Analysis for {app_info.name}: {analysis}")
 
         except Exception as e:
             self.logger.error(f"Failed to handle application {app_info.name}: {str(e)}")
 
+    async def _create_tunnel(self, app_info):
+        """Assign a port to an application and tunnel it."""
+        tunnel_port = self.port_nuker.assign_port(app_info.pid)
+        await self.tunnel_manager.create_tunnel(
+            pid=app_info.pid,
+            local_port=tunnel_port,
+            remote_host=app_info.remote_host or "localhost",
+            remote_port=app_info.local_port
+        )
+
+    def _state_versions(self) -> tuple:
+        """Change counters of everything the UI and state deltas are built from."""
+        return (
+            self.app_discovery.version,
+            self.tunnel_manager.version,
+            self.tunnel_manager.metrics_version,
+            self.port_nuker.version
+        )
+
     async def _update_ui(self):
         """Update UI with current state."""
         self.ui.update(
             apps=self.app_discovery.applications,
             tunnels=self.tunnel_manager.tunnels,
             ports=self.port_nuker.port_assignments,
-            last_rotation=self.port_nuker.last_rotation
+            last_rotation=self.port_nuker.last_rotation,
+            versions=self._state_versions()
+        )
+
+    def _publish_state(self):
+        """Publish state changes to API clients."""
+        self.state_deltas.update(
+            apps=self.app_discovery.applications,
+            tunnels=self.tunnel_manager.tunnels,
+            ports=self.port_nuker.port_assignments,
+            last_rotation=self.port_nuker.last_rotation,
+            versions=self._state_versions()
         )
 
     async def _handle_input(self):
         """Handle keyboard input."""
+        if not self.terminal_input.supported():
+            await self._poll_keyboard()
+            return
+
+        # Keys are dispatched from the event loop as they arrive
+        self.terminal_input.start()
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            self.terminal_input.stop()
+
+    def _on_key(self, key: str):
+        """Dispatch a key press to the UI."""
+        if not self.ui.filter_mode:
+            key = key.lower()  # Commands are case-insensitive
+        if not self.ui.handle_input(key):
+            self.running = False
+            return
+        self._start_selected_analysis()
+
+    def _start_selected_analysis(self):
+        """Analyze the process picked in the UI without blocking input."""
+        pid = self.ui.selected_pid
+        if pid is None:
+            return
+        # Taken now: the user may pick another process before this one finishes
+        related_pids = list(self.ui.related_pids)
+        self.ui.selected_pid = None
+        self.ui.related_pids = []
+        task = asyncio.create_task(self._perform_ai_analysis(pid, related_pids))
+        self._analysis_tasks.add(task)
+        task.add_done_callback(self._analysis_tasks.discard)
+
+    async def _poll_keyboard(self):
+        """Poll the keyboard module (fallback where cbreak stdin is unavailable)."""
+        import keyboard
+
         while self.running:
             try:
+                if self.ui.filter_mode:
+                    # Every key goes to the filter bar, including command letters
+                    for key in FILTER_KEYS:
+                        if keyboard.is_pressed(key):
+                            self.ui.handle_input(key)
+                    await asyncio.sleep(0.1)
+                    continue
                 if keyboard.is_pressed('q'):
                     self.running = False
                 elif keyboard.is_pressed('t'):
@@ -209,6 +345,8 @@ class DTMApplication:
                     self.ui.handle_input('r')
                 elif keyboard.is_pressed('p'):
                     self.ui.handle_input('p')
+                elif keyboard.is_pressed('/'):
+                    self.ui.handle_input('/')
                 elif keyboard.is_pressed('tab'):
                     self.ui.handle_input('tab')
                 elif keyboard.is_pressed('escape'):
@@ -225,42 +363,98 @@ class DTMApplication:
                     self.ui.handle_input('backspace')
                 elif keyboard.is_pressed('enter'):
                     self.ui.handle_input('enter')
-                    if self.ui.selected_pid is not None:
-                        await self._perform_ai_analysis(self.ui.selected_pid)
+                    self._start_selected_analysis()
                 # Handle number keys for PID selection
                 for num in range(10):
                     if keyboard.is_pressed(str(num)):
                         self.ui.handle_input(str(num))
-                        if self.ui.selected_pid is not None:
-                            await self._perform_ai_analysis(self.ui.selected_pid)
+                        self._start_selected_analysis()
                 await asyncio.sleep(0.1)
             except Exception as e:
                 self.logger.error(f"Error handling input: {str(e)}")
 
-    async def _perform_ai_analysis(self, pid: int):
-        """Perform AI analysis on a specific process."""
-        try:
-            if pid not in self.app_discovery.applications:
-                self.logger.warning(f"PID {pid} not found in active applications")
-                return
+    def _get_app_with_state(self, pid: int):
+        """Get application info for a PID with current DTM state attached."""
+        app_info = self.app_discovery.applications.get(pid)
+        if app_info is None:
+            return None
+
+        app_info.tunnel_info = self.tunnel_manager.tunnels.get(pid)
+        app_info.tunnel_port = self.port_nuker.port_assignments.get(pid)
+        app_info.dtm_state = {
+            "is_tunneled": pid in self.tunnel_manager.tunnels,
+            "tunnel_port": self.port_nuker.port_assignments.get(pid),
+            "auto_tunnel": self.config["auto_tunnel"],
+            "last_rotation": self.port_nuker.last_rotation
+        }
+        return app_info
+
+    def _set_analysis_result(self, pid: int, analysis: Dict):
+        """Store a (re-)analysis result for a PID."""
+        self.analyses[pid] = analysis
+        self._index_analyses([pid], analysis)
+        if self.ui:
+            self.ui.set_analysis_result(pid, analysis)
+
+    def _add_analysis_result(self, pid: int, analysis: Dict, related_pids: Optional[List[int]] = None):
+        """Store the result of a requested analysis for a PID and its group."""
+        related_pids = related_pids or []
+        self.analyses[pid] = analysis
+        for related_pid in related_pids:
+            self.analyses[related_pid] = analysis
+        self._index_analyses([pid] + related_pids, analysis)
+        if self.ui:
+            self.ui.add_analysis_result(pid, analysis, related_pids)
+
+    def _index_analyses(self, pids: List[int], analysis: Dict):
+        """Record analyses in the API's application index."""
+        if self.app_index is None:
+            return
+        for pid in pids:
+            self.app_index.add_analysis(self.app_discovery.applications.get(pid), analysis)
 
-            app_info = self.app_discovery.applications[pid]
+    def _apply_app_changes(self, added: List, removed: List):
+        """Keep the API's application index in step with discovery."""
+        self.app_index.apply_changes(added, removed, self.analyses)
+
+    def synced_app_index(self) -> AppIndex:
+        """The API's application index, rebuilt if it drifted from discovery."""
+        if len(self.app_index.by_pid) != len(self.app_discovery.applications):
+            self.app_index.rebuild(self.app_discovery.applications, self.analyses)
+        return self.app_index
+
+    async def _perform_ai_analysis(self, pid: int, related_pids: Optional[List[int]] = None) -> Optional[Dict]:
+        """
+        Perform AI analysis on a specific process.
+        
+        Args:
+            pid: Process ID to analyze
+            related_pids: PIDs of the same application that share the result
+        
+        Returns:
+            The analysis (an error result if it failed), or None if the PID is unknown
+        """
+        try:
             # Add DTM state information to app_info
-            app_info.tunnel_info = self.tunnel_manager.tunnels.get(pid)
-            app_info.tunnel_port = self.port_nuker.port_assignments.get(pid)
-            app_info.dtm_state = {
-                "is_tunneled": pid in self.tunnel_manager.tunnels,
-                "tunnel_port": self.port_nuker.port_assignments.get(pid),
-                "auto_tunnel": self.config["auto_tunnel"],
-                "last_rotation": self.port_nuker.last_rotation
-            }
+            app_info = self._get_app_with_state(pid)
+            if app_info is None:
+                self.logger.warning(f"PID {pid} not found in active applications")
+                return None
             
-            analysis = await self.ai_analyzer.analyze_application(app_info)
-            self.ui.add_analysis_result(pid, analysis)
+            analysis = await self.ai_analyzer.analyze_application(
+                app_info,
+                on_partial=(
+                    (lambda partial: self.ui.update_partial_analysis(pid, partial, related_pids))
+                    if self.ui else None
+                )
+            )
+            self._add_analysis_result(pid, analysis, related_pids)
+            self.reanalysis.record(pid, app_info)
+            return analysis
             
         except Exception as e:
             self.logger.error(f"Failed to perform AI analysis on PID {pid}: {str(e)}")
-            self.ui.add_analysis_result(pid, {
+            analysis = {
                 "error": str(e),
                 "recommendations": {
                     "risk_level": "unknown",
@@ -271,7 +465,146 @@ class DTMApplication:
                         "reason": "Analysis failed"
                     }
                 }
+            }
+            self._add_analysis_result(pid, analysis, related_pids)
+            return analysis
+
+    async def _cmd_status(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Control command: current DTM state."""
+        return self.status_report()
+
+    def status_report(self) -> Dict[str, Any]:
+        """Summary of the current DTM state (control socket and API)."""
+        tunnels = []
+        for pid, tunnel in self.tunnel_manager.tunnels.items():
+            app_info = self.app_discovery.applications.get(pid)
+            counters = tunnel.counters
+            tunnels.append({
+                "pid": pid,
+                "name": app_info.name if app_info else None,
+                "port": tunnel.local_port,
+                "remote": f"{tunnel.remote_host}:{tunnel.remote_port}",
+                "connections": counters.connections_active,
+                "bytes_sent": counters.bytes_sent,
+                "bytes_received": counters.bytes_received,
+                "rate": counters.rate
             })
+        return {
+            "mode": "headless" if self.headless else "ui",
+            "auto_tunnel": self.config["auto_tunnel"],
+            "applications": len(self.app_discovery.applications),
+            "tunnels": tunnels,
+            "analyses": len(self.analyses),
+            "last_rotation": self.port_nuker.last_rotation,
+            "last_cert_rotation": self.tunnel_manager.last_cert_rotation,
+            "cert_pool": self.tunnel_manager.cert_pool.metrics()
+        }
+
+    async def create_tunnels(self, pids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Tunnel several applications (API bulk operation).
+
+        Args:
+            pids: Process IDs to tunnel
+
+        Returns:
+            Outcome per PID
+        """
+        results = []
+        for pid in dict.fromkeys(pids):
+            app_info = self.app_discovery.applications.get(pid)
+            if app_info is None:
+                results.append({"pid": pid, "ok": False, "error": "Unknown PID"})
+                continue
+            self.tunnel_exclusions.discard(pid)
+            if pid not in self.tunnel_manager.tunnels:
+                try:
+                    await self._create_tunnel(app_info)
+                except Exception as e:
+                    self.logger.error(f"Failed to tunnel PID {pid}: {str(e)}")
+                    results.append({"pid": pid, "ok": False, "error": str(e)})
+                    continue
+            results.append({"pid": pid, "ok": True, "port": self.port_nuker.port_assignments.get(pid)})
+        return results
+
+    async def remove_tunnels(self, pids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Remove several tunnels (API bulk operation).
+
+        Removed applications are not tunneled again automatically until a
+        tunnel is requested for them.
+
+        Args:
+            pids: Process IDs whose tunnels to remove
+
+        Returns:
+            Outcome per PID
+        """
+        results = []
+        for pid in dict.fromkeys(pids):
+            if pid not in self.tunnel_manager.tunnels:
+                results.append({"pid": pid, "ok": False, "error": "No tunnel"})
+                continue
+            self.tunnel_exclusions.add(pid)
+            await self.tunnel_manager.remove_tunnel(pid)
+            self.port_nuker.release_port(pid)
+            results.append({"pid": pid, "ok": True})
+        return results
+
+    async def analyze_many(self, pids: List[int], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Run AI analyses of several applications (API bulk operation).
+
+        Args:
+            pids: Process IDs to analyze
+            concurrency: Analyses in flight at once (api.analysis_concurrency by default)
+
+        Returns:
+            Analysis per PID, in request order
+        """
+        limit = asyncio.Semaphore(concurrency or self.config.get("api", {}).get("analysis_concurrency", 4))
+
+        async def analyze(pid: int) -> Dict[str, Any]:
+            async with limit:
+                analysis = await self._perform_ai_analysis(pid)
+            if analysis is None:
+                return {"pid": pid, "ok": False, "error": "Unknown PID"}
+            return {"pid": pid, "ok": "error" not in analysis, "analysis": analysis}
+
+        return list(await asyncio.gather(*(analyze(pid) for pid in dict.fromkeys(pids))))
+
+    async def _cmd_rotate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Control command: rotate ports now."""
+        await self.port_nuker.force_rotation()
+        return {
+            "last_rotation": self.port_nuker.last_rotation,
+            "assignments": len(self.port_nuker.port_assignments)
+        }
+
+    async def _cmd_rotate_cert(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Control command: rotate the tunnel certificate now."""
+        await self.tunnel_manager.rotate_certificate()
+        return {
+            "last_cert_rotation": self.tunnel_manager.last_cert_rotation,
+            "cert_pool": self.tunnel_manager.cert_pool.metrics()
+        }
+
+    async def _cmd_toggle_auto_tunnel(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Control command: toggle auto-tunneling, or set it with params["enabled"]."""
+        enabled = params.get("enabled")
+        self.config["auto_tunnel"] = not self.config["auto_tunnel"] if enabled is None else bool(enabled)
+        if self.ui:
+            self.ui.mark_dirty()
+        self.logger.info(f"Auto-tunnel {'enabled' if self.config['auto_tunnel'] else 'disabled'} via control socket")
+        return {"auto_tunnel": self.config["auto_tunnel"]}
+
+    async def _cmd_analyze(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Control command: run an AI analysis of params["pid"] and return it."""
+        pid = int(params["pid"])
+        analysis = await self._perform_ai_analysis(pid)
+        if analysis is None:
+            raise ValueError(f"PID {pid} not found in active applications")
+        return analysis
 
     async def _monitor_applications(self):
         """Monitor applications and create tunnels."""
@@ -281,8 +614,11 @@ class DTMApplication:
                 current_apps = set(self.app_discovery.applications.keys())
                 current_tunnels = set(self.tunnel_manager.tunnels.keys())
 
+                # Forget exclusions of applications that went away
+                self.tunnel_exclusions &= current_apps
+
                 # Handle new applications
-                for pid in current_apps - current_tunnels:
+                for pid in current_apps - current_tunnels - self.tunnel_exclusions:
                     if pid in self.app_discovery.applications:
                         await self._handle_new_application(self.app_discovery.applications[pid])
 
@@ -295,22 +631,35 @@ class DTMApplication:
             except Exception as e:
                 self.logger.error(f"Error in application monitor: {str(e)}")
 
+    def request_stop(self):
+        """Ask the main loop to exit (signal handler)."""
+        self.logger.info("Received shutdown signal")
+        self.running = False
+
     async def run(self):
         """Run the main application loop."""
+        tasks = []
         try:
             await self.initialize()
             
             # Start all async tasks
-            tasks = [
-                asyncio.create_task(self._monitor_applications()),
-                asyncio.create_task(self._handle_input()),
-                asyncio.create_task(self.ui.run())
-            ]
+            tasks.append(asyncio.create_task(self._monitor_applications()))
+            if self.ui:
+                tasks.append(asyncio.create_task(self._handle_input()))
+                tasks.append(asyncio.create_task(self.ui.run()))
+            else:
+                # Services are stopped with SIGTERM; shut down cleanly
+                loop = asyncio.get_running_loop()
+                for sig in (signal.SIGTERM, signal.SIGINT):
+                    loop.add_signal_handler(sig, self.request_stop)
 
             # Wait for application to exit
             while self.running:
-                await self._update_ui()
-                await asyncio.sleep(0.25)
+                if self.ui:
+                    await self._update_ui()
+                if self.state_deltas:
+                    self._publish_state()
+                await asyncio.sleep(0.25 if self.ui else 1)
 
         except KeyboardInterrupt:
             self.logger.info("Received shutdown signal")
@@ -326,13 +675,55 @@ class DTMApplication:
                 except asyncio.CancelledError:
                     pass
 
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Dynamic Tunnel Manager")
+    parser.add_argument("--headless", action="store_true",
+                        help="run without the terminal UI, controlled through the control socket")
+    parser.add_argument("--ctl", choices=["status", "rotate", "rotate-cert", "toggle-auto-tunnel", "analyze"],
+                        help="send a command to a running instance and print the response")
+    parser.add_argument("--pid", type=int, help="process to analyze (with --ctl analyze)")
+    parser.add_argument("--enabled", choices=["on", "off"],
+                        help="set auto-tunneling instead of toggling it (with --ctl toggle-auto-tunnel)")
+    parser.add_argument("--socket", help="control socket path (default: control_socket.path from config)")
+    return parser.parse_args()
+
+def _control_socket_path(args: argparse.Namespace) -> str:
+    """Control socket path from the command line or config/config.json."""
+    if args.socket:
+        return args.socket
+    try:
+        with open("config/config.json") as f:
+            return json.load(f).get("control_socket", {}).get("path", DEFAULT_SOCKET_PATH)
+    except (OSError, ValueError):
+        return DEFAULT_SOCKET_PATH
+
+async def run_control_command(args: argparse.Namespace) -> int:
+    """Send a --ctl command and print the response."""
+    params = {}
+    if args.pid is not None:
+        params["pid"] = args.pid
+    if args.enabled:
+        params["enabled"] = args.enabled == "on"
+    try:
+        response = await send_command(_control_socket_path(args), args.ctl, params)
+    except OSError as e:
+        print(f"Cannot reach DTM control socket: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(response, indent=2, default=str))
+    return 0 if response.get("ok") else 1
+
 async def main():
     """Main entry point."""
+    args = parse_args()
+    if args.ctl:
+        sys.exit(await run_control_command(args))
+
     # Setup logging
     setup_logging()
     
     # Create and run application
-    app = DTMApplication()
+    app = DTMApplication(headless=args.headless)
     await app.run()
 
 if __name__ == "__main__":
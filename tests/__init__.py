@@ -0,0 +1 @@
+"""Tests for Dynamic Tunnel Manager."""
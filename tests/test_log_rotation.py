@@ -0,0 +1,70 @@
+"""Tests for size- and time-based log rotation."""
+
+import gzip
+import logging
+import threading
+
+from app.log_rotation import RotatingLogHandler
+
+
+def _write_records(handler: RotatingLogHandler, count: int):
+    logger = logging.getLogger("tests.log_rotation.writer")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        for i in range(count):
+            logger.info("record %05d %s", i, "x" * 50)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def _record_numbers(lines):
+    return [int(line.split()[1]) for line in lines]
+
+
+def test_burst_of_rotations_keeps_newest_segments_without_errors(tmp_path, caplog):
+    # 300 records of ~60 bytes rotate about ten times within the same second
+    handler = RotatingLogHandler(tmp_path / "dtm.json", max_bytes=2000, interval=0, backup_count=3)
+    # Hold the archiver so every rotation is queued before compression starts
+    release = threading.Event()
+    handler._archiver.submit(release.wait)
+    with caplog.at_level(logging.WARNING, logger="app.log_rotation"):
+        threading.Timer(0.2, release.set).start()
+        _write_records(handler, 300)
+
+    assert not [record for record in caplog.records if record.name == "app.log_rotation"]
+    segments = handler._segments()
+    assert len(segments) == 3
+    assert all(path.name.endswith(".json.gz") for path in segments)
+
+    # The kept segments are the newest ones: contiguous up to the active file
+    numbers = []
+    for path in segments:
+        with gzip.open(path, "rt") as f:
+            numbers += _record_numbers(f.read().splitlines())
+    numbers += _record_numbers((tmp_path / "dtm.json").read_text().splitlines())
+    assert numbers == list(range(numbers[0], 300))
+    assert numbers[0] > 0
+
+
+def test_uncompressed_segments_follow_backup_count(tmp_path, caplog):
+    handler = RotatingLogHandler(
+        tmp_path / "dtm.json", max_bytes=2000, interval=0, backup_count=2, compression="none"
+    )
+    with caplog.at_level(logging.WARNING, logger="app.log_rotation"):
+        _write_records(handler, 300)
+
+    assert not [record for record in caplog.records if record.name == "app.log_rotation"]
+    assert [path.suffix for path in handler._segments()] == [".json", ".json"]
+
+
+def test_segment_removed_before_compression_is_skipped(tmp_path, caplog):
+    handler = RotatingLogHandler(tmp_path / "dtm.json", max_bytes=0, interval=0)
+    try:
+        with caplog.at_level(logging.WARNING, logger="app.log_rotation"):
+            handler._archive([tmp_path / "dtm.20260101-000000.json"])
+    finally:
+        handler.close()
+    assert not caplog.records
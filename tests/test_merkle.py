@@ -0,0 +1,75 @@
+"""Tests for incremental Merkle tree updates."""
+
+import copy
+import random
+
+from app.merkle import build_tree, update_path
+
+
+def _random_value(rng: random.Random, depth: int = 0):
+    roll = rng.random()
+    if depth < 3 and roll < 0.3:
+        return {f"k{i}": _random_value(rng, depth + 1) for i in range(rng.randint(0, 3))}
+    if depth < 3 and roll < 0.55:
+        return [_random_value(rng, depth + 1) for _ in range(rng.randint(0, 3))]
+    return rng.choice([rng.randint(0, 9), f"s{rng.randint(0, 9)}", None, True, 1.5])
+
+
+def _random_path(rng: random.Random, value):
+    """Path to an existing entry, or to a new key/index next to one."""
+    path = []
+    while isinstance(value, (dict, list)) and value:
+        keys = list(value) if isinstance(value, dict) else list(range(len(value)))
+        key = rng.choice(keys)
+        path.append(key)
+        if rng.random() < 0.4:
+            break
+        value = value[key]
+    return path
+
+
+def _edit(rng: random.Random, state):
+    """Apply one random edit to state and return the changed path."""
+    path = _random_path(rng, state)
+    if not path:
+        key = f"k{rng.randint(0, 5)}"
+        state[key] = _random_value(rng)
+        return [key]
+    parent = state
+    for key in path[:-1]:
+        parent = parent[key]
+    key = path[-1]
+    action = rng.random()
+    if action < 0.2:
+        del parent[key]
+    elif action < 0.3 and isinstance(parent, list):
+        parent.append(_random_value(rng))
+        return path[:-1] + [len(parent) - 1]
+    else:
+        parent[key] = _random_value(rng)
+    return path
+
+
+def test_scalar_replacing_last_container_matches_full_build():
+    state = {"a": [{"x": 1}]}
+    tree = build_tree(state)
+    state["a"][0] = 5
+    assert update_path(tree, state, ("a", 0)).digest == build_tree(state).digest
+
+
+def test_removing_last_container_matches_full_build():
+    state = {"a": [{"x": 1}]}
+    tree = build_tree(state)
+    del state["a"][0]
+    assert update_path(tree, state, ("a", 0)).digest == build_tree(state).digest
+
+
+def test_incremental_root_matches_full_build_over_random_edits():
+    rng = random.Random(1234)
+    for _ in range(200):
+        state = {f"k{i}": _random_value(rng) for i in range(4)}
+        tree = build_tree(state)
+        for _ in range(25):
+            path = _edit(rng, state)
+            tree = update_path(tree, state, path)
+            assert tree.digest == build_tree(copy.deepcopy(state)).digest, path
@@ -0,0 +1,156 @@
+"""Tests for latency-aware model routing and hedged requests."""
+
+import asyncio
+
+import pytest
+
+from app.model_router import LATENCY_BUCKETS, LatencyHistogram, ModelRouter
+
+CONFIG = {"hedging": True, "hedge_delay": 0.05, "min_hedge_delay": 0.01, "min_samples": 5}
+
+
+def _router(models=("primary", "fallback", "extra"), **overrides) -> ModelRouter:
+    return ModelRouter(list(models), {**CONFIG, **overrides})
+
+
+def _train(router: ModelRouter, model: str, latency: float, successes: int, failures: int = 0):
+    for _ in range(successes):
+        router.histograms[model].record(latency, success=True)
+    for _ in range(failures):
+        router.histograms[model].record(latency, success=False)
+
+
+class FakeModels:
+    """Request function with a fixed latency and outcome per model."""
+
+    def __init__(self, latencies, failing=()):
+        self.latencies = latencies
+        self.failing = set(failing)
+        self.started = []
+        self.cancelled = []
+
+    async def __call__(self, model: str) -> str:
+        self.started.append(model)
+        try:
+            await asyncio.sleep(self.latencies[model])
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        if model in self.failing:
+            raise RuntimeError(f"{model} failed")
+        return f"answer from {model}"
+
+
+def test_histogram_percentiles_and_decay():
+    histogram = LatencyHistogram(decay_every=10)
+    assert histogram.percentile(0.95) is None
+    for latency in (0.04, 0.04, 0.04, 0.04, 0.04, 0.04, 0.04, 0.04, 0.04, 2.5):
+        histogram.record(latency, success=True)
+    assert histogram.percentile(0.5) == 0.05
+    assert histogram.percentile(0.95) == 3.0
+    # The tenth sample halved every count
+    assert histogram.samples == 5
+    histogram.record(120.0, success=True)
+    assert histogram.percentile(1.0) == LATENCY_BUCKETS[-1]
+
+
+def test_under_sampled_models_get_the_default_delay_as_prior():
+    router = _router(hedge_delay=0.2)
+    assert router.ranked() == ["primary", "fallback", "extra"]
+
+    # A well-sampled slow primary loses to unexplored models scored at hedge_delay
+    _train(router, "primary", 1.0, successes=5)
+    assert router.ranked() == ["fallback", "extra", "primary"]
+
+    # Four samples are still under min_samples, however fast they were
+    _train(router, "extra", 0.01, successes=4)
+    assert router.ranked() == ["fallback", "extra", "primary"]
+    _train(router, "extra", 0.01, successes=1)
+    assert router.ranked() == ["extra", "fallback", "primary"]
+
+
+def test_failure_rate_inflates_the_score():
+    router = _router(models=("primary", "fallback"))
+    _train(router, "primary", 0.04, successes=5, failures=5)
+    _train(router, "fallback", 0.075, successes=5)
+    # 0.05 / 0.5 = 0.1 for primary against 0.1 / 1.0 for fallback: config order breaks the tie
+    assert router.ranked() == ["primary", "fallback"]
+    _train(router, "primary", 0.04, successes=0, failures=1)
+    assert router.ranked() == ["fallback", "primary"]
+
+
+def test_failure_penalty_is_capped():
+    router = _router(models=("primary",))
+    _train(router, "primary", 0.04, successes=5, failures=1000)
+    assert router._score("primary") == pytest.approx(0.05 / 0.05)
+
+
+def test_hedge_delay_tracks_p95_with_a_floor():
+    router = _router()
+    assert router.hedge_delay("primary") == 0.05
+    _train(router, "primary", 0.3, successes=5)
+    assert router.hedge_delay("primary") == 0.3
+    _train(router, "fallback", 0.001, successes=5)
+    assert router.hedge_delay("fallback") == 0.05
+    floored = _router(min_hedge_delay=0.2)
+    _train(floored, "primary", 0.001, successes=5)
+    assert floored.hedge_delay("primary") == 0.2
+
+
+def test_fast_primary_is_not_hedged():
+    router = _router()
+    models = FakeModels({"primary": 0.0, "fallback": 0.0, "extra": 0.0})
+    assert asyncio.run(router.call(models)) == ("answer from primary", "primary")
+    assert models.started == ["primary"]
+    assert router.stats == {"requests": 1, "hedged": 0, "hedge_wins": 0, "fallbacks": 0}
+    assert router.histograms["primary"].successes == 1
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    router = _router()
+    models = FakeModels({"primary": 5.0, "fallback": 0.0, "extra": 0.0})
+    assert asyncio.run(router.call(models)) == ("answer from fallback", "fallback")
+    assert models.started == ["primary", "fallback"]
+    assert models.cancelled == ["primary"]
+    assert router.stats["hedged"] == 1
+    assert router.stats["hedge_wins"] == 1
+    # A cancelled request is neither a latency sample nor a failure
+    assert router.histograms["primary"].samples == 0
+    assert router.histograms["primary"].failures == 0
+
+
+def test_primary_finishing_after_the_hedge_started_cancels_the_hedge():
+    router = _router(models=("primary", "fallback"))
+    models = FakeModels({"primary": 0.1, "fallback": 5.0})
+    assert asyncio.run(router.call(models)) == ("answer from primary", "primary")
+    assert models.started == ["primary", "fallback"]
+    assert models.cancelled == ["fallback"]
+    assert router.stats["hedge_wins"] == 0
+
+
+def test_failed_primary_falls_back_without_waiting():
+    router = _router(hedge_delay=5.0)
+    models = FakeModels({"primary": 0.0, "fallback": 0.0, "extra": 0.0}, failing={"primary"})
+
+    async def call():
+        return await asyncio.wait_for(router.call(models), 1.0)
+
+    assert asyncio.run(call()) == ("answer from fallback", "fallback")
+    assert router.stats["fallbacks"] == 1
+    assert router.stats["hedged"] == 0
+    assert router.histograms["primary"].failures == 1
+
+
+def test_all_models_failing_raises_the_last_error():
+    router = _router()
+    models = FakeModels({"primary": 0.0, "fallback": 0.0, "extra": 0.0}, failing={"primary", "fallback", "extra"})
+    with pytest.raises(RuntimeError, match="extra failed"):
+        asyncio.run(router.call(models))
+    assert models.started == ["primary", "fallback", "extra"]
+
+
+def test_hedging_disabled_waits_for_the_primary():
+    router = _router(hedging=False)
+    models = FakeModels({"primary": 0.1, "fallback": 0.0, "extra": 0.0})
+    assert asyncio.run(router.call(models)) == ("answer from primary", "primary")
+    assert models.started == ["primary"]
@@ -0,0 +1,232 @@
+"""Tests for state delta sequencing, subscriptions and dashboard page streams."""
+
+import asyncio
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.discovery import ApplicationInfo
+from app.state_deltas import PAGE_FIELDS, RESYNC, PageStream, StateDeltaTracker
+
+NOW = datetime.now()
+
+
+class World:
+    """Randomly changing application, tunnel and port state."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.apps = {}
+        self.tunnels = {}
+        self.ports = {}
+        self.last_rotation = None
+        for _ in range(30):
+            self.add()
+
+    def add(self):
+        # New PIDs land anywhere in PID order, shifting pages
+        pid = self.rng.randrange(1, 100000)
+        while pid in self.apps:
+            pid = self.rng.randrange(1, 100000)
+        self.apps[pid] = ApplicationInfo(pid, f"app-{pid % 7}", 1024 + pid % 1000, "10.0.0.1", 443, NOW, NOW)
+
+    def step(self):
+        for _ in range(self.rng.randint(1, 4)):
+            action = self.rng.random()
+            pids = sorted(self.apps)
+            if action < 0.2:
+                self.add()
+            elif action < 0.35 and pids:
+                pid = self.rng.choice(pids)
+                del self.apps[pid]
+                self.tunnels.pop(pid, None)
+                self.ports.pop(pid, None)
+            elif action < 0.6 and pids:
+                pid = self.rng.choice(pids)
+                counters = SimpleNamespace(connections_active=self.rng.randint(0, 5), rate=self.rng.random() * 1000)
+                self.tunnels[pid] = SimpleNamespace(counters=counters)
+            elif action < 0.9 and pids:
+                self.ports[self.rng.choice(pids)] = self.rng.randint(20000, 30000)
+            else:
+                self.last_rotation = datetime.fromtimestamp(self.rng.randint(0, 2 ** 31))
+
+    def update(self, tracker: StateDeltaTracker):
+        return tracker.update(self.apps, self.tunnels, self.ports, self.last_rotation)
+
+
+class Client:
+    """Remote copy of the state built from a snapshot and deltas."""
+
+    def __init__(self, snapshot):
+        self.seq = snapshot["seq"]
+        self.rows = {row["pid"]: row for row in snapshot["rows"]}
+        self.last_rotation = snapshot["last_rotation"]
+
+    def apply(self, delta):
+        assert delta["seq"] == self.seq + 1
+        self.seq = delta["seq"]
+        for pid in delta["removed"]:
+            del self.rows[pid]
+        for row in delta["upserts"]:
+            self.rows[row["pid"]] = row
+        if "last_rotation" in delta:
+            self.last_rotation = delta["last_rotation"]
+        assert len(self.rows) == delta["total"]
+
+    def matches(self, tracker: StateDeltaTracker) -> bool:
+        snapshot = tracker.snapshot()
+        return (
+            self.seq == snapshot["seq"]
+            and sorted(self.rows) == [row["pid"] for row in snapshot["rows"]]
+            and list(self.rows[row["pid"]] for row in snapshot["rows"]) == snapshot["rows"]
+            and self.last_rotation == snapshot["last_rotation"]
+        )
+
+
+def test_snapshot_plus_deltas_equals_current_state():
+    world = World(1)
+    tracker = StateDeltaTracker()
+    world.update(tracker)
+    client = Client(tracker.snapshot())
+    subscription = tracker.subscribe()
+
+    for _ in range(300):
+        world.step()
+        delta = world.update(tracker)
+        if delta is not None:
+            assert subscription.queue.get_nowait() is delta
+            client.apply(delta)
+        assert client.matches(tracker)
+
+
+def test_unchanged_state_or_versions_publish_nothing():
+    world = World(2)
+    tracker = StateDeltaTracker()
+    assert tracker.update(world.apps, world.tunnels, world.ports, None, (1, 1))["seq"] == 1
+    # Same counters: the diff is skipped even though the state changed underneath
+    world.add()
+    assert tracker.update(world.apps, world.tunnels, world.ports, None, (1, 1)) is None
+    assert tracker.update(world.apps, world.tunnels, world.ports, None, (1, 2))["seq"] == 2
+    assert tracker.update(world.apps, world.tunnels, world.ports, None) is None
+    assert tracker.seq == 2
+
+
+def test_resuming_from_a_sequence_number():
+    world = World(3)
+    tracker = StateDeltaTracker(history_size=5)
+    world.update(tracker)
+    old = Client(tracker.snapshot())
+    for _ in range(3):
+        world.step()
+        world.update(tracker)
+
+    for delta in tracker.since(old.seq):
+        old.apply(delta)
+    assert old.matches(tracker)
+    assert tracker.since(tracker.seq) == []
+    assert tracker.since(tracker.seq + 1) is None
+
+    for _ in range(10):
+        world.step()
+        world.update(tracker)
+    # Deltas after seq 1 fell out of the five-entry history
+    assert tracker.since(1) is None
+    assert [delta["seq"] for delta in tracker.since(tracker.seq - 5)] == list(range(tracker.seq - 4, tracker.seq + 1))
+
+
+def _publish(world: World, tracker: StateDeltaTracker, count: int):
+    published = 0
+    while published < count:
+        world.step()
+        published += world.update(tracker) is not None
+
+
+def test_lagging_subscriber_gets_resync_snapshot():
+    world = World(4)
+    tracker = StateDeltaTracker(queue_size=4)
+    world.update(tracker)
+    subscription = tracker.subscribe()
+
+    # The fifth undelivered delta replaces the whole queue with a resync request
+    _publish(world, tracker, 5)
+    assert subscription.queue.qsize() == 1
+    _publish(world, tracker, 2)
+
+    # The snapshot already covers the deltas queued behind the resync request
+    assert subscription.queue.get_nowait() is RESYNC
+    client = Client(tracker.snapshot())
+    while not subscription.queue.empty():
+        assert subscription.queue.get_nowait()["seq"] <= client.seq
+    assert client.matches(tracker)
+
+    # Deltas after the resync apply on top of the fresh snapshot
+    _publish(world, tracker, 1)
+    client.apply(subscription.queue.get_nowait())
+    assert client.matches(tracker)
+
+
+def _expected_page(tracker: StateDeltaTracker, offset: int, limit: int):
+    return [[pid, *tracker.rows[pid]] for pid in tracker.pids.page(offset, limit)]
+
+
+def test_page_stream_keeps_the_page_in_sync():
+    for offset, limit in ((0, 5), (10, 7), (25, 50)):
+        world = World(5 + offset)
+        tracker = StateDeltaTracker()
+        world.update(tracker)
+        stream = PageStream(tracker, offset=offset, limit=limit)
+        message = stream.snapshot()
+        assert message["fields"] == PAGE_FIELDS
+        page, seq = message["rows"], message["seq"]
+
+        for _ in range(200):
+            world.step()
+            world.update(tracker)
+            while not stream.subscription.queue.empty():
+                message = stream.page_delta(stream.subscription.queue.get_nowait())
+                if message is None:
+                    continue
+                # Every message chains onto the previous one
+                assert message["prev"] == seq
+                seq = message["seq"]
+                if message["type"] == "page":
+                    page = message["rows"]
+                else:
+                    updates = {row[0]: row for row in message["rows"]}
+                    assert set(updates) <= {row[0] for row in page}
+                    page = [updates.get(row[0], row) for row in page]
+                assert message["total"] == len(tracker.pids)
+            assert page == _expected_page(tracker, offset, limit)
+        stream.close()
+        assert not tracker.subscribers
+
+
+def test_page_stream_ignores_changes_off_the_page():
+    world = World(6)
+    tracker = StateDeltaTracker()
+    world.update(tracker)
+    stream = PageStream(tracker, offset=0, limit=3)
+    stream.snapshot()
+    last_pid = tracker.pids[len(tracker.pids) - 1]
+
+    world.ports[last_pid] = 12345
+    delta = world.update(tracker)
+    assert stream.page_delta(delta) is None
+    # An already covered sequence number is not sent again
+    assert stream.page_delta({**delta, "upserts": []}) is None
+
+
+def test_page_stream_resyncs_after_overflow():
+    world = World(7)
+    tracker = StateDeltaTracker(queue_size=2)
+    world.update(tracker)
+    stream = PageStream(tracker, offset=0, limit=10)
+    first = stream.snapshot()
+    for _ in range(20):
+        world.step()
+        world.update(tracker)
+
+    message = asyncio.run(stream.next())
+    assert message["type"] == "page"
+    assert message["prev"] == first["seq"]
+    assert message["rows"] == _expected_page(tracker, 0, 10)
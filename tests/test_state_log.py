@@ -0,0 +1,153 @@
+"""Recovery tests for the log-structured state store."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.state_io import StateIO
+from app.state_log import CHECKPOINT_FILE, LogStructuredStore, encode_record
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _open(directory: Path, **config) -> LogStructuredStore:
+    store = LogStructuredStore(directory, StateIO({"fsync": False}), {"compaction_interval": 3600, **config})
+    await store.open()
+    return store
+
+
+async def _crash(store: LogStructuredStore):
+    """Stop a store without its final checkpoint, as if the process died."""
+    store.running = False
+    store._compaction_task.cancel()
+    await store.io.close()
+
+
+async def _shutdown(store: LogStructuredStore):
+    await store.close()
+    await store.io.close()
+
+
+async def _read_all(directory: Path, keys, **config) -> Dict[str, Optional[bytes]]:
+    store = await _open(directory, **config)
+    try:
+        return {key: await store.get(key) for key in keys}
+    finally:
+        await _shutdown(store)
+
+
+def _write(directory: Path, batches, crash=True, **config) -> LogStructuredStore:
+    async def write():
+        store = await _open(directory, **config)
+        for batch in batches:
+            await store.put_many(batch)
+        await (_crash(store) if crash else _shutdown(store))
+        return store
+    return _run(write())
+
+
+def _segment(directory: Path, segment: int) -> Path:
+    return LogStructuredStore(directory, None)._segment_path(segment)
+
+
+def test_clean_restart_restores_latest_values(tmp_path):
+    _write(tmp_path, [{"a": b"1", "b": b"1"}, {"a": b"2"}], crash=False)
+    assert _run(_read_all(tmp_path, ["a", "b", "c"])) == {"a": b"2", "b": b"1", "c": None}
+
+
+def test_torn_tail_record_falls_back_to_previous_value(tmp_path):
+    _write(tmp_path, [{"a": b"first"}, {"a": b"second"}])
+    path = _segment(tmp_path, 0)
+    torn_size = path.stat().st_size - 3
+    path.write_bytes(path.read_bytes()[:-3])
+
+    assert _run(_read_all(tmp_path, ["a"])) == {"a": b"first"}
+    # The torn bytes were cut off, so new appends land on a record boundary
+    assert path.stat().st_size == torn_size - len(encode_record("a", b"second")) + 3
+    _write(tmp_path, [{"a": b"third"}])
+    assert _run(_read_all(tmp_path, ["a"])) == {"a": b"third"}
+
+
+def test_bad_checksum_in_tail_falls_back_to_previous_value(tmp_path):
+    _write(tmp_path, [{"a": b"first", "b": b"kept"}, {"a": b"second"}])
+    path = _segment(tmp_path, 0)
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert _run(_read_all(tmp_path, ["a", "b"])) == {"a": b"first", "b": b"kept"}
+
+
+def test_checkpoint_limits_replay_to_the_tail(tmp_path):
+    _write(tmp_path, [{f"k{i}": str(i).encode()} for i in range(5)], checkpoint_every=2)
+    checkpoint = json.loads((tmp_path / CHECKPOINT_FILE).read_bytes())
+    assert len(checkpoint["index"]) == 4
+
+    async def reopen():
+        store = await _open(tmp_path)
+        try:
+            return store.stats["replayed"], {key: await store.get(key) for key in store.index}
+        finally:
+            await _shutdown(store)
+
+    replayed, values = _run(reopen())
+    assert replayed == 1
+    assert values == {f"k{i}": str(i).encode() for i in range(5)}
+
+
+def test_unreadable_checkpoint_replays_the_whole_log(tmp_path):
+    _write(tmp_path, [{"a": b"1"}, {"a": b"2", "b": b"3"}], checkpoint_every=1)
+    (tmp_path / CHECKPOINT_FILE).write_bytes(b'{"segment": 0, "off')
+
+    assert _run(_read_all(tmp_path, ["a", "b"])) == {"a": b"2", "b": b"3"}
+
+
+def test_rollover_across_segments_survives_crash_and_torn_tail(tmp_path):
+    batches = [{f"k{i % 4}": f"value-{i}".encode()} for i in range(20)]
+    _write(tmp_path, batches, segment_size=64)
+    store = LogStructuredStore(tmp_path, None)
+    segments = store._list_segments()
+    assert len(segments) > 3
+
+    expected = {f"k{i % 4}": f"value-{i}".encode() for i in range(20)}
+    assert _run(_read_all(tmp_path, expected, segment_size=64)) == expected
+
+    # Tear the newest record, which lives alone at the end of the last segment. The
+    # clean reopen above checkpointed it, as an unsynced checkpoint can be on disk
+    last = _segment(tmp_path, segments[-1])
+    last.write_bytes(last.read_bytes()[:-1])
+    expected["k3"] = b"value-15"
+    assert _run(_read_all(tmp_path, expected, segment_size=64)) == expected
+
+
+def test_restart_after_compaction(tmp_path):
+    async def write():
+        store = await _open(tmp_path)
+        for i in range(10):
+            await store.put_many({"a": f"a{i}".encode(), "b": f"b{i}".encode()})
+        assert await store.compact()
+        await store.put_many({"a": b"after"})
+        await _crash(store)
+
+    _run(write())
+    store = LogStructuredStore(tmp_path, None)
+    assert store._list_segments() == [1, 2]
+    assert _run(_read_all(tmp_path, ["a", "b"])) == {"a": b"after", "b": b"b9"}
+
+
+def test_crash_during_compaction_keeps_the_old_log(tmp_path):
+    async def write():
+        store = await _open(tmp_path)
+        for i in range(5):
+            await store.put_many({"a": f"a{i}".encode()})
+        # Compacted segment written but neither checkpointed nor swapped in
+        await store.io.run(store._rewrite, store.active_segment + 1)
+        (tmp_path / "segment.00000009.log.tmp").write_bytes(b"partial")
+        await _crash(store)
+
+    _run(write())
+    assert _run(_read_all(tmp_path, ["a"])) == {"a": b"a4"}
+    assert not list(tmp_path.glob("*.tmp"))
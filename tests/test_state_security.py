@@ -0,0 +1,88 @@
+"""Tests for envelope encryption of state blobs."""
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from app.state_security import ENVELOPE_MAGIC, SecureStateManager, SecurityException
+
+HEADER_LEN = len(ENVELOPE_MAGIC) + 9
+
+
+@pytest.fixture
+def make_manager(tmp_path, monkeypatch):
+    # State directories are created under ~/.dtm
+    monkeypatch.setenv("HOME", str(tmp_path))
+    managers = []
+
+    def make(cipher="aes-gcm"):
+        manager = SecureStateManager(SimpleNamespace(runtime_id=os.urandom(32)), config={"cipher": cipher})
+        manager._initialize_data_key()
+        managers.append(manager)
+        return manager
+
+    yield make
+    for manager in managers:
+        asyncio.run(manager.io.close())
+
+
+def _flip(blob: bytes, index: int) -> bytes:
+    data = bytearray(blob)
+    data[index] ^= 0x01
+    return bytes(data)
+
+
+@pytest.mark.parametrize("cipher", ["aes-gcm", "chacha20-poly1305"])
+def test_seal_open_round_trip(make_manager, cipher):
+    manager = make_manager(cipher)
+    blob = manager._seal(b'{"tunnels": {}}')
+    assert blob.startswith(ENVELOPE_MAGIC)
+    assert manager._open(blob) == b'{"tunnels": {}}'
+    # Fresh nonce per seal
+    assert manager._seal(b"x") != manager._seal(b"x")
+
+
+def test_data_key_is_not_written_to_disk(make_manager, tmp_path):
+    make_manager()
+    assert not list(tmp_path.rglob("envelope.*.key"))
+
+
+def test_blob_from_another_runtime_is_rejected(make_manager):
+    blob = make_manager()._seal(b"state")
+    with pytest.raises(SecurityException, match="not available in this runtime"):
+        make_manager()._open(blob)
+
+
+def test_unknown_cipher_byte_is_rejected(make_manager):
+    manager = make_manager()
+    blob = bytearray(manager._seal(b"state"))
+    blob[len(ENVELOPE_MAGIC)] = 0x7F
+    with pytest.raises(SecurityException, match="Unknown envelope cipher"):
+        manager._open(bytes(blob))
+
+
+def test_tampered_header_is_rejected(make_manager):
+    manager = make_manager()
+    blob = manager._seal(b"state")
+    # Switching to the other known cipher keeps the header parseable; the AEAD binds it
+    other_cipher = bytearray(blob)
+    other_cipher[len(ENVELOPE_MAGIC)] = 2
+    with pytest.raises(SecurityException, match="failed authentication"):
+        manager._open(bytes(other_cipher))
+    with pytest.raises(SecurityException, match="Not an envelope blob"):
+        manager._open(_flip(blob, 0))
+
+
+@pytest.mark.parametrize("index", [HEADER_LEN, HEADER_LEN + 12, -1])
+def test_tampered_nonce_or_ciphertext_is_rejected(make_manager, index):
+    manager = make_manager()
+    with pytest.raises(SecurityException, match="failed authentication"):
+        manager._open(_flip(manager._seal(b"state"), index))
+
+
+def test_truncated_blob_is_rejected(make_manager):
+    manager = make_manager()
+    with pytest.raises(SecurityException):
+        manager._open(manager._seal(b"state")[:HEADER_LEN + 4])
@@ -0,0 +1,181 @@
+"""Tests for the incremental JSON parser and the streamed AI completion path."""
+
+import asyncio
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app.ai_analysis import AIAnalyzer
+from app.discovery import ApplicationInfo
+from app.stream_parser import IncrementalJSONParser
+
+DOCUMENT = (
+    '{"risk_level": "high", "concerns": ["Plain \\"text\\" auth", "caf\\u00e9 \\\\ tab\\t"], '
+    '"score": -1.25e2, "nested": {"ports": [[22, 443], {"open": true, "note": null}], "empty": []}, '
+    '"tunnel_policy": {"should_tunnel": false, "reason": "\\ud83d\\udd12 encrypted"}}'
+)
+
+
+def _feed_all(chunks):
+    parser = IncrementalJSONParser()
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    return parser, events
+
+
+def test_whole_document():
+    parser, events = _feed_all([DOCUMENT])
+    assert parser.done
+    assert parser.document == json.loads(DOCUMENT)
+    assert (("concerns", 1), "café \\ tab\t") in events
+    assert (("nested", "ports", 0, 1), 443) in events
+    assert (("nested", "ports", 1, "note"), None) in events
+    assert (("tunnel_policy", "reason"), "\U0001f512 encrypted") in events
+
+
+def test_every_two_chunk_split_matches_single_feed():
+    _, expected = _feed_all([DOCUMENT])
+    for split in range(1, len(DOCUMENT)):
+        parser, events = _feed_all([DOCUMENT[:split], DOCUMENT[split:]])
+        assert parser.document == json.loads(DOCUMENT), split
+        assert events == expected, split
+
+
+def test_one_character_chunks():
+    _, expected = _feed_all([DOCUMENT])
+    parser, events = _feed_all(list(DOCUMENT))
+    assert parser.done
+    assert events == expected
+
+
+@pytest.mark.parametrize("text, value", [
+    ('{"a": "\\u00e9"}', "é"),
+    ('{"a": "x\\\\"}', "x\\"),
+    ('{"a": "\\"}"}', '"}'),
+    ('{"a": 12345}', 12345),
+    ('{"a": false}', False),
+])
+def test_escapes_and_literals_split_inside_the_token(text, value):
+    for split in range(text.index(":") + 2, len(text) - 1):
+        parser, events = _feed_all([text[:split], text[split:]])
+        assert events == [(("a",), value)], split
+        assert parser.done
+
+
+def test_value_is_reported_only_once_complete():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"risk_level": "hi') == []
+    assert parser.feed('gh", "score": 1') == [(("risk_level",), "high")]
+    # A number is only complete once a delimiter follows it
+    assert parser.feed('0') == []
+    assert parser.feed('}') == [(("score",), 10)]
+
+
+def test_surrounding_text_is_ignored():
+    parser, events = _feed_all(["Sure!\n```json\n", '{"a": 1}', "\n```\n{\"b\": 2}"])
+    assert parser.document == {"a": 1}
+    assert events == [(("a",), 1)]
+
+
+def test_truncated_stream_keeps_completed_values():
+    parser, events = _feed_all(['{"concerns": ["one", "tw', 'o", "thr'])
+    assert not parser.done
+    assert parser.document == {"concerns": ["one", "two"]}
+    assert events == [(("concerns", 0), "one"), (("concerns", 1), "two")]
+
+    parser, events = _feed_all(['{"policy": {"should_tunnel": tr'])
+    assert not parser.done
+    assert parser.document == {"policy": {}}
+    assert events == []
+
+
+@pytest.mark.parametrize("text", ['{"a": 1e}', '{"a": "\\q"}', '{"a": nul}', '{"a": "\\u12"}'])
+def test_malformed_values_raise(text):
+    with pytest.raises(ValueError):
+        IncrementalJSONParser().feed(text)
+
+
+def _config(stream=True):
+    return {
+        "openrouter": {
+            "api_key": "test", "base_url": "https://openrouter.test/api/v1",
+            "model": "primary/model", "fallback_model": "fallback/model"
+        },
+        "ai_analysis": {
+            "temperature": 0.2, "max_tokens": 1000, "stream": stream, "max_retries": 0,
+            "headers": {}, "routing": {"hedging": False}
+        }
+    }
+
+
+def _sse(*events):
+    body = ": OPENROUTER PROCESSING\n\n"
+    for event in events:
+        body += f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n"
+    return body.encode()
+
+
+def _delta(text):
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+def _analyzer(body: bytes) -> AIAnalyzer:
+    analyzer = AIAnalyzer(_config())
+    analyzer.http_client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=body, headers={"content-type": "text/event-stream"})
+    ))
+    return analyzer
+
+
+RECOMMENDATIONS = {
+    "risk_level": "medium",
+    "concerns": ["Unencrypted traffic"],
+    "recommendations": ["Tunnel it"],
+    "tunnel_policy": {"should_tunnel": True, "reason": "Plaintext protocol"}
+}
+
+
+def test_stream_stops_at_done_and_reports_partials():
+    text = json.dumps(RECOMMENDATIONS)
+    chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+    body = _sse(*(_delta(chunk) for chunk in chunks), "[DONE]", _delta("ignored after DONE"))
+    analyzer = _analyzer(body)
+    partials = []
+
+    response = asyncio.run(analyzer._stream_completion(
+        {"model": "primary/model"}, lambda partial: partials.append(json.loads(json.dumps(partial)))
+    ))
+
+    assert json.loads(response["choices"][0]["message"]["content"]) == RECOMMENDATIONS
+    assert partials[0] == {"risk_level": "medium"}
+    assert partials[-1] == RECOMMENDATIONS
+
+
+def test_stream_error_event_raises():
+    body = _sse(_delta('{"risk_level": "lo'), {"error": {"message": "overloaded", "code": 502}})
+    with pytest.raises(ValueError, match="Streaming error"):
+        asyncio.run(_analyzer(body)._stream_completion({"model": "primary/model"}))
+
+
+def _context(analyzer: AIAnalyzer):
+    now = datetime.now()
+    return analyzer._create_analysis_context(ApplicationInfo(42, "app", 8080, "10.0.0.1", 80, now, now))
+
+
+def test_recommendations_from_stream():
+    body = _sse(_delta(json.dumps(RECOMMENDATIONS)), "[DONE]")
+    analyzer = _analyzer(body)
+    assert asyncio.run(analyzer._get_ai_recommendations(_context(analyzer))) == RECOMMENDATIONS
+
+
+def test_error_event_becomes_failed_recommendation():
+    body = _sse({"error": {"message": "overloaded"}})
+    analyzer = _analyzer(body)
+    recommendations = asyncio.run(analyzer._get_ai_recommendations(_context(analyzer)))
+    assert recommendations["risk_level"] == "unknown"
+    assert "Streaming error" in recommendations["concerns"][0]
+    assert recommendations["tunnel_policy"]["should_tunnel"] is False
+    assert analyzer.stats["errors"] == 1
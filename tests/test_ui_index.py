@@ -0,0 +1,149 @@
+"""Tests for the UI's application indexes and filter bar queries."""
+
+import random
+import time
+from datetime import datetime
+
+from app.discovery import ApplicationInfo
+from app.ui_index import AppFilter, AppIndex, SortedIndex, analysis_risk
+
+NAMES = ["sshd", "SSH-agent", "nginx", "node", "nodemon", "python3", "Python", "chrome", "chromedriver", "redis-server", "a", "ab"]
+RISKS = ["low", "medium", "high", "Critical", None]
+NOW = datetime.now()
+
+
+def _app(pid: int, name: str, port: int) -> ApplicationInfo:
+    return ApplicationInfo(pid, name, port, "10.0.0.1", 443, NOW, NOW)
+
+
+def _analysis(risk):
+    return {"recommendations": {"risk_level": risk}} if risk else {"recommendations": {}}
+
+
+def _matches(app: ApplicationInfo, app_filter: AppFilter, analyses, tunneled) -> bool:
+    """Linear-scan reference for AppIndex.search."""
+    name = app.name.lower()
+    if not all(name.startswith(prefix) for prefix in app_filter.prefixes):
+        return False
+    if not all(substring in name for substring in app_filter.substrings):
+        return False
+    if app_filter.ports and app.local_port not in app_filter.ports:
+        return False
+    if app_filter.risks and analysis_risk(analyses.get(app.pid)) not in app_filter.risks:
+        return False
+    return app_filter.tunneled is None or (app.pid in tunneled) == app_filter.tunneled
+
+
+def _random_query(rng: random.Random) -> str:
+    terms = []
+    for _ in range(rng.randint(1, 3)):
+        name = rng.choice(NAMES).lower()
+        start = rng.randrange(len(name))
+        # Substrings of 1-5 characters, so short ones bypass the trigram index
+        fragment = name[start:start + rng.randint(1, 5)]
+        kind = rng.random()
+        if kind < 0.35:
+            terms.append(fragment if rng.random() < 0.5 else fragment.upper())
+        elif kind < 0.55:
+            terms.append("^" + name[:rng.randint(1, len(name))])
+        elif kind < 0.7:
+            terms.append(rng.choice([f"port:{rng.randint(8000, 8009)}", str(rng.randint(8000, 8009))]))
+        elif kind < 0.85:
+            terms.append(f"risk:{rng.choice(['low', 'medium', 'high', 'critical', 'unknown'])}")
+        else:
+            terms.append(rng.choice(["status:active", "status:inactive", "status:tunneled"]))
+    return " ".join(terms)
+
+
+def test_parse_terms():
+    app_filter = AppFilter.parse("^SSH port:22 8080 status:Active risk:HIGH agent port:x")
+    assert app_filter.prefixes == ["ssh"]
+    assert app_filter.ports == {22, 8080}
+    assert app_filter.tunneled is True
+    assert app_filter.risks == {"high"}
+    assert app_filter.substrings == ["agent", "port:x"]
+    assert not AppFilter.parse("   ")
+
+
+def test_sorted_index():
+    index = SortedIndex([5, 1, 3, 3])
+    index.add(4)
+    index.add(4)
+    index.discard(1)
+    index.discard(42)
+    assert list(index) == [3, 4, 5]
+    assert index.page(1, 5) == [4, 5]
+    assert index.position(6) == 3 and 4 in index and 1 not in index
+
+
+def test_incremental_index_matches_linear_scan():
+    rng = random.Random(43)
+    index = AppIndex()
+    apps, analyses, tunneled = {}, {}, set()
+    next_pid = 1
+
+    for step in range(400):
+        # Apply a random discovery delta, analysis update or tunnel change
+        action = rng.random()
+        if action < 0.45 or not apps:
+            added = []
+            for _ in range(rng.randint(1, 4)):
+                app = _app(next_pid, rng.choice(NAMES), rng.randint(8000, 8009))
+                apps[app.pid] = app
+                if rng.random() < 0.5:
+                    analyses[app.pid] = _analysis(rng.choice(RISKS))
+                added.append(app)
+                next_pid += 1
+            index.apply_changes(added, [], analyses)
+        elif action < 0.7:
+            removed = [apps.pop(pid) for pid in rng.sample(sorted(apps), min(len(apps), rng.randint(1, 3)))]
+            for app in removed:
+                analyses.pop(app.pid, None)
+                tunneled.discard(app.pid)
+            index.apply_changes([], removed)
+        elif action < 0.9:
+            pid = rng.choice(sorted(apps))
+            analyses[pid] = _analysis(rng.choice(RISKS))
+            index.add_analysis(apps[pid], analyses[pid])
+        else:
+            tunneled ^= {rng.choice(sorted(apps))}
+
+        rebuilt = AppIndex()
+        rebuilt.rebuild(apps, analyses)
+        assert list(index.by_pid) == sorted(apps)
+        for _ in range(5):
+            query = _random_query(rng)
+            app_filter = AppFilter.parse(query)
+            expected = sorted(pid for pid, app in apps.items() if _matches(app, app_filter, analyses, tunneled))
+            assert list(index.search(app_filter, tunneled)) == expected, (step, query)
+            assert list(rebuilt.search(app_filter, tunneled)) == expected, (step, query)
+
+    # Removing everything leaves no stale index entries behind
+    index.apply_changes([], list(apps.values()))
+    assert not (index.by_pid or index.pids_by_key or index.keys_by_trigram or index.pids_by_port
+                or index.pids_by_risk or index.risk_by_pid or index.analyzed_by_name or index.keys)
+
+
+def test_selective_queries_at_50k_entries_take_under_a_millisecond():
+    rng = random.Random(50)
+    words = ["alpha", "bravo", "delta", "kilo", "lima", "oscar", "sierra", "tango", "victor", "zulu"]
+    apps, analyses = {}, {}
+    for pid in range(1, 50001):
+        # Shared words and suffixes, so names overlap heavily in prefixes and trigrams
+        name = f"{rng.choice(words)}-{rng.choice(words)}-{pid % 500}"
+        apps[pid] = _app(pid, name, 1024 + pid % 20000)
+        analyses[pid] = _analysis(rng.choice(["low", "medium", "high"]) if pid % 100 else "critical")
+    index = AppIndex()
+    index.rebuild(apps, analyses)
+
+    # Selective terms; terms matching a large share of entries are bound by building the result
+    for query in ["zulu-kilo-42", "^sierra-tango-1", "port:1234", "risk:critical", "^oscar-zulu-4 risk:critical"]:
+        app_filter = AppFilter.parse(query)
+        expected = sorted(pid for pid, app in apps.items() if _matches(app, app_filter, analyses, set()))
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            result = index.search(app_filter)
+            timings.append(time.perf_counter() - started)
+        assert list(result) == expected, query
+        assert min(timings) < 0.001, (query, min(timings))